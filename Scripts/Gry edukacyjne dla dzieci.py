@@ -1,6 +1,15 @@
 import pygame
+import pygame.threads
 import os
 import random
+import sys
+import time
+import json
+import struct
+import hashlib
+import collections
+import math
+from array import array
 
 # Inicjalizacja Pygame
 pygame.init()
@@ -16,24 +25,249 @@ FPS = 30
 TILE_SIZE = 100
 PADDING = 10
 FONT_SIZE = 40
+LOADER_THREADS = min(4, os.cpu_count() or 1)  # Liczba wątków dekodujących obrazy przy starcie
+SCALED_CACHE_BUDGET = 8 * 1024 * 1024  # Budżet pamięci (w bajtach) na przeskalowane obiekty i cienie
+ATLAS_PAGE_SIZE = 1024  # Szerokość (i maksymalna wysokość) strony atlasu tekstur
 
 # Dostosuj rozmiar okna w oparciu o maksymalny rozmiar planszy (8x8)
 MAX_BOARD_SIZE = 8
+MAZE_SIZE = 21
+LABYRINTH_DIFFICULTY = (30, 90)  # Dopuszczalny zakres trudności labiryntu (patrz analyze_labyrinth)
+LABYRINTH_EXIT_DISTANCE = MAZE_SIZE  # Najmniejsza liczba kroków od startu do wyjścia
 WINDOW_WIDTH = MAX_BOARD_SIZE * (TILE_SIZE + PADDING) + PADDING
 WINDOW_HEIGHT = MAX_BOARD_SIZE * (TILE_SIZE + PADDING) + PADDING
 
+# Pamięć podręczna na dysku z przeskalowanymi obrazami zapisanymi jako surowe piksele RGBA.
+# Plik bufora jest nazwany skrótem zawartości źródłowego PNG i wariantem przetwarzania,
+# a skrót jest liczony ponownie tylko wtedy, gdy zmieni się czas modyfikacji lub rozmiar źródła.
+class ImageCache:
+    INDEX_FILENAME = 'index.json'
+    BLOB_HEADER = struct.Struct('<4sII')
+    BLOB_MAGIC = b'GRY1'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILENAME)
+        self.index = self._read_index()
+        self.index_changed = False
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Zapisz indeks (błędy zapisu są ignorowane, pamięć podręczna jest tylko optymalizacją)
+    def save_index(self):
+        if not self.index_changed:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+            self.index_changed = False
+        except OSError:
+            pass
+
+    # Zwróć skrót zawartości pliku; unieważnienie następuje po zmianie mtime lub rozmiaru
+    def source_hash(self, source_path):
+        stat = os.stat(source_path)
+        entry = self.index.get(source_path)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['hash']
+
+        with open(source_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        if entry and entry['hash'] != digest:
+            self._remove_blobs(entry['hash'])
+        self.index[source_path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest}
+        self.index_changed = True
+        return digest
+
+    def _remove_blobs(self, digest):
+        try:
+            for filename in os.listdir(self.cache_dir):
+                if filename.startswith(digest):
+                    os.remove(os.path.join(self.cache_dir, filename))
+        except OSError:
+            pass
+
+    def _blob_path(self, source_path, variant):
+        return os.path.join(self.cache_dir, f"{self.source_hash(source_path)}-{variant}.rgba")
+
+    def _read_blob(self, blob_path):
+        try:
+            with open(blob_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        header_size = self.BLOB_HEADER.size
+        if len(data) < header_size:
+            return None
+        magic, width, height = self.BLOB_HEADER.unpack_from(data)
+        if magic != self.BLOB_MAGIC or len(data) != header_size + width * height * 4:
+            return None
+        pixels = memoryview(data)[header_size:]
+        return pygame.image.frombuffer(pixels, (width, height), 'RGBA').convert_alpha()
+
+    def _write_blob(self, blob_path, image):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            width, height = image.get_size()
+            tmp_path = blob_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self.BLOB_HEADER.pack(self.BLOB_MAGIC, width, height))
+                f.write(pygame.image.tostring(image, 'RGBA'))
+            os.replace(tmp_path, blob_path)
+        except OSError:
+            pass
+
+    # Zwróć obraz z pamięci podręcznej lub przygotuj go funkcją prepare i zapisz na dysku
+    def load(self, source_path, variant, prepare):
+        blob_path = self._blob_path(source_path, variant)
+        image = self._read_blob(blob_path)
+        if image is None:
+            image = prepare(source_path)
+            self._write_blob(blob_path, image)
+        return image
+
+# Rejestr zasobów: każdy zestaw obrazów jest wczytywany przy pierwszym użyciu i pozostaje
+# w pamięci do końca działania programu; liczniki trafień i chybień pokazują skuteczność
+class AssetRegistry:
+    def __init__(self):
+        self.loaders = {}
+        self.assets = {}
+        self.hits = 0
+        self.misses = 0
+
+    # Zarejestruj funkcję wczytującą zasób o podanej nazwie (bez wczytywania go)
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    # Zwróć zasób; przy pierwszym użyciu wywołaj jego funkcję wczytującą.
+    # Wyjątek z funkcji wczytującej nie jest zapamiętywany, więc kolejne wywołanie ponowi próbę.
+    def get(self, name):
+        if name in self.assets:
+            self.hits += 1
+            return self.assets[name]
+        self.misses += 1
+        asset = self.loaders[name]()
+        self.assets[name] = asset
+        return asset
+
+# Pamięć podręczna LRU przeskalowanych obrazów z kluczem (nazwa zasobu, rozmiar docelowy).
+# Po przekroczeniu budżetu pamięci usuwane są najdawniej używane obrazy.
+class ScaledImageCache:
+    def __init__(self, budget_bytes=SCALED_CACHE_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.entries = collections.OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Zwróć obraz przeskalowany do size; skaluje tylko przy pierwszym użyciu danej pary (nazwa, rozmiar)
+    def get(self, name, image, size):
+        key = (name, size)
+        scaled = self.entries.get(key)
+        if scaled is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return scaled
+
+        self.misses += 1
+        scaled = pygame.transform.scale(image, size)
+        self.entries[key] = scaled
+        self.used_bytes += scaled.get_pitch() * scaled.get_height()
+        # Najnowszy obraz zostaje nawet wtedy, gdy sam przekracza budżet
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.used_bytes -= evicted.get_pitch() * evicted.get_height()
+        return scaled
+
+# Atlas tekstur: obrazy upakowane półkami (shelf packing) na jednej lub kilku dużych stronach.
+# regions zawiera wycinek (numer strony, prostokąt) każdego obrazu, a images - podpowierzchnie
+# stron, które współdzielą z nimi piksele i mogą zastąpić oryginalny słownik obrazów.
+class TextureAtlas:
+    def __init__(self, images, page_size=ATLAS_PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = []
+        self.regions = {}
+        self.images = {}
+        self._pack(images)
+
+    def _pack(self, images):
+        # Najwyższe obrazy najpierw, aby półki były wypełnione możliwie równo
+        order = sorted(images, key=lambda name: (-images[name].get_height(), name))
+        placements = []
+        page_heights = [0]
+        x = shelf_y = shelf_height = 0
+        for name in order:
+            width, height = images[name].get_size()
+            if width > self.page_size or height > self.page_size:
+                raise ValueError(f"Obraz {name} ({width}x{height}) nie mieści się na stronie atlasu {self.page_size}x{self.page_size}.")
+            if x + width > self.page_size:
+                x, shelf_y, shelf_height = 0, shelf_y + shelf_height, 0
+            if shelf_y + height > self.page_size:
+                page_heights.append(0)
+                x = shelf_y = shelf_height = 0
+            placements.append((name, len(page_heights) - 1, pygame.Rect(x, shelf_y, width, height)))
+            x += width
+            shelf_height = max(shelf_height, height)
+            page_heights[-1] = max(page_heights[-1], shelf_y + shelf_height)
+
+        for page_height in page_heights:
+            page = pygame.Surface((self.page_size, max(1, page_height)), pygame.SRCALPHA)
+            self.pages.append(page.convert_alpha())
+        for name, page_index, rect in placements:
+            page = self.pages[page_index]
+            # BLEND_RGBA_MAX na przezroczystej stronie kopiuje piksele razem z kanałem alfa bez mieszania
+            page.blit(images[name], rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+            self.regions[name] = (page_index, rect)
+            self.images[name] = page.subsurface(rect)
+
+# Element listy dla Surface.blits: obraz z atlasu jest rysowany jako wycinek swojej strony
+def blit_item(image, dest):
+    page = image.get_parent()
+    if page is None:
+        return (image, dest)
+    return (page, dest, pygame.Rect(image.get_offset(), image.get_size()))
+
+# Wykonaj funkcję dla każdego elementu w puli wątków pygame.threads; wyniki są w kolejności elementów.
+# Dekodowanie PNG i skalowanie zwalniają GIL, więc obrazy przetwarzane są równolegle.
+def parallel_map(function, items, workers=LOADER_THREADS):
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    return list(pygame.threads.tmap(function, items, num_workers=min(workers, len(items))))
+
+# Posortowana lista plików PNG w katalogu (stała kolejność niezależna od systemu plików)
+def list_png_files(path):
+    return sorted(filename for filename in os.listdir(path) if filename.endswith('.png'))
+
+# Wczytaj obraz z pliku (lub z pamięci podręcznej, jeśli została podana)
+def load_image_file(source_path, variant, prepare, cache=None):
+    if cache is None:
+        return prepare(source_path)
+    return cache.load(source_path, variant, prepare)
+
 # Załaduj obrazy (zaktualizowane, aby zwracały słownik dla kształtów i cieni)
-def load_images(path, tile_size):
+def load_images(path, tile_size, cache=None, workers=LOADER_THREADS):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Katalog {path} nie istnieje.")
     
-    images = {}
-    for filename in os.listdir(path):
-        if filename.endswith('.png'):
-            img = pygame.image.load(os.path.join(path, filename)).convert_alpha()
-            img = scale_image_to_fit_tile(img, tile_size)
-            image_name = os.path.splitext(filename)[0]
-            images[image_name] = img
+    def prepare(source_path):
+        img = pygame.image.load(source_path).convert_alpha()
+        return scale_image_to_fit_tile(img, tile_size)
+
+    filenames = list_png_files(path)
+    loaded = parallel_map(lambda filename: load_image_file(os.path.join(path, filename), f"fit{tile_size}", prepare, cache), filenames, workers)
+    images = {os.path.splitext(filename)[0]: img for filename, img in zip(filenames, loaded)}
+    
+    if cache is not None:
+        cache.save_index()
     
     if not images:
         raise FileNotFoundError(f"Nie znaleziono obrazów PNG w katalogu {path}.")
@@ -51,64 +285,319 @@ def scale_image_to_fit_tile(image, tile_size):
 def scale_background_image(image, window_width, window_height):
     return pygame.transform.scale(image, (window_width, window_height))
 
-# Utwórz nową planszę do gry
-def create_board(size, images):
+# Wczytaj i przeskaluj obrazy tła równolegle; zwraca słownik nazwa pliku bez rozszerzenia -> obraz
+def load_background_images(path, filenames, workers=LOADER_THREADS):
+    def load(filename):
+        return scale_background_image(pygame.image.load(os.path.join(path, filename)), WINDOW_WIDTH, WINDOW_HEIGHT)
+
+    loaded = parallel_map(load, filenames, workers)
+    return {os.path.splitext(filename)[0]: img for filename, img in zip(filenames, loaded)}
+
+BOARD_MAGIC = b'GRYB'
+BOARD_HEADER = struct.Struct('<4sB')
+BOARD_IMAGES = 256  # Numery obrazków na planszy są bajtami, więc plansze losują obrazki z pierwszych 256 obrazów
+
+# Tabela obrazów gry w zapamiętywanie: numer obrazka na planszy -> obraz
+def image_table(images):
+    return list(images.values())
+
+# Sprawdź, czy tyle obrazów wystarczy na planszę size x size. Liczy się tylko liczba różnych
+# obrazków potrzebnych na planszę; katalog może mieć więcej niż BOARD_IMAGES obrazów.
+def check_board_size(size, num_images):
     num_tiles = (size * size) // 2
-    if num_tiles > len(images):
-        raise ValueError(f"Za mało unikatowych obrazów, aby zapełnić planszę {size}x{size}. Wymagana liczba obrazów {num_tiles}, ale dostępna jest tylko liczba {len(images)}.")
+    available = min(num_images, BOARD_IMAGES)
+    if num_tiles > available:
+        raise ValueError(f"Za mało unikatowych obrazów, aby zapełnić planszę {size}x{size}. Wymagana liczba obrazów {num_tiles}, ale dostępna jest tylko liczba {available}.")
+    if num_tiles * 2 != size * size:
+        raise IndexError("Za mało kafelek, aby zapełnić planszę.")
+    return num_tiles
+
+# Utwórz nową planszę do gry: bajty z numerami obrazków z image_table(images),
+# kafelek (row, col) ma indeks row * size + col, a każdy numer występuje dokładnie dwa razy
+def create_board(size, images, rng=random):
+    num_tiles = check_board_size(size, len(images))
     
-    selected_images = random.sample(list(images.values()), num_tiles)
+    selected_images = rng.sample(range(min(len(images), BOARD_IMAGES)), num_tiles)
     tiles = selected_images * 2
-    random.shuffle(tiles)
-    
-    board = []
-    for i in range(size):
-        row = []
-        for j in range(size):
-            if tiles:  # Upewnij się, że lista kafelków nie jest pusta
-                row.append(tiles.pop())
-            else:
-                raise IndexError("Za mało kafelek, aby zapełnić planszę.")
-        board.append(row)
+    rng.shuffle(tiles)
+    return bytes(tiles)
+
+# Sprawdź poprawność planszy: kwadrat o parzystej liczbie kafelków, znane numery obrazków, każdy w parze
+def validate_board(board, num_images):
+    size = math.isqrt(len(board))
+    if size * size != len(board) or len(board) % 2:
+        raise ValueError(f"Plansza ma {len(board)} kafelków, a powinna być kwadratem o parzystej liczbie kafelków.")
+    counts = collections.Counter(board)
+    for image_id, count in counts.items():
+        if image_id >= num_images:
+            raise ValueError(f"Nieznany numer obrazka {image_id} (dostępnych obrazów: {num_images}).")
+        if count != 2:
+            raise ValueError(f"Obrazek {image_id} występuje na planszy {count} razy zamiast 2.")
+    return size
+
+# Zapis planszy: nagłówek GRYB, rozmiar boku i numery obrazków
+def serialize_board(board):
+    return BOARD_HEADER.pack(BOARD_MAGIC, math.isqrt(len(board))) + bytes(board)
+
+# Odczyt planszy zapisanej przez serialize_board, ze sprawdzeniem jej poprawności
+def deserialize_board(data, num_images):
+    if len(data) < BOARD_HEADER.size:
+        raise ValueError("Zapis planszy jest za krótki.")
+    magic, size = BOARD_HEADER.unpack_from(data)
+    board = bytes(data[BOARD_HEADER.size:])
+    if magic != BOARD_MAGIC or len(board) != size * size:
+        raise ValueError("Niepoprawny zapis planszy.")
+    validate_board(board, num_images)
     return board
 
-# Narysuj planszę do gry
-def draw_board(screen, board, revealed, offset_x, offset_y):
-    for i, row in enumerate(board):
-        for j, tile in enumerate(row):
-            x = offset_x + j * (TILE_SIZE + PADDING)
-            y = offset_y + i * (TILE_SIZE + PADDING)
-            pygame.draw.rect(screen, WHITE, (x, y, TILE_SIZE, TILE_SIZE)) # Dodaj białe tło do każdego kafelka
-            if revealed[i][j]:
-                tile_rect = tile.get_rect(center=(x + TILE_SIZE // 2, y + TILE_SIZE // 2))
-                screen.blit(tile, tile_rect.topleft)
-            else:
-                pygame.draw.rect(screen, BLACK, (x, y, TILE_SIZE, TILE_SIZE), 2)
+# Masowe generowanie plansz (np. do doboru trudności) bez pętli Pythona po kafelkach.
+# Każdy element dostaje losowy 64-bitowy klucz, którego najmłodszy bajt jest zastąpiony numerem
+# obrazka; posortowanie kluczy w C i odczyt tych bajtów daje losowy wybór obrazków, a potem
+# losową kolejność kafelków.
+# Tasowanie jest jednostajne, bo starsze 56 bitów kluczy to niezależne losowania z tego samego
+# rozkładu: przy różnych kluczach każda kolejność elementów jest tak samo prawdopodobna.
+# Numer obrazka decyduje tylko przy remisie 56 bitów, czyli z prawdopodobieństwem poniżej 10^-13 na planszę.
+def generate_boards(count, size, num_images, rng=None):
+    rng = rng or random.Random()
+    num_tiles = check_board_size(size, num_images)
+    num_images = min(num_images, BOARD_IMAGES)
+    low_byte = slice(0 if sys.byteorder == 'little' else 7, None, 8)
+    image_ids = bytes(range(num_images))
+    pairs = image_ids * 2
+    for _ in range(count):
+        # Gdy plansza używa wszystkich obrazów, wybór obrazków nie jest potrzebny
+        if num_tiles < num_images:
+            image_keys = bytearray(rng.randbytes(8 * num_images))
+            image_keys[low_byte] = image_ids
+            pairs = array('Q', sorted(memoryview(image_keys).cast('Q'))).tobytes()[low_byte][:num_tiles] * 2
+        tile_keys = bytearray(rng.randbytes(16 * num_tiles))
+        tile_keys[low_byte] = pairs
+        yield array('Q', sorted(memoryview(tile_keys).cast('Q'))).tobytes()[low_byte]
 
-# Sprawdź, czy wszystkie kafelki są dopasowane
-def all_tiles_matched(revealed):
-    for row in revealed:
-        if False in row:
-            return False
-    return True
+# Gotowe powierzchnie kafelka: białe tło pod odkrytym obrazkiem i zakryty kafelek z czarną ramką
+def render_tile_faces():
+    blank = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    blank.fill(WHITE) # Białe tło każdego kafelka
+    hidden = blank.copy()
+    pygame.draw.rect(hidden, BLACK, hidden.get_rect(), 2)
+    return blank, hidden
+
+TILE_HIDDEN = 0
+TILE_REVEALED = 1
+TILE_MATCHED = 2
+
+# Model planszy gry w zapamiętywanie. Kafelek (row, col) ma indeks row * size + col w płaskich
+# tablicach array('B') z numerami obrazków i stanami kafelków. Geometria (prostokąty i gotowe
+# elementy Surface.blits dla stanu zakrytego i odkrytego) jest liczona raz, a licznik
+# dopasowanych par pozwala sprawdzić wygraną w stałym czasie.
+class MemoryBoard:
+    def __init__(self, board, images, offset_x, offset_y, faces):
+        blank, hidden = faces
+        self.size = math.isqrt(len(board))
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.images = images
+        self.tiles = array('B', board)
+        self.items = []
+        for index, image_id in enumerate(self.tiles):
+            tile = images[image_id]
+            x = offset_x + (index % self.size) * (TILE_SIZE + PADDING)
+            y = offset_y + (index // self.size) * (TILE_SIZE + PADDING)
+            rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+            tile_rect = tile.get_rect(center=rect.center)
+            self.items.append((rect, ((hidden, rect.topleft),), ((blank, rect.topleft), blit_item(tile, tile_rect.topleft))))
+        self.states = array('B', bytes(len(self.tiles)))
+        self.pairs = len(self.tiles) // 2
+        self.matched_pairs = 0
+
+    # Indeks kafelka pod punktem ekranu lub -1 poza planszą
+    def index_at(self, pos):
+        col = (pos[0] - self.offset_x) // (TILE_SIZE + PADDING)
+        row = (pos[1] - self.offset_y) // (TILE_SIZE + PADDING)
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return row * self.size + col
+        return -1
+
+    def reveal(self, index):
+        self.states[index] = TILE_REVEALED
+
+    def hide(self, index):
+        self.states[index] = TILE_HIDDEN
 
-# Wygeneruj proceduralny labirynt używając algorytmu "Depth-First Search"
-def generate_labyrinth(width, height):
-    maze = [[1 for _ in range(width)] for _ in range(height)]
+    def match(self, first, second):
+        self.states[first] = TILE_MATCHED
+        self.states[second] = TILE_MATCHED
+        self.matched_pairs += 1
 
-    def carve_passages_from(cx, cy, grid):
-        directions = [(0, -2), (2, 0), (0, 2), (-2, 0)]
-        random.shuffle(directions)
-        for (dx, dy) in directions:
-            nx, ny = cx + dx, cy + dy
-            if 0 <= nx < width and 0 <= ny < height and grid[ny][nx] == 1:
-                grid[cy + dy // 2][cx + dx // 2] = 0
-                grid[ny][nx] = 0
-                carve_passages_from(nx, ny, grid)
+    def is_solved(self):
+        return self.matched_pairs == self.pairs
 
-    maze[1][1] = 0
-    carve_passages_from(1, 1, maze)
-    return maze
+# Narysuj planszę do gry jednym wywołaniem Surface.blits
+def draw_board(screen, board):
+    screen.blits([item for (rect, hidden_items, revealed_items), state in zip(board.items, board.states)
+                  for item in (revealed_items if state else hidden_items)], False)
+
+# Przerysuj tylko zmienione kafelki (indeksy) i zwróć listę prostokątów do odświeżenia
+def draw_dirty_tiles(screen, board, dirty_tiles):
+    dirty_rects = []
+    blits = []
+    for index in dirty_tiles:
+        rect, hidden_items, revealed_items = board.items[index]
+        blits.extend(revealed_items if board.states[index] else hidden_items)
+        dirty_rects.append(rect)
+    screen.blits(blits, False)
+    return dirty_rects
+
+# Labirynt jest przechowywany jako płaska tablica bytearray o długości width * height
+# (1 - ściana, 0 - przejście), komórka (x, y) ma indeks y * width + x.
+# Pokoje leżą na nieparzystych współrzędnych, a ściany między nimi na indeksie środkowym
+# (i + n) // 2. Przejście poziome poza krawędź zawsze trafia do parzystego wiersza,
+# więc wystarczy sprawdzać granice całej tablicy.
+
+# Płaska siatka wypełniona ścianami i maska pokojów, które należy połączyć
+def create_maze_grid(width, height):
+    grid = bytearray(b'\x01') * (width * height)
+    rooms = bytearray(width * height)
+    for y in range(1, height, 2):
+        row = y * width
+        for x in range(1, width, 2):
+            rooms[row + x] = 1
+    return grid, rooms
+
+def maze_steps(width):
+    return (-2 * width, 2, 2 * width, -2)
+
+# Sąsiednie pokoje komórki i, dla których mask[n] jest ustawione
+def maze_neighbours(i, steps, mask, size):
+    neighbours = []
+    for step in steps:
+        n = i + step
+        if 0 <= n < size and mask[n]:
+            neighbours.append(n)
+    return neighbours
+
+# "Depth-First Search" z jawnym stosem zamiast rekurencji
+def carve_maze_dfs(grid, rooms, width, start, rng=random):
+    size = len(grid)
+    steps = maze_steps(width)
+    rand = rng.random
+    rooms[start] = 0
+    grid[start] = 0
+    stack = [start]
+    while stack:
+        i = stack[-1]
+        options = maze_neighbours(i, steps, rooms, size)
+        if not options:
+            stack.pop()
+            continue
+        n = options[int(rand() * len(options))]
+        rooms[n] = 0
+        grid[(i + n) // 2] = 0
+        grid[n] = 0
+        stack.append(n)
+
+# Randomizowany algorytm Prima: losowy pokój z granicy dołączany do losowego sąsiada w labiryncie
+def carve_maze_prim(grid, rooms, width, start, rng=random):
+    size = len(grid)
+    steps = maze_steps(width)
+    rand = rng.random
+    in_maze = bytearray(size)
+    in_maze[start] = 1
+    grid[start] = 0
+    rooms[start] = 0
+    frontier = maze_neighbours(start, steps, rooms, size)
+    for n in frontier:
+        rooms[n] = 0
+    while frontier:
+        k = int(rand() * len(frontier))
+        i = frontier[k]
+        frontier[k] = frontier[-1]
+        frontier.pop()
+        connected = maze_neighbours(i, steps, in_maze, size)
+        n = connected[int(rand() * len(connected))]
+        grid[(i + n) // 2] = 0
+        grid[i] = 0
+        in_maze[i] = 1
+        for n in maze_neighbours(i, steps, rooms, size):
+            rooms[n] = 0
+            frontier.append(n)
+
+# Randomizowany algorytm Kruskala ze zbiorami rozłącznymi (union-find z kompresją ścieżek)
+def carve_maze_kruskal(grid, rooms, width, start, rng=random):
+    size = len(grid)
+    parent = list(range(size))
+    edges = []
+    for i in [i for i in range(size) if rooms[i]]:
+        grid[i] = 0
+        if i + 2 < size and rooms[i + 2]:
+            edges.append((i, i + 2))
+        if i + 2 * width < size and rooms[i + 2 * width]:
+            edges.append((i, i + 2 * width))
+    rng.shuffle(edges)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in edges:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+            grid[(a + b) // 2] = 0
+
+# Algorytm Wilsona: błądzenie losowe z usuwaniem pętli, daje jednostajnie losowe drzewo rozpinające.
+# Pierwsze błądzenia długo krążą, zanim trafią w małe jeszcze drzewo, więc czas silnie zależy od ziarna:
+# labirynt 1001x1001 powstaje w 3-28 s (dfs w poniżej 1 s). Nadaje się tylko do małych labiryntów.
+def carve_maze_wilson(grid, rooms, width, start, rng=random):
+    size = len(grid)
+    steps = maze_steps(width)
+    rand = rng.random
+    in_maze = bytearray(size)
+    in_maze[start] = 1
+    grid[start] = 0
+    # Zapamiętany kierunek wyjścia z każdego pokoju; nadpisanie usuwa pętle z błądzenia
+    next_room = {}
+    remaining = [i for i in range(size) if rooms[i]]
+    rng.shuffle(remaining)
+    for walk_start in remaining:
+        if in_maze[walk_start]:
+            continue
+        i = walk_start
+        while not in_maze[i]:
+            options = maze_neighbours(i, steps, rooms, size)
+            n = options[int(rand() * len(options))]
+            next_room[i] = n
+            i = n
+        i = walk_start
+        while not in_maze[i]:
+            n = next_room[i]
+            in_maze[i] = 1
+            grid[i] = 0
+            grid[(i + n) // 2] = 0
+            i = n
+        next_room.clear()
+
+MAZE_ALGORITHMS = {
+    'dfs': carve_maze_dfs,
+    'prim': carve_maze_prim,
+    'kruskal': carve_maze_kruskal,
+    'wilson': carve_maze_wilson,
+}
+
+# Wygeneruj proceduralny labirynt jako płaską tablicę (domyślnie algorytmem "Depth-First Search")
+def generate_labyrinth_grid(width, height, algorithm='dfs', rng=random):
+    if algorithm not in MAZE_ALGORITHMS:
+        raise ValueError(f"Nieznany algorytm generowania labiryntu: {algorithm}. Dostępne: {', '.join(MAZE_ALGORITHMS)}.")
+    grid, rooms = create_maze_grid(width, height)
+    MAZE_ALGORITHMS[algorithm](grid, rooms, width, width + 1, rng)
+    return grid
+
+# Wygeneruj proceduralny labirynt; wiersze są wycinkami płaskiej tablicy, więc maze[y][x] działa jak dotąd
+def generate_labyrinth(width, height, algorithm='dfs', rng=random):
+    grid = generate_labyrinth_grid(width, height, algorithm, rng)
+    return [grid[y * width:(y + 1) * width] for y in range(height)]
 
 # Tworzenie tęczowego tła
 def draw_rainbow_walls(screen, maze, cell_size):
@@ -127,8 +616,8 @@ def draw_rainbow_walls(screen, maze, cell_size):
                 pygame.draw.rect(screen, colors[y], rect)
                 pygame.draw.rect(screen, BLACK, rect, 1)
 
-# Narysuj labirynt
-def draw_labyrinth(screen, maze, path, cell_size, start_pos, exit_pos, start_image, exit_image):
+# Narysuj nieruchome elementy labiryntu: ściany, przejścia oraz obrazy startu i wyjścia
+def draw_labyrinth_layer(screen, maze, cell_size, start_pos, exit_pos, start_image, exit_image):
     width = len(maze[0])
     height = len(maze)
     colors = []
@@ -158,56 +647,392 @@ def draw_labyrinth(screen, maze, path, cell_size, start_pos, exit_pos, start_ima
     exit_rect = exit_image.get_rect(center=(ex * cell_size + cell_size // 2, ey * cell_size + cell_size // 2))
     screen.blit(exit_image, exit_rect.topleft)
 
+# Narysuj tło i labirynt raz, na powierzchni poza ekranem, przy tworzeniu labiryntu
+def render_labyrinth_layer(background_image, maze, cell_size, start_pos, exit_pos, start_image, exit_image):
+    layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+    layer.blit(background_image, (0, 0))
+    draw_labyrinth_layer(layer, maze, cell_size, start_pos, exit_pos, start_image, exit_image)
+    return layer
+
+# Narysuj labirynt: gotową warstwę statyczną i całą ścieżkę gracza
+def draw_labyrinth(screen, labyrinth_layer, path):
+    screen.blit(labyrinth_layer, (0, 0))
+
     if len(path) > 1:
         pygame.draw.lines(screen, RED, False, path, 2)
 
-# Sprawdzenie czy ścieżka przecina ścianę
-def is_valid_move(maze, path, cell_size):
-    if len(path) < 2:
-        return True
-    x1, y1 = path[-2]
-    x2, y2 = path[-1]
-    cx1, cy1 = x1 // cell_size, y1 // cell_size
-    cx2, cy2 = x2 // cell_size, y2 // cell_size
-    if abs(cx2 - cx1) + abs(cy2 - cy1) > 1:
-        return False
-    if maze[cy2][cx2] == 1:
-        return False
-    return True
+# Warstwa ze ścieżką: kopia warstwy statycznej, na której dorysowywane są tylko nowe odcinki
+def render_path_layer(labyrinth_layer, path):
+    path_layer = labyrinth_layer.copy()
+    draw_labyrinth(path_layer, labyrinth_layer, path)
+    return path_layer
 
-# Ładowanie obrazów cieni
-def load_shadow_images(path):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Katalog {path} nie istnieje.")
-    
-    shadows = {}
-    for filename in os.listdir(path):
-        if filename.endswith('.png'):
-            shadow_name = filename.split('.')[0]
-            img = pygame.image.load(os.path.join(path, filename)).convert_alpha()
-            img = pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE))
-            img.fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
-            shadows[shadow_name] = img
-    
-    if not shadows:
-        raise FileNotFoundError(f"Nie znaleziono obrazów PNG w katalogu {path}.")
-    
-    return shadows
+def draw_path_segment(path_layer, start, end):
+    pygame.draw.line(path_layer, RED, start, end, 2)
+
+# Zetrzyj z warstwy ścieżki odcinek od start do end opuszczony przy cofnięciu: jego prostokąt jest
+# kopiowany z warstwy statycznej, a odcinek od previous do start (nowy koniec ścieżki), który ten
+# prostokąt zamazał, jest rysowany ponownie. Cała warstwa nie jest tworzona od nowa.
+def erase_path_segment(path_layer, labyrinth_layer, start, end, previous=None):
+    rect = pygame.Rect(min(start[0], end[0]), min(start[1], end[1]), abs(end[0] - start[0]) + 1, abs(end[1] - start[1]) + 1)
+    rect.inflate_ip(4, 4)
+    path_layer.blit(labyrinth_layer, rect, rect)
+    if previous is not None:
+        draw_path_segment(path_layer, previous, start)
+
+# Środek komórki w pikselach
+def cell_center(cell, cell_size):
+    return (cell[0] * cell_size + cell_size // 2, cell[1] * cell_size + cell_size // 2)
+
+# Komórki przecinane przez odcinek od punktu p0 do p1 (bez komórki początkowej), w kolejności
+# przechodzenia i zawsze przez wspólny bok (DDA Amanatidesa-Woo na liczbach całkowitych).
+# Współrzędne są podwojone, aby środek piksela x leżał w 2x + 1, a granice komórek w 2 * k * cell_size.
+def traverse_cells(p0, p1, cell_size):
+    x0, y0 = 2 * p0[0] + 1, 2 * p0[1] + 1
+    x1, y1 = 2 * p1[0] + 1, 2 * p1[1] + 1
+    span = 2 * cell_size
+    cx, cy = p0[0] // cell_size, p0[1] // cell_size
+    tx, ty = p1[0] // cell_size, p1[1] // cell_size
+    step_x = 1 if tx > cx else -1
+    step_y = 1 if ty > cy else -1
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    dist_x = (cx + 1) * span - x0 if step_x > 0 else x0 - cx * span
+    dist_y = (cy + 1) * span - y0 if step_y > 0 else y0 - cy * span
+
+    cells = []
+    while (cx, cy) != (tx, ty):
+        # Oś, na której granica komórki jest bliżej wzdłuż odcinka (dist_x / dx < dist_y / dy)
+        if cy == ty or (cx != tx and dist_x * dy <= dist_y * dx):
+            cx += step_x
+            dist_x += span
+        else:
+            cy += step_y
+            dist_y += span
+        cells.append((cx, cy))
+    return cells
+
+# Ścieżka gracza w labiryncie jako ciąg komórek siatki. Mapa odwiedzonych komórek pozwala
+# sprawdzić każdy ruch w stałym czasie, a wejście do poprzedniej komórki cofa ścieżkę.
+class LabyrinthPath:
+    def __init__(self, maze, start_cell):
+        self.maze = maze
+        self.width = len(maze[0])
+        self.height = len(maze)
+        self.visited = bytearray(self.width * self.height)
+        self.cells = [start_cell]
+        self.visited[start_cell[1] * self.width + start_cell[0]] = 1
+
+    @property
+    def head(self):
+        return self.cells[-1]
+
+    # Wejdź do sąsiedniej komórki: zwraca 1 po wydłużeniu ścieżki, -1 po cofnięciu
+    # i 0, gdy ruch jest niedozwolony (ściana, komórka poza labiryntem lub już odwiedzona)
+    def step(self, cell):
+        hx, hy = self.cells[-1]
+        x, y = cell
+        if abs(x - hx) + abs(y - hy) != 1:
+            return 0
+        if len(self.cells) > 1 and self.cells[-2] == cell:
+            self.visited[hy * self.width + hx] = 0
+            self.cells.pop()
+            return -1
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        index = y * self.width + x
+        if self.maze[y][x] == 1 or self.visited[index]:
+            return 0
+        self.visited[index] = 1
+        self.cells.append(cell)
+        return 1
+
+    def points(self, cell_size):
+        return [cell_center(cell, cell_size) for cell in self.cells]
+
+# Odległości (liczba kroków) od komórki start do każdej komórki płaskiej siatki labiryntu,
+# przeszukiwaniem wszerz po przejściach; -1 dla komórek nieosiągalnych i ścian.
+# Komórka start jest źródłem nawet wtedy, gdy leży na ścianie. Krok w bok poza krawędź wiersza
+# trafia do kolumny 0 sąsiedniego wiersza, która zawsze jest ścianą.
+def maze_distances(grid, width, start):
+    size = len(grid)
+    steps = (-width, 1, width, -1)
+    distances = array('i', [-1]) * size
+    distances[start] = 0
+    frontier = [start]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for i in frontier:
+            for step in steps:
+                n = i + step
+                if 0 <= n < size and not grid[n] and distances[n] < 0:
+                    distances[n] = distance
+                    next_frontier.append(n)
+        frontier = next_frontier
+    return distances
+
+# Najkrótsza droga (lista indeksów) do goal odczytana z mapy odległości, albo None gdy goal jest nieosiągalny
+def maze_path(distances, width, goal):
+    if distances[goal] < 0:
+        return None
+    path = [goal]
+    i = goal
+    while distances[i]:
+        for n in (i - width, i + 1, i + width, i - 1):
+            if 0 <= n < len(distances) and distances[n] == distances[i] - 1:
+                i = n
+                break
+        path.append(i)
+    path.reverse()
+    return path
+
+# Najkrótsza droga (lista komórek) od start do goal przez przejścia labiryntu, przeszukiwaniem wszerz
+def shortest_labyrinth_path(maze, start, goal):
+    width = len(maze[0])
+    grid = b''.join(maze)
+    path = maze_path(maze_distances(grid, width, start[1] * width + start[0]), width, goal[1] * width + goal[0])
+    if path is None:
+        return None
+    return [(i % width, i // width) for i in path]
+
+OPEN_CELLS = bytes([1]) + bytes(255)  # Tablica dla bytes.translate: przejście (0) -> 1, ściana -> 0
+
+# Liczba otwartych sąsiadów każdej komórki, liczona bez pętli po komórkach: siatka jest
+# zamieniana na jedną dużą liczbę całkowitą z bajtem na komórkę, a suma czterech przesunięć
+# daje w każdym bajcie liczbę sąsiednich przejść (najwyżej 4, więc bajty się nie przenoszą).
+# Do bajtu otwartej komórki dodawane jest 8, więc przejście z k sąsiadami ma wartość 8 + k.
+def maze_degrees(grid, width):
+    size = len(grid)
+    cells = int.from_bytes(grid.translate(OPEN_CELLS), 'little')
+    row = 8 * width
+    degrees = (cells << 8) + (cells >> 8) + (cells << row) + (cells >> row) + (cells << 3)
+    return (degrees & ((1 << (8 * size)) - 1)).to_bytes(size, 'little')
+
+LabyrinthStats = collections.namedtuple('LabyrinthStats', 'path_length dead_ends junctions branching_factor difficulty')
+
+# Ocena labiryntu: długość najkrótszej drogi od start do goal (indeksy płaskiej siatki), liczba ślepych
+# zaułków i skrzyżowań, współczynnik rozgałęzienia (średnia liczba bocznych odnóg na komórkę drogi,
+# czyli miejsc, w których można skręcić w złą stronę) oraz trudność = długość drogi + boczne odnogi.
+# Dla nieosiągalnego wyjścia długość drogi i trudność wynoszą -1. Gotową mapę odległości
+# od start (maze_distances) można przekazać w distances.
+def analyze_labyrinth(grid, width, start, goal, distances=None):
+    degrees = maze_degrees(grid, width)
+    dead_ends = degrees.count(9)
+    junctions = degrees.count(11) + degrees.count(12)
+    if distances is None:
+        distances = maze_distances(grid, width, start)
+    path = maze_path(distances, width, goal)
+    if path is None:
+        return LabyrinthStats(-1, dead_ends, junctions, 0.0, -1)
+    # Komórki wewnątrz drogi mają na niej dwóch sąsiadów (stopień 10 bez odnóg), a start i wyjście jednego
+    ends = (path[0], path[-1]) if len(path) > 1 else ()
+    side_branches = sum(max(degrees[i] - 10, 0) for i in path[1:-1]) + sum(max(degrees[i] - 9, 0) for i in ends)
+    return LabyrinthStats(len(path) - 1, dead_ends, junctions, side_branches / len(path), len(path) - 1 + side_branches)
+
+SILHOUETTE_STYLES = ('solid', 'soft', 'outline')
+
+# Sylwetka (cień) wczytanego już obrazu kształtu:
+# 'solid' - czarny obraz z przezroczystością oryginału (jak dotychczasowe cienie),
+# 'soft' - ta sama sylwetka z rozmytą krawędzią,
+# 'outline' - sam czarny kontur wyznaczony z maski kształtu
+def make_silhouette(image, style='solid'):
+    if style == 'solid':
+        silhouette = image.copy()
+        silhouette.fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
+        return silhouette
+    if style == 'soft':
+        # Rozmycie przez zmniejszenie i powiększenie z interpolacją
+        width, height = image.get_size()
+        small = pygame.transform.smoothscale(make_silhouette(image), (max(1, width // 3), max(1, height // 3)))
+        return pygame.transform.smoothscale(small, (width, height))
+    if style == 'outline':
+        silhouette = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        outline = pygame.mask.from_surface(image).outline()
+        if len(outline) > 1:
+            pygame.draw.lines(silhouette, BLACK, True, outline, 3)
+        return silhouette
+    raise ValueError(f"Nieznany styl cienia: {style}. Dostępne: {', '.join(SILHOUETTE_STYLES)}.")
+
+# Czarne sylwetki ('solid') wszystkich kształtów naraz. Kształty spoza atlasu tekstur są najpierw
+# do niego pakowane; każda strona atlasu jest kopiowana i zaczerniana jednym wywołaniem fill,
+# a sylwetki są wycinkami tych kopii w tych samych miejscach co kształty.
+def make_solid_silhouettes(shapes):
+    loose = {name: image for name, image in shapes.items() if image.get_parent() is None}
+    if loose:
+        shapes = {**shapes, **TextureAtlas(loose).images}
+    shadow_pages = {}
+    silhouettes = {}
+    for name, image in shapes.items():
+        page = image.get_parent()
+        if page not in shadow_pages:
+            shadow_pages[page] = page.copy()
+            shadow_pages[page].fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
+        silhouettes[name] = shadow_pages[page].subsurface(pygame.Rect(image.get_offset(), image.get_size()))
+    return silhouettes
+
+# Cienie tworzone z obrazów kształtów wczytanych przez load_images, bez ponownego dekodowania PNG.
+# Cienie są wycinkami stron atlasu tekstur, więc gra rysuje je razem z kształtami przez Surface.blits.
+def make_shadow_images(shapes, style='solid'):
+    if style == 'solid':
+        return make_solid_silhouettes(shapes)
+    return TextureAtlas({name: make_silhouette(image, style) for name, image in shapes.items()}).images
 
 # Tworzenie elementów gry i cieni do gry w dopasowywanie cieni
-def create_game_pieces(shapes, shadows, num_pieces):
+def create_game_pieces(shapes, shadows, num_pieces, rng=random):
     pieces = []
     shadows_list = []
     
     for _ in range(num_pieces):
-        shape_name = random.choice(list(shapes.keys()))
+        shape_name = rng.choice(list(shapes.keys()))
         pieces.append((shape_name, shapes[shape_name]))
         shadows_list.append((shape_name, shadows[shape_name]))
     
-    random.shuffle(pieces)
-    random.shuffle(shadows_list)
+    rng.shuffle(pieces)
+    rng.shuffle(shadows_list)
     return pieces, shadows_list
 
+# Punkty pomiarowe pętli gier: rendered() po wyświetleniu klatki, handled() po obsłudze zdarzeń.
+# Domyślnie nic nie robią; bench.py podstawia własną implementację.
+class FrameProbe:
+    def rendered(self):
+        pass
+
+    def handled(self):
+        pass
+
+frame_probe = FrameProbe()
+
+# Wspólny zegar menu i gier. Aktywne pętle kończą klatkę przez tick(), który usypia wątek
+# do końca klatki, a statyczne ekrany czekają na zdarzenia przez wait_events() bez zużycia CPU.
+# Czas uśpienia i czekania jest liczony jako bezczynność. Czas całkowity mierzy time.perf_counter(),
+# bo pygame.time.get_ticks() zwraca 0 po pygame.quit(), a raport jest wypisywany przy wyjściu.
+class FrameScheduler:
+    def __init__(self, fps):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.start_time = time.perf_counter()
+        self.idle_ms = 0
+        self.time_source = pygame.time.get_ticks
+
+    def tick(self):
+        elapsed = self.clock.tick(self.fps)
+        self.idle_ms += elapsed - self.clock.get_rawtime()
+
+    def wait_events(self):
+        wait_start = time.perf_counter()
+        events = [pygame.event.wait()]
+        self.idle_ms += (time.perf_counter() - wait_start) * 1000
+        events.extend(pygame.event.get())
+        # Czekanie nie może się liczyć jako czas pracy następnej klatki
+        self.clock.tick()
+        return events
+
+    # Czas gry w milisekundach; odtwarzanie sesji podstawia tu czas zapisany w dzienniku
+    def ticks(self):
+        return self.time_source()
+
+    def get_fps(self):
+        return self.clock.get_fps()
+
+    def idle_ratio(self):
+        total_ms = (time.perf_counter() - self.start_time) * 1000
+        return self.idle_ms / total_ms if total_ms > 0 else 0.0
+
+    def report(self):
+        return f"FPS: {self.get_fps():.1f}, bezczynność: {self.idle_ratio() * 100:.0f}%"
+
+frame_scheduler = FrameScheduler(FPS)
+
+LOG_MAGIC = b'GRYL'
+LOG_VERSION = 2
+LOG_HEADER = struct.Struct('<4sBBIH')  # znacznik, wersja, gra, ziarno, rozmiar planszy lub liczba obiektów
+LOG_RECORD = struct.Struct('<IBH')  # czas od startu gry (ms), rodzaj zdarzenia, indeks kafelka/komórki/obiektu
+LOG_MEMORY = 1
+LOG_LABYRINTH = 2
+LOG_SHADOWS = 3
+LOG_PRESS = 1
+LOG_MOVE = 2
+LOG_RELEASE = 3
+LOG_NONE = 0xFFFF  # Puszczenie obiektu poza cieniem
+
+# Ziarno i generator liczb losowych gry; bez podanego ziarna losowane jest nowe, aby sesję dało się odtworzyć.
+# Podane ziarno jest sprowadzane do 32 bitów nagłówka dziennika, więc gra i jej zapis używają tego samego ziarna
+def game_random(seed=None):
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    seed %= 1 << 32
+    return seed, random.Random(seed)
+
+# Dziennik sesji gry: ziarno i parametry gry oraz zwarty zapis binarny (7 bajtów) każdego
+# przyjętego ruchu gracza, pozwalający odtworzyć sesję zdarzenie po zdarzeniu.
+# Gra w zapamiętywanie zapisuje po nagłówku także planszę (serialize_board), więc odtworzenie
+# nie zależy od tego, jak generator liczb losowych rozłożył obrazki.
+class GameLog:
+    def __init__(self, game=0, seed=0, param=0, records=b'', board=b''):
+        self.game = game
+        self.seed = seed
+        self.param = param
+        self.board = bytes(board)
+        self.records = bytearray(records)
+        self.start_ticks = 0
+
+    def start(self, game, seed, param, board=b''):
+        self.game = game
+        self.seed = seed
+        self.param = param
+        self.board = bytes(board)
+        self.records.clear()
+        self.start_ticks = frame_scheduler.ticks()
+
+    def record(self, kind, index):
+        self.records += LOG_RECORD.pack(frame_scheduler.ticks() - self.start_ticks, kind, index)
+
+    # Zapisane zdarzenia jako krotki (czas, rodzaj, indeks)
+    def events(self):
+        return LOG_RECORD.iter_unpack(self.records)
+
+    def to_bytes(self):
+        header = LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.game, self.seed, self.param)
+        board = serialize_board(self.board) if self.game == LOG_MEMORY else b''
+        return header + board + bytes(self.records)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < LOG_HEADER.size:
+            raise ValueError("Dziennik sesji jest za krótki.")
+        magic, version, game, seed, param = LOG_HEADER.unpack_from(data)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError("Niepoprawny dziennik sesji.")
+        board = b''
+        records_start = LOG_HEADER.size
+        if game == LOG_MEMORY:
+            # Numery obrazków są sprawdzane względem obrazów dopiero przy odtwarzaniu gry
+            records_start += BOARD_HEADER.size + param * param
+            board = deserialize_board(data[LOG_HEADER.size:records_start], BOARD_IMAGES)
+        records = data[records_start:]
+        if len(records) % LOG_RECORD.size:
+            raise ValueError("Niepoprawny dziennik sesji.")
+        return cls(game, seed, param, records, board)
+
+    # Zapisz dziennik; błąd zapisu jest tylko wypisywany, bo dziennik nie może przerwać gry
+    def save(self, path):
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self.to_bytes())
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"Nie udało się zapisać dziennika sesji: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
 # Tworzenie menu głównego
 def main_menu(screen, background_image):
     font = pygame.font.Font(None, FONT_SIZE)
@@ -223,27 +1048,31 @@ def main_menu(screen, background_image):
         rect = text.get_rect(center=(WINDOW_WIDTH // 2, initial_y_offset + idx * vertical_spacing))
         menu_rects.append((text, rect))
 
+    # Menu jest statyczne: rysujemy je tylko na początku i po odsłonięciu okna
+    redraw = True
     while True:
-        screen.fill(WHITE)
-        bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        screen.blit(background_image, bg_rect.topleft)
+        if redraw:
+            screen.fill(WHITE)
+            bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+            screen.blit(background_image, bg_rect.topleft)
 
-        for text, rect in menu_rects:
-            screen.blit(text, rect)
+            for text, rect in menu_rects:
+                screen.blit(text, rect)
 
-        pygame.display.flip()
+            pygame.display.flip()
+            redraw = False
 
-        for event in pygame.event.get():
+        for event in frame_scheduler.wait_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return "Wyjście z gry"
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 for idx, (text, rect) in enumerate(menu_rects):
                     if rect.collidepoint(event.pos):
                         return menu_items[idx]
 
-        pygame.time.Clock().tick(FPS)
-
 # Menu wyboru gry z dodatkowym tekstem
 def game_selection_menu(screen, background_image, game_type):
     font = pygame.font.Font(None, FONT_SIZE)
@@ -274,30 +1103,33 @@ def game_selection_menu(screen, background_image, game_type):
         rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2+ idx * 50))
         menu_rects.append((text, rect))
     
+    redraw = True
     while True:
-        screen.fill(WHITE)
-        bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        screen.blit(background_image, bg_rect.topleft)
-        
-        # Rysowanie dodatkowego tekstu
-        screen.blit(additional_text_surf, additional_text_rect)
-        screen.blit(instruction_surf, instruction_rect)
-        
-        for text, rect in menu_rects:
-            screen.blit(text, rect)
-        
-        pygame.display.flip()
+        if redraw:
+            screen.fill(WHITE)
+            bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+            screen.blit(background_image, bg_rect.topleft)
+            
+            # Rysowanie dodatkowego tekstu
+            screen.blit(additional_text_surf, additional_text_rect)
+            screen.blit(instruction_surf, instruction_rect)
+            
+            for text, rect in menu_rects:
+                screen.blit(text, rect)
+            
+            pygame.display.flip()
+            redraw = False
         
-        for event in pygame.event.get():
+        for event in frame_scheduler.wait_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return None
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 for idx, (text, rect) in enumerate(menu_rects):
                     if rect.collidepoint(event.pos):
                         return menu_values[idx]
-        
-        pygame.time.Clock().tick(FPS)
 
 
 # Wyświetlanie ekranu z gratulacjami
@@ -306,164 +1138,288 @@ def display_congratulations(screen, background_image):
     text = font.render("Gratulacje!", True, BLACK)
     rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
     
+    redraw = True
     while True:
-        screen.fill(WHITE)
-        bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        screen.blit(background_image, bg_rect.topleft)
-        screen.blit(text, rect)
-        pygame.display.flip()
+        if redraw:
+            screen.fill(WHITE)
+            bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+            screen.blit(background_image, bg_rect.topleft)
+            screen.blit(text, rect)
+            pygame.display.flip()
+            redraw = False
         
-        for event in pygame.event.get():
+        for event in frame_scheduler.wait_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 return
 
-# Pętla gry w zapamiętywanie obrazków
-def memory_game(screen, board_size, images, background_image, congratulations_image):
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    
-    # Oblicz przesunięcia w celu wyśrodkowania płytki 
+# Oblicz przesunięcia w celu wyśrodkowania płytki 
+def board_offsets(board_size):
     offset_x = (WINDOW_WIDTH - (board_size * (TILE_SIZE + PADDING) - PADDING)) // 2
     offset_y = (WINDOW_HEIGHT - (board_size * (TILE_SIZE + PADDING) - PADDING)) // 2
+    return offset_x, offset_y
+
+# Pętla gry w zapamiętywanie obrazków; podana plansza (np. z dziennika sesji) zastępuje losowanie nowej.
+# Zwraca False, gdy gra się nie rozpoczęła (np. za mało obrazów), więc nic nie zapisano w dzienniku.
+def memory_game(screen, board_size, images, background_image, congratulations_image, seed=None, log=None, board_ids=None):
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    
+    offset_x, offset_y = board_offsets(board_size)
+    seed, rng = game_random(seed)
 
     try:
-        board = create_board(board_size, images)
+        if board_ids is None:
+            board_ids = create_board(board_size, images, rng)
+        elif validate_board(board_ids, len(images)) != board_size:
+            raise ValueError(f"Plansza nie ma rozmiaru {board_size}x{board_size}.")
+        board = MemoryBoard(board_ids, image_table(images), offset_x, offset_y, render_tile_faces())
     except ValueError as e:
         print(e)
-        return
+        return False
+
+    log = log if log is not None else GameLog()
+    log.start(LOG_MEMORY, seed, board_size, board_ids)
     
-    revealed = [[False] * board_size for _ in range(board_size)]
-    first_selection = None
+    first_selection = -1
     running = True
     show_mismatched = False
-    mismatched_tiles = []
+    mismatched_tiles = ()
     mismatch_time = 0
 
+    # Cały ekran rysujemy tylko w pierwszej klatce (i po odsłonięciu okna),
+    # w kolejnych odświeżamy wyłącznie kafelki, których stan się zmienił
+    full_redraw = True
+    dirty_tiles = set()
+
     while running:
-        screen.fill(WHITE)
-        bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        screen.blit(background_image, bg_rect.topleft)
-        draw_board(screen, board, revealed, offset_x, offset_y)
-        pygame.display.flip()
+        if full_redraw:
+            screen.fill(WHITE)
+            bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+            screen.blit(background_image, bg_rect.topleft)
+            draw_board(screen, board)
+            pygame.display.flip()
+            full_redraw = False
+            dirty_tiles.clear()
+        elif dirty_tiles:
+            pygame.display.update(draw_dirty_tiles(screen, board, dirty_tiles))
+            dirty_tiles.clear()
+        frame_probe.rendered()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.VIDEOEXPOSE:
+                full_redraw = True
             elif event.type == pygame.MOUSEBUTTONDOWN and not show_mismatched:
-                x, y = event.pos
-                col = (x - offset_x) // (TILE_SIZE + PADDING)
-                row = (y - offset_y) // (TILE_SIZE + PADDING)
-                if 0 <= row < board_size and 0 <= col < board_size and not revealed[row][col]:
-                    revealed[row][col] = True
-                    if first_selection is None:
-                        first_selection = (row, col)
+                index = board.index_at(event.pos)
+                if index >= 0 and board.states[index] == TILE_HIDDEN:
+                    log.record(LOG_PRESS, index)
+                    board.reveal(index)
+                    dirty_tiles.add(index)
+                    if first_selection < 0:
+                        first_selection = index
                     else:
-                        r1, c1 = first_selection
-                        if board[r1][c1] != board[row][col]:
+                        if board.tiles[first_selection] != board.tiles[index]:
                             show_mismatched = True
-                            mismatched_tiles = [(r1, c1), (row, col)]
-                            mismatch_time = pygame.time.get_ticks()
-                        first_selection = None
+                            mismatched_tiles = (first_selection, index)
+                            mismatch_time = frame_scheduler.ticks()
+                        else:
+                            board.match(first_selection, index)
+                        first_selection = -1
+        frame_probe.handled()
 
-        if show_mismatched and pygame.time.get_ticks() - mismatch_time > 1000:
-            for (r, c) in mismatched_tiles:
-                revealed[r][c] = False
+        if show_mismatched and frame_scheduler.ticks() - mismatch_time > 1000:
+            for index in mismatched_tiles:
+                board.hide(index)
+                dirty_tiles.add(index)
             show_mismatched = False
         
-        if all_tiles_matched(revealed):
+        if board.is_solved():
             display_congratulations(screen, congratulations_image)
-            return
+            return True
         
-        pygame.time.Clock().tick(FPS)
+        frame_scheduler.tick()
     
     pygame.quit()
+    return True
+
+# Ustaw pozycję wyjściową losowo wybraną z ostatnich kolumn spośród komórek osiągalnych ze startu
+# (środka labiryntu) i odległych od niego o co najmniej min_distance kroków. Jeśli takich nie ma,
+# wybierana jest jedna z najdalszych osiągalnych; None, gdy żadna komórka tych kolumn nie jest osiągalna.
+# Gotową mapę odległości od startu (maze_distances) można przekazać w distances.
+def choose_labyrinth_exit(maze, maze_size, distances=None, min_distance=LABYRINTH_EXIT_DISTANCE, rng=random):
+    if distances is None:
+        distances = maze_distances(b''.join(maze), maze_size, (maze_size // 2) * maze_size + maze_size // 2)
+    candidates = [(distances[y * maze_size + x], (x, y)) for x in range(maze_size - 3, maze_size)
+                  for y in range(maze_size) if distances[y * maze_size + x] > 0]
+    if not candidates:
+        return None
+    farthest = max(distance for distance, cell in candidates)
+    min_distance = min(min_distance, farthest)
+    return rng.choice([cell for distance, cell in candidates if distance >= min_distance])
+
+# Wygeneruj labirynt z wyjściem, którego trudność mieści się w zakresie band. Labirynty, w których
+# żadne miejsce na wyjście nie jest osiągalne, są odrzucane; jeśli po attempts próbach żaden nie trafi w zakres, wybierany jest najbliższy.
+def select_labyrinth(maze_size, band=LABYRINTH_DIFFICULTY, attempts=50, algorithm='dfs', rng=random):
+    low, high = band
+    start = (maze_size // 2) * maze_size + maze_size // 2
+    best = None
+    for _ in range(attempts):
+        maze = generate_labyrinth(maze_size, maze_size, algorithm, rng)
+        grid = b''.join(maze)
+        distances = maze_distances(grid, maze_size, start)
+        exit_pos = choose_labyrinth_exit(maze, maze_size, distances, rng=rng)
+        if exit_pos is None:
+            continue
+        stats = analyze_labyrinth(grid, maze_size, start, exit_pos[1] * maze_size + exit_pos[0], distances)
+        if low <= stats.difficulty <= high:
+            return maze, exit_pos, stats
+        miss = max(low - stats.difficulty, stats.difficulty - high)
+        if best is None or miss < best[0]:
+            best = (miss, maze, exit_pos, stats)
+    if best is None:
+        raise ValueError(f"Nie udało się wygenerować labiryntu z osiągalnym wyjściem w {attempts} próbach.")
+    return best[1:]
 
 # Pętla gry w labiryncie
-def labyrinth_game(screen, background_image, congratulations_image, start_image, exit_image):
+def labyrinth_game(screen, background_image, congratulations_image, start_image, exit_image, seed=None, log=None):
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     
-    maze_size = 21
+    maze_size = MAZE_SIZE
     cell_size = WINDOW_WIDTH // maze_size
+    seed, rng = game_random(seed)
+    log = log if log is not None else GameLog()
+    log.start(LOG_LABYRINTH, seed, maze_size)
     
-    maze = generate_labyrinth(maze_size, maze_size)
+    maze, exit_pos, _ = select_labyrinth(maze_size, rng=rng)
     
-    path = []
     drawing = False
     start_pos = (maze_size // 2, maze_size // 2)
-    start_pixel = (start_pos[0] * cell_size + cell_size // 2, start_pos[1] * cell_size + cell_size // 2)
-    path.append(start_pixel)
-    
-    # Ustaw pozycję wyjściową losowo wybraną z ostatnich rzędów 
-    exit_pos = (random.randint(maze_size - 3, maze_size - 1), random.randint(0, maze_size - 1))
-    while maze[exit_pos[1]][exit_pos[0]] == 1:
-        exit_pos = (random.randint(maze_size - 3, maze_size - 1), random.randint(0, maze_size - 1))
+    path = LabyrinthPath(maze, start_pos)
     
+    labyrinth_layer = render_labyrinth_layer(background_image, maze, cell_size, start_pos, exit_pos, start_image, exit_image)
+    path_layer = render_path_layer(labyrinth_layer, path.points(cell_size))
+
     running = True
     while running:
-        screen.blit(background_image, (0, 0))
-        draw_labyrinth(screen, maze, path, cell_size, start_pos, exit_pos, start_image, exit_image)
+        screen.blit(path_layer, (0, 0))
         pygame.display.flip()
+        frame_probe.rendered()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
+                    log.record(LOG_PRESS, 0)
                     drawing = True
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
+                    log.record(LOG_RELEASE, 0)
                     drawing = False
             elif event.type == pygame.MOUSEMOTION:
                 if drawing:
-                    pos = event.pos
-                    if path[-1] != pos:
-                        path.append(pos)
-                        if not is_valid_move(maze, path, cell_size):
-                            path.pop()  # Usuń nieprawidłowy ruch 
+                    # Przejdź kolejno przez komórki między końcem ścieżki a kursorem, aż do pierwszej niedozwolonej
+                    for cell in traverse_cells(cell_center(path.head, cell_size), event.pos, cell_size):
+                        previous = path.head
+                        moved = path.step(cell)
+                        if moved == 0:
+                            break
+                        log.record(LOG_MOVE, cell[1] * maze_size + cell[0])
+                        if moved > 0:
+                            draw_path_segment(path_layer, cell_center(previous, cell_size), cell_center(cell, cell_size))
+                        else:
+                            before = cell_center(path.cells[-2], cell_size) if len(path.cells) > 1 else None
+                            erase_path_segment(path_layer, labyrinth_layer, cell_center(cell, cell_size), cell_center(previous, cell_size), before)
+        frame_probe.handled()
 
         # Sprawdzanie czy gracz dotarł do wyjścia
-        if path[-1][0] // cell_size == exit_pos[0] and path[-1][1] // cell_size == exit_pos[1]:
+        if path.head == exit_pos:
             display_congratulations(screen, congratulations_image)
             return
         
-        pygame.time.Clock().tick(FPS)
+        frame_scheduler.tick()
     
     pygame.quit()
 
-# Pętla gry w dopasowanie cieni
-def match_the_shadows_game(screen, num_pieces, shapes, shadows, background_image, congratulations_image):
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-
+# Rozmiar obiektów oraz pozycje obiektów (po lewej) i cieni (po prawej)
+def shadow_game_layout(num_pieces):
     # Obliczanie wysokości każdego objektu w celu zmieszczenia wszystkich obiektów w planszy
     max_object_height = (WINDOW_HEIGHT - (num_pieces + 1) * PADDING) // num_pieces
     piece_size = min(TILE_SIZE, max_object_height)
-
-    # Skalowanie objektów i cieni w razie potrzeby
-    scaled_shapes = {name: pygame.transform.scale(img, (piece_size, piece_size)) for name, img in shapes.items()}
-    scaled_shadows = {name: pygame.transform.scale(img, (piece_size, piece_size)) for name, img in shadows.items()}
-
-    pieces, shadows_list = create_game_pieces(scaled_shapes, scaled_shadows, num_pieces)
     piece_positions = [(50, i * (piece_size + PADDING) + PADDING) for i in range(num_pieces)]
     shadow_positions = [(WINDOW_WIDTH - 50 - piece_size, i * (piece_size + PADDING) + PADDING) for i in range(num_pieces)]
+    return piece_size, piece_positions, shadow_positions
+
+# Indeks trafień: każdy prostokąt jest zapisany w kubełkach siatki, które przecina,
+# więc wyszukanie prostokąta pod kursorem przegląda tylko jeden kubełek
+class HitGrid:
+    def __init__(self, bucket_size):
+        self.bucket_size = bucket_size
+        self.buckets = {}
+
+    def insert(self, key, rect):
+        size = self.bucket_size
+        for bx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for by in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.buckets.setdefault((bx, by), []).append((key, rect))
+
+    # Klucz prostokąta zawierającego punkt lub None
+    def hit(self, pos):
+        size = self.bucket_size
+        for key, rect in self.buckets.get((pos[0] // size, pos[1] // size), ()):
+            if rect.collidepoint(pos):
+                return key
+        return None
+
+# Indeks trafień dla obiektów lub cieni; prostokąt obejmuje też prawą i dolną krawędź obrazka
+def build_hit_grid(positions, piece_size):
+    grid = HitGrid(piece_size + PADDING)
+    for i, (x, y) in enumerate(positions):
+        grid.insert(i, pygame.Rect(x, y, piece_size + 1, piece_size + 1))
+    return grid
+
+# Pętla gry w dopasowanie cieni
+def match_the_shadows_game(screen, num_pieces, shapes, shadows, background_image, congratulations_image, scaled_images=None, seed=None, log=None):
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    seed, rng = game_random(seed)
+    log = log if log is not None else GameLog()
+    log.start(LOG_SHADOWS, seed, num_pieces)
+
+    piece_size, piece_positions, shadow_positions = shadow_game_layout(num_pieces)
+    if scaled_images is None:
+        scaled_images = ScaledImageCache()
+
+    # Skalowanie tylko wylosowanych objektów i cieni, z użyciem wcześniej przeskalowanych obrazów
+    pieces, shadows_list = create_game_pieces(shapes, shadows, num_pieces, rng)
+    size = (piece_size, piece_size)
+    pieces = [(name, scaled_images.get(('shape', name), image, size)) for name, image in pieces]
+    shadows_list = [(name, scaled_images.get(('shadow', name), shadow, size)) for name, shadow in shadows_list]
+    piece_hits = build_hit_grid(piece_positions, piece_size)
+    shadow_hits = build_hit_grid(shadow_positions, piece_size)
+
+    # Tło, białe kwadraty i obrazy nie zmieniają się w trakcie gry, więc lista elementów
+    # dla Surface.blits jest budowana raz
+    piece_frame = pygame.Surface((piece_size + PADDING, piece_size + PADDING))
+    piece_frame.fill(WHITE)  # Białe kwadratowe tło
+    bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+    static_blits = [(background_image, bg_rect.topleft)]
+    for (name, image), pos in zip(pieces + shadows_list, piece_positions + shadow_positions):
+        static_blits.append((piece_frame, (pos[0] - PADDING // 2, pos[1] - PADDING // 2)))
+        static_blits.append(blit_item(image, pos))
 
     selected_piece = None
     lines = []
+    matched_shadows = set()
 
     running = True
     while running:
         screen.fill(WHITE)
-        bg_rect = background_image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        screen.blit(background_image, bg_rect.topleft)
-
-        for (name, image), pos in zip(pieces, piece_positions):
-            pygame.draw.rect(screen, WHITE, (pos[0] - PADDING // 2, pos[1] - PADDING // 2, piece_size + PADDING, piece_size + PADDING))  # Dodaj białe kwadratowe tło
-            screen.blit(image, pos)
-
-        for (name, shadow), pos in zip(shadows_list, shadow_positions):
-            pygame.draw.rect(screen, WHITE, (pos[0] - PADDING // 2, pos[1] - PADDING // 2, piece_size + PADDING, piece_size + PADDING))  # Dodaj białe kwadratowe tło
-            screen.blit(shadow, pos)
+        screen.blits(static_blits, False)
 
         for line in lines:
             pygame.draw.line(screen, BLACK, line[0], line[1], 2)
@@ -473,78 +1429,114 @@ def match_the_shadows_game(screen, num_pieces, shapes, shadows, background_image
             pygame.draw.line(screen, BLACK, selected_piece[1], pygame.mouse.get_pos(), 2)
 
         pygame.display.flip()
+        frame_probe.rendered()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                for i, pos in enumerate(piece_positions):
-                    x, y = pos
-                    if x <= event.pos[0] <= x + piece_size and y <= event.pos[1] <= y + piece_size:
-                        selected_piece = (i, event.pos)
-                        break
+                i = piece_hits.hit(event.pos)
+                if i is not None:
+                    log.record(LOG_PRESS, i)
+                    selected_piece = (i, event.pos)
             elif event.type == pygame.MOUSEBUTTONUP:
                 if selected_piece is not None:
-                    for i, pos in enumerate(shadow_positions):
-                        x, y = pos
-                        if x <= event.pos[0] <= x + piece_size and y <= event.pos[1] <= y + piece_size:
-                            if pieces[selected_piece[0]][0] == shadows_list[i][0]:
-                                # Sprawdź, czy ten cień jest już dopasowany, zabezpieczenie przed wielokrotnym dopasowywaniu tej samej pary
-                                if all(line[1] != pos for line in lines):
-                                    lines.append((selected_piece[1], pos))
-                                break
+                    i = shadow_hits.hit(event.pos)
+                    log.record(LOG_RELEASE, LOG_NONE if i is None else i)
+                    if i is not None and pieces[selected_piece[0]][0] == shadows_list[i][0]:
+                        # Sprawdź, czy ten cień jest już dopasowany, zabezpieczenie przed wielokrotnym dopasowywaniu tej samej pary
+                        if i not in matched_shadows:
+                            matched_shadows.add(i)
+                            lines.append((selected_piece[1], shadow_positions[i]))
                     selected_piece = None
+        frame_probe.handled()
 
         if len(lines) == num_pieces:
             display_congratulations(screen, congratulations_image)
             return
 
+        frame_scheduler.tick()
+
     pygame.quit()
 
-def main():
+# Obrazy startu i wyjścia labiryntu
+def load_labyrinth_images(path):
+    start_image = pygame.image.load(os.path.join(path, 'start_tile.png'))
+    start_image = pygame.transform.scale(start_image, (40, 40))
+    exit_image = pygame.image.load(os.path.join(path, 'exit_tile.png'))
+    exit_image = pygame.transform.scale(exit_image, (40, 40))
+    return start_image, exit_image
+
+# Katalog główny projektu (nadrzędny względem katalogu Scripts)
+def get_base_dir():
     script_dir = os.path.dirname(__file__)
-    base_dir = os.path.abspath(os.path.join(script_dir, os.pardir))
+    return os.path.abspath(os.path.join(script_dir, os.pardir))
+
+def main():
+    base_dir = get_base_dir()
+    cache = ImageCache(os.path.join(base_dir, 'Cache'))
 
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Gry edukacyjne dla dzieci")
     
     backgrounds_path = os.path.join(base_dir, 'Backgrounds')
-    menu_background = scale_background_image(pygame.image.load(os.path.join(backgrounds_path, 'menu_background.png')), WINDOW_WIDTH, WINDOW_HEIGHT)
-    memory_game_background = scale_background_image(pygame.image.load(os.path.join(backgrounds_path, 'memory_game_background.png')), WINDOW_WIDTH, WINDOW_HEIGHT)
-    labyrinth_game_background = scale_background_image(pygame.image.load(os.path.join(backgrounds_path, 'labyrinth_game_background.png')), WINDOW_WIDTH, WINDOW_HEIGHT)
-    shape_game_background = scale_background_image(pygame.image.load(os.path.join(backgrounds_path, 'shape_game_background.png')), WINDOW_WIDTH, WINDOW_HEIGHT)
-    congratulations_image = scale_background_image(pygame.image.load(os.path.join(backgrounds_path, 'congratulations_background.png')), WINDOW_WIDTH, WINDOW_HEIGHT)
-
-    labyrinth_assets_path = os.path.join(base_dir, 'Labyrinth game assets')
-    start_image = pygame.image.load(os.path.join(labyrinth_assets_path, 'start_tile.png'))
-    start_image = pygame.transform.scale(start_image, (40, 40))
-    exit_image = pygame.image.load(os.path.join(labyrinth_assets_path, 'exit_tile.png'))
-    exit_image = pygame.transform.scale(exit_image, (40, 40))
+    backgrounds = load_background_images(backgrounds_path, [
+        'menu_background.png',
+        'memory_game_background.png',
+        'labyrinth_game_background.png',
+        'shape_game_background.png',
+        'congratulations_background.png',
+    ])
+    menu_background = backgrounds['menu_background']
+    memory_game_background = backgrounds['memory_game_background']
+    labyrinth_game_background = backgrounds['labyrinth_game_background']
+    shape_game_background = backgrounds['shape_game_background']
+    congratulations_image = backgrounds['congratulations_background']
+
+    start_image, exit_image = load_labyrinth_images(os.path.join(base_dir, 'Labyrinth game assets'))
     
+    # Kafelki gier są wczytywane raz na cały proces, przy pierwszym wyborze danej gry
+    images_path = os.path.join(base_dir, 'Memory game assets')
     shapes_path = os.path.join(base_dir, 'Match the shadow assets')
-    shapes = load_images(shapes_path, TILE_SIZE)
-    shadows = load_shadow_images(shapes_path)
+    assets = AssetRegistry()
+    assets.register('memory_images', lambda: TextureAtlas(load_images(images_path, TILE_SIZE, cache)).images)
+    assets.register('shapes', lambda: TextureAtlas(load_images(shapes_path, TILE_SIZE, cache)).images)
+    assets.register('shadows', lambda: make_shadow_images(assets.get('shapes')))
+    scaled_images = ScaledImageCache()
+    # Dziennik ostatniej sesji gry (do odtworzenia przez bench.py --replay)
+    session_log = GameLog()
+    session_log_path = os.path.join(base_dir, 'Cache', 'last_session.gryl')
     
     while True:
         game_choice = main_menu(screen, menu_background)
         if game_choice == "Zapamiętywanie obrazków":
             board_size = game_selection_menu(screen, memory_game_background, "Zapamiętywanie obrazków")
             if board_size:
-                images_path = os.path.join(base_dir, 'Memory game assets')
                 try:
-                    images = load_images(images_path, TILE_SIZE)
+                    images = assets.get('memory_images')
                 except FileNotFoundError as e:
                     print(e)
                     continue
                 
-                memory_game(screen, board_size, images, memory_game_background, congratulations_image)
+                if memory_game(screen, board_size, images, memory_game_background, congratulations_image, log=session_log):
+                    session_log.save(session_log_path)
         elif game_choice == "Labirynt":
-            labyrinth_game(screen, labyrinth_game_background, congratulations_image, start_image, exit_image)
+            labyrinth_game(screen, labyrinth_game_background, congratulations_image, start_image, exit_image, log=session_log)
+            session_log.save(session_log_path)
         elif game_choice == "Połącz cienie":
             num_pieces = game_selection_menu(screen, shape_game_background, "Połącz cienie")
             if num_pieces:
-                match_the_shadows_game(screen, num_pieces, shapes, shadows, shape_game_background, congratulations_image)
+                try:
+                    shapes = assets.get('shapes')
+                    shadows = assets.get('shadows')
+                except FileNotFoundError as e:
+                    print(e)
+                    continue
+
+                match_the_shadows_game(screen, num_pieces, shapes, shadows, shape_game_background, congratulations_image, scaled_images, log=session_log)
+                session_log.save(session_log_path)
         elif game_choice == "Wyjście z gry":
+            print(frame_scheduler.report())
             pygame.quit()
             return
     
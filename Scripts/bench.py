@@ -0,0 +1,677 @@
+import pygame
+import os
+import sys
+import random
+import time
+import math
+import argparse
+import tempfile
+import tracemalloc
+import importlib.util
+
+# Benchmarki i odtwarzanie dzienników sesji dla "Gry edukacyjne dla dzieci.py".
+# Uruchomienie: python bench.py --bench NAZWA lub python bench.py --replay PLIK
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Gry edukacyjne dla dzieci.py')
+
+# Wczytaj skrypt gry jako moduł (nazwa pliku ze spacjami nie pozwala na zwykły import)
+def load_game_module(name='gry'):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, GAME_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+gry = load_game_module()
+from gry import (
+    BLACK, FrameProbe, GameLog, ImageCache, LABYRINTH_DIFFICULTY, LOADER_THREADS, LOG_LABYRINTH,
+    LOG_MEMORY, LOG_MOVE, LOG_NONE, LOG_PRESS, LOG_RECORD, LOG_SHADOWS, MAX_BOARD_SIZE,
+    MAZE_ALGORITHMS, MAZE_SIZE, MemoryBoard, ORANGE, PADDING, RED, SILHOUETTE_STYLES, TILE_SIZE,
+    TextureAtlas, WHITE, WINDOW_HEIGHT, WINDOW_WIDTH, analyze_labyrinth, blit_item, board_offsets,
+    cell_center, choose_labyrinth_exit, create_board, create_game_pieces, draw_board,
+    draw_labyrinth, draw_labyrinth_layer, draw_path_segment, erase_path_segment, frame_scheduler,
+    generate_boards, generate_labyrinth, generate_labyrinth_grid, get_base_dir, image_table, labyrinth_game,
+    list_png_files, load_background_images, load_image_file, load_images, load_labyrinth_images,
+    make_shadow_images, make_silhouette, match_the_shadows_game, memory_game, parallel_map,
+    render_labyrinth_layer, render_path_layer, render_tile_faces, select_labyrinth, serialize_board, shadow_game_layout,
+    shortest_labyrinth_path, validate_board,
+)
+
+# Przełącz wyświetlanie na sterownik "dummy", aby benchmarki działały bez okna
+def init_headless_display():
+    pygame.display.quit()
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.display.init()
+    return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+# Dawne ładowanie obrazów cieni, punkt odniesienia dla benchmarków: każdy PNG jest dekodowany
+# i skalowany drugi raz (po load_images), a potem zaczerniany osobnym wywołaniem fill
+def load_shadow_images(path, cache=None, workers=LOADER_THREADS):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Katalog {path} nie istnieje.")
+    
+    def prepare(source_path):
+        img = pygame.image.load(source_path).convert_alpha()
+        img = pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE))
+        img.fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
+        return img
+
+    filenames = list_png_files(path)
+    loaded = parallel_map(lambda filename: load_image_file(os.path.join(path, filename), f"shadow{TILE_SIZE}", prepare, cache), filenames, workers)
+    shadows = {filename.split('.')[0]: img for filename, img in zip(filenames, loaded)}
+    
+    if cache is not None:
+        cache.save_index()
+    
+    if not shadows:
+        raise FileNotFoundError(f"Nie znaleziono obrazów PNG w katalogu {path}.")
+    
+    return shadows
+
+# Zmierz czas startu (wczytanie wszystkich kafelków) bez pamięci podręcznej, z zimną i z ciepłą
+def benchmark_asset_cache(repeats=5):
+    base_dir = get_base_dir()
+    init_headless_display()
+    images_path = os.path.join(base_dir, 'Memory game assets')
+    shapes_path = os.path.join(base_dir, 'Match the shadow assets')
+
+    def load_all(cache):
+        load_images(images_path, TILE_SIZE, cache)
+        load_images(shapes_path, TILE_SIZE, cache)
+        load_shadow_images(shapes_path, cache)
+
+    def measure(make_cache):
+        best = None
+        for _ in range(repeats):
+            cache = make_cache()
+            start = time.perf_counter()
+            load_all(cache)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cold_dirs = iter(range(repeats))
+        no_cache = measure(lambda: None)
+        cold = measure(lambda: ImageCache(os.path.join(tmp_dir, f"cold{next(cold_dirs)}")))
+        warm_dir = os.path.join(tmp_dir, 'warm')
+        load_all(ImageCache(warm_dir))
+        warm = measure(lambda: ImageCache(warm_dir))
+
+    print(f"Bez pamięci podręcznej: {no_cache * 1000:.1f} ms")
+    print(f"Zimny start:            {cold * 1000:.1f} ms")
+    print(f"Ciepły start:           {warm * 1000:.1f} ms ({no_cache / warm:.1f}x szybciej)")
+
+# Zmierz czas wczytania wszystkich obrazów (bez pamięci podręcznej) sekwencyjnie i w puli wątków
+def benchmark_parallel_loading(repeats=3):
+    base_dir = get_base_dir()
+    init_headless_display()
+    backgrounds_path = os.path.join(base_dir, 'Backgrounds')
+    images_path = os.path.join(base_dir, 'Memory game assets')
+    shapes_path = os.path.join(base_dir, 'Match the shadow assets')
+
+    def load_all(workers):
+        load_background_images(backgrounds_path, list_png_files(backgrounds_path), workers)
+        load_images(images_path, TILE_SIZE, None, workers)
+        load_images(shapes_path, TILE_SIZE, None, workers)
+        load_shadow_images(shapes_path, None, workers)
+
+    def measure(workers):
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load_all(workers)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    serial = measure(1)
+    parallel = measure(max(LOADER_THREADS, 2))
+    print(f"Rdzenie CPU: {os.cpu_count()}, wątki: {max(LOADER_THREADS, 2)}")
+    print(f"Sekwencyjnie: {serial * 1000:.1f} ms")
+    print(f"Równolegle:   {parallel * 1000:.1f} ms ({serial / parallel:.2f}x)")
+
+# Porównaj tworzenie cieni: dekodowanie i skalowanie PNG od nowa, czarne sylwetki kształtów z atlasu
+# tworzone po jednej oraz make_shadow_images w każdym stylu ('solid' zaczernia całe strony atlasu)
+def benchmark_silhouettes(repeats=3):
+    init_headless_display()
+    shapes_path = os.path.join(get_base_dir(), 'Match the shadow assets')
+    shapes = load_images(shapes_path, TILE_SIZE)
+
+    atlas_shapes = TextureAtlas(shapes).images
+
+    variants = [("z plików PNG", lambda: load_shadow_images(shapes_path))]
+    variants.append(("solid po jednym", lambda: {name: make_silhouette(image) for name, image in atlas_shapes.items()}))
+    variants += [(f"z kształtów, {style}", lambda style=style: make_shadow_images(atlas_shapes, style)) for style in SILHOUETTE_STYLES]
+    for name, make in variants:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            make()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:20} {best * 1000:9.2f} ms")
+
+# Porównaj rysowanie odkrytej planszy 8x8: osobne powierzchnie blitowane pojedynczo
+# oraz wycinki atlasu tekstur w jednym wywołaniu Surface.blits
+def benchmark_atlas(frames=500):
+    screen = init_headless_display()
+    images = load_images(os.path.join(get_base_dir(), 'Memory game assets'), TILE_SIZE, ImageCache(os.path.join(get_base_dir(), 'Cache')))
+    atlas = TextureAtlas(images)
+    board = create_board(MAX_BOARD_SIZE, images)
+    offset_x, offset_y = board_offsets(MAX_BOARD_SIZE)
+    destinations = [(offset_x + j * (TILE_SIZE + PADDING), offset_y + i * (TILE_SIZE + PADDING))
+                    for i in range(MAX_BOARD_SIZE) for j in range(MAX_BOARD_SIZE)]
+    # Numery na planszy wskazują obrazy z image_table(images); atlas układa obrazy w innej kolejności,
+    # więc wycinki atlasu są wyszukiwane po nazwach obrazów w kolejności tej samej tabeli
+    names = list(images)
+    tiles = [images[names[image_id]] for image_id in board]
+    atlas_blits = [blit_item(atlas.images[names[image_id]], dest) for image_id, dest in zip(board, destinations)]
+
+    def separate_surfaces():
+        for tile, dest in zip(tiles, destinations):
+            screen.blit(tile, dest)
+
+    def atlas_batch():
+        screen.blits(atlas_blits, False)
+
+    # Oba warianty muszą narysować tę samą planszę
+    frames_drawn = []
+    for draw in (separate_surfaces, atlas_batch):
+        screen.fill(BLACK)
+        draw()
+        frames_drawn.append(pygame.image.tostring(screen, 'RGB'))
+    match = "zgodna" if frames_drawn[0] == frames_drawn[1] else "NIEZGODNA"
+
+    print(f"Strony atlasu: {len(atlas.pages)} ({', '.join(f'{page.get_width()}x{page.get_height()}' for page in atlas.pages)}), obrazów: {len(atlas.regions)}, plansza z atlasu {match}")
+    for name, draw in (("osobne powierzchnie", separate_surfaces), ("atlas + blits", atlas_batch)):
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        elapsed = (time.perf_counter() - start) / frames
+        print(f"{name:20} {elapsed * 1000:7.3f} ms/klatkę")
+
+# Porównaj rysowanie planszy 8x8 (połowa kafelków odkryta): dotychczasowe rysowanie kafelek po kafelku
+# (draw.rect, get_rect i blit dla każdego) oraz gotowe elementy w jednym wywołaniu Surface.blits.
+# Liczba wywołań funkcji (Pythona i wbudowanych) jest zliczana przez sys.setprofile.
+def benchmark_board_blits(frames=500):
+    screen = init_headless_display()
+    images = load_images(os.path.join(get_base_dir(), 'Memory game assets'), TILE_SIZE, ImageCache(os.path.join(get_base_dir(), 'Cache')))
+    table = image_table(images)
+    board_ids = create_board(MAX_BOARD_SIZE, images)
+    board = [[table[image_id] for image_id in board_ids[i:i + MAX_BOARD_SIZE]] for i in range(0, len(board_ids), MAX_BOARD_SIZE)]
+    revealed = [[(i + j) % 2 == 0 for j in range(MAX_BOARD_SIZE)] for i in range(MAX_BOARD_SIZE)]
+    offset_x, offset_y = board_offsets(MAX_BOARD_SIZE)
+    memory_board = MemoryBoard(board_ids, table, offset_x, offset_y, render_tile_faces())
+    for index in range(len(memory_board.states)):
+        if revealed[index // MAX_BOARD_SIZE][index % MAX_BOARD_SIZE]:
+            memory_board.reveal(index)
+
+    def per_tile_drawing():
+        for i, row in enumerate(board):
+            for j, tile in enumerate(row):
+                x = offset_x + j * (TILE_SIZE + PADDING)
+                y = offset_y + i * (TILE_SIZE + PADDING)
+                pygame.draw.rect(screen, WHITE, (x, y, TILE_SIZE, TILE_SIZE))
+                if revealed[i][j]:
+                    tile_rect = tile.get_rect(center=(x + TILE_SIZE // 2, y + TILE_SIZE // 2))
+                    screen.blit(tile, tile_rect.topleft)
+                else:
+                    pygame.draw.rect(screen, BLACK, (x, y, TILE_SIZE, TILE_SIZE), 2)
+
+    def batched_blits():
+        draw_board(screen, memory_board)
+
+    for name, draw in (("kafelek po kafelku", per_tile_drawing), ("jedno Surface.blits", batched_blits)):
+        calls = [0]
+
+        def count_calls(frame, event, arg):
+            if event in ('call', 'c_call'):
+                calls[0] += 1
+
+        sys.setprofile(count_calls)
+        draw()
+        sys.setprofile(None)
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        elapsed = (time.perf_counter() - start) / frames
+        print(f"{name:20} {elapsed * 1000:7.3f} ms/klatkę, wywołań funkcji: {calls[0] - 1}")
+
+# Zmierz tempo tworzenia plansz 8x8: create_board (random.sample i shuffle) oraz masowe
+# generate_boards; każda plansza jest też sprawdzana przez validate_board
+def benchmark_board_generation(count=100000):
+    num_images = 32
+    images = dict.fromkeys(range(num_images))
+    rng = random.Random(1234)
+    start = time.perf_counter()
+    for _ in range(count // 10):
+        create_board(MAX_BOARD_SIZE, images)
+    single = (time.perf_counter() - start) / (count // 10)
+    start = time.perf_counter()
+    boards = list(generate_boards(count, MAX_BOARD_SIZE, num_images, rng))
+    bulk = (time.perf_counter() - start) / count
+    start = time.perf_counter()
+    for board in boards:
+        validate_board(board, num_images)
+    validation = (time.perf_counter() - start) / count
+    print(f"create_board:    {1 / single:10.0f} plansz/s")
+    print(f"generate_boards: {1 / bulk:10.0f} plansz/s")
+    print(f"validate_board:  {1 / validation:10.0f} plansz/s")
+    print(f"Rozmiar zapisu planszy: {len(serialize_board(boards[0]))} B")
+
+# Zmierz czas generowania labiryntu każdym z algorytmów
+def benchmark_maze_generation(sizes=(21, 201, 1001)):
+    for size in sizes:
+        for algorithm in MAZE_ALGORITHMS:
+            start = time.perf_counter()
+            generate_labyrinth_grid(size, size, algorithm)
+            elapsed = time.perf_counter() - start
+            print(f"{size}x{size} {algorithm:8} {elapsed * 1000:9.1f} ms")
+
+# Ocena wielu labiryntów naraz: tempo analizy (bez czasu generowania), rozkład trudności
+# i odsetek labiryntów w zakresie LABYRINTH_DIFFICULTY
+def benchmark_labyrinth_analysis(count=2000, maze_size=MAZE_SIZE):
+    start = (maze_size // 2) * maze_size + maze_size // 2
+    mazes = []
+    skipped = 0
+    while len(mazes) < count:
+        maze = generate_labyrinth(maze_size, maze_size)
+        exit_pos = choose_labyrinth_exit(maze, maze_size)
+        if exit_pos is None:
+            skipped += 1
+            continue
+        mazes.append((b''.join(maze), exit_pos[1] * maze_size + exit_pos[0]))
+    begin = time.perf_counter()
+    results = [analyze_labyrinth(grid, maze_size, start, goal) for grid, goal in mazes]
+    elapsed = time.perf_counter() - begin
+    difficulties = sorted(stats.difficulty for stats in results if stats.difficulty >= 0)
+    low, high = LABYRINTH_DIFFICULTY
+    in_band = sum(1 for difficulty in difficulties if low <= difficulty <= high)
+    print(f"Labiryntów {maze_size}x{maze_size}: {count}, analiza {count / elapsed:.0f} labiryntów/s")
+    print(f"Pominięte (brak osiągalnego wyjścia): {skipped}, nieosiągalne wyjście: {count - len(difficulties)}")
+    print(f"Trudność p10 {percentile(difficulties, 0.1)} p50 {percentile(difficulties, 0.5)} p90 {percentile(difficulties, 0.9)}, "
+          f"w zakresie {low}-{high}: {in_band / count:.0%}")
+
+# Porównaj czas klatki labiryntu: rysowanie wszystkich komórek co klatkę, gotowa warstwa statyczna
+# z całą ścieżką oraz warstwa ścieżki z dorysowywanymi odcinkami; przy cofnięciu ścieżki
+# starcie jednego odcinka albo utworzenie całej warstwy ścieżki od nowa
+def benchmark_labyrinth_rendering(frames=300, maze_size=21, path_length=2000):
+    screen = init_headless_display()
+    cell_size = WINDOW_WIDTH // maze_size
+    maze = generate_labyrinth(maze_size, maze_size)
+    background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    marker = pygame.Surface((40, 40))
+    start_pos = (maze_size // 2, maze_size // 2)
+    exit_pos = (maze_size - 2, maze_size - 2)
+    path = [(start_pos[0] * cell_size + i % cell_size, start_pos[1] * cell_size + i % 2) for i in range(path_length)]
+
+    def per_frame_drawing():
+        screen.blit(background, (0, 0))
+        draw_labyrinth_layer(screen, maze, cell_size, start_pos, exit_pos, marker, marker)
+        pygame.draw.lines(screen, RED, False, path, 2)
+
+    layer = render_labyrinth_layer(background, maze, cell_size, start_pos, exit_pos, marker, marker)
+
+    def prerendered_layer():
+        draw_labyrinth(screen, layer, path)
+
+    path_layer = render_path_layer(layer, path)
+
+    def incremental_path():
+        draw_path_segment(path_layer, path[-2], path[-1])
+        screen.blit(path_layer, (0, 0))
+
+    def backtrack_erase():
+        erase_path_segment(path_layer, layer, path[-2], path[-1], path[-3])
+        screen.blit(path_layer, (0, 0))
+
+    def backtrack_rebuild():
+        screen.blit(render_path_layer(layer, path[:-1]), (0, 0))
+
+    # Wywołania rysujące na klatkę: tło, dwa prostokąty na komórkę, start, wyjście i ścieżka
+    variants = (
+        ("co klatkę", per_frame_drawing, 1 + 2 * maze_size * maze_size + 2 + 1),
+        ("warstwa statyczna", prerendered_layer, 2),
+        ("warstwa ścieżki", incremental_path, 2),
+        ("cofnięcie odcinka", backtrack_erase, 3),
+        ("cofnięcie (całość)", backtrack_rebuild, 4),
+    )
+    print(f"Ścieżka: {path_length} punktów")
+    for name, draw, calls in variants:
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        elapsed = (time.perf_counter() - start) / frames
+        print(f"{name:18} {elapsed * 1000:7.3f} ms/klatkę, {calls} wywołań rysujących")
+
+# Pomiar klatek gry sterowanej skryptem zdarzeń. Skrypt podaje listę zdarzeń na każdą klatkę
+# i musi kończyć się zdarzeniem wygrywającym grę; zdarzenia są wysyłane po wyświetleniu klatki,
+# a razem z ostatnią listą wysyłane jest kliknięcie zamykające ekran z gratulacjami.
+# Skrypt jest czytany z wyprzedzeniem o jedną klatkę.
+class BenchProbe(FrameProbe):
+    def __init__(self, script, track_allocations=False):
+        self.script = iter(script)
+        self.pending = next(self.script, None)
+        self.finished = False
+        self.track_allocations = track_allocations
+        self.render_times = []
+        self.event_times = []
+        self.allocations = []
+        self.events_start = 0
+        self._start_frame()
+
+    def _start_frame(self):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            self.frame_memory = tracemalloc.get_traced_memory()[0]
+        self.frame_start = time.perf_counter()
+
+    def rendered(self):
+        self.render_times.append(time.perf_counter() - self.frame_start)
+        frame = self.pending
+        self.pending = next(self.script, None)
+        self.finished = self.pending is None
+        if frame is not None:
+            self.post(frame)
+        self.events_start = time.perf_counter()
+
+    def post(self, events):
+        for event in events:
+            pygame.event.post(event)
+
+    def handled(self):
+        self.event_times.append(time.perf_counter() - self.events_start)
+        if self.track_allocations:
+            self.allocations.append(tracemalloc.get_traced_memory()[1] - self.frame_memory)
+        if self.finished:
+            pygame.event.post(mouse_event(pygame.MOUSEBUTTONDOWN, (0, 0)))
+        self._start_frame()
+
+# Odtwarzanie dziennika sesji: każde zapisane zdarzenie jest wysyłane w osobnej klatce, poprzedzonej
+# pustą klatką, a czas gry (frame_scheduler.ticks) jest ustawiany na czas zapisany w dzienniku,
+# więc zależności od czasu (np. zakrycie pomylonych kafelków) zachodzą tak samo jak w nagraniu.
+# Jeśli nagranie nie kończy się wygraną, po jego końcu gra jest zamykana zdarzeniem QUIT.
+class ReplayProbe(BenchProbe):
+    def __init__(self, log, track_allocations=False):
+        self.virtual_time = 0
+        self.frames_after_end = 0
+        super().__init__(self._frames(log), track_allocations)
+
+    @staticmethod
+    def _frames(log):
+        for event_time, kind, index in log.events():
+            yield event_time, []
+            yield event_time, [replay_event(log, kind, index)]
+
+    def post(self, frame):
+        self.virtual_time, events = frame
+        super().post(events)
+
+    def handled(self):
+        if self.finished:
+            self.frames_after_end += 1
+            if self.frames_after_end > 1:
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+        super().handled()
+
+# Zdarzenie myszy odpowiadające zapisowi w dzienniku sesji
+def replay_event(log, kind, index):
+    if log.game == LOG_MEMORY:
+        offset_x, offset_y = board_offsets(log.param)
+        row, col = divmod(index, log.param)
+        return mouse_event(pygame.MOUSEBUTTONDOWN, (offset_x + col * (TILE_SIZE + PADDING) + TILE_SIZE // 2,
+                                                    offset_y + row * (TILE_SIZE + PADDING) + TILE_SIZE // 2))
+    if log.game == LOG_LABYRINTH:
+        cell_size = WINDOW_WIDTH // log.param
+        if kind == LOG_MOVE:
+            return mouse_event(pygame.MOUSEMOTION, cell_center((index % log.param, index // log.param), cell_size))
+        return mouse_event(pygame.MOUSEBUTTONDOWN if kind == LOG_PRESS else pygame.MOUSEBUTTONUP, (0, 0))
+    if log.game == LOG_SHADOWS:
+        piece_size, piece_positions, shadow_positions = shadow_game_layout(log.param)
+        if kind == LOG_PRESS:
+            x, y = piece_positions[index]
+            return mouse_event(pygame.MOUSEBUTTONDOWN, (x + piece_size // 2, y + piece_size // 2))
+        if index == LOG_NONE:
+            return mouse_event(pygame.MOUSEBUTTONUP, (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        x, y = shadow_positions[index]
+        return mouse_event(pygame.MOUSEBUTTONUP, (x + piece_size // 2, y + piece_size // 2))
+    raise ValueError(f"Nieznany rodzaj gry w dzienniku sesji: {log.game}.")
+
+def mouse_event(event_type, pos):
+    if event_type == pygame.MOUSEMOTION:
+        return pygame.event.Event(event_type, pos=pos, rel=(0, 0), buttons=(1, 0, 0))
+    return pygame.event.Event(event_type, pos=pos, button=1)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+# Skrypt gry w zapamiętywanie: jedna celowa pomyłka (z czekaniem na zakrycie kafelków),
+# a potem odkrycie kolejnych par
+def memory_game_script(board):
+    size = math.isqrt(len(board))
+    offset_x, offset_y = board_offsets(size)
+    cells = {}
+    for index, image_id in enumerate(board):
+        cells.setdefault(image_id, []).append(divmod(index, size))
+    pairs = list(cells.values())
+
+    def click(cell):
+        i, j = cell
+        pos = (offset_x + j * (TILE_SIZE + PADDING) + TILE_SIZE // 2, offset_y + i * (TILE_SIZE + PADDING) + TILE_SIZE // 2)
+        return [mouse_event(pygame.MOUSEBUTTONDOWN, pos)]
+
+    if len(pairs) > 1:
+        yield click(pairs[0][0])
+        yield click(pairs[1][0])
+        # Czekanie poza mierzonym czasem klatki, aby pusty sekundowy odstęp nie dał setek tysięcy klatek
+        mismatch_time = pygame.time.get_ticks()
+        while pygame.time.get_ticks() - mismatch_time <= 1100:
+            time.sleep(0.005)
+            yield []
+    for index, (first, second) in enumerate(pairs):
+        if index:
+            yield []
+        yield click(first)
+        yield []
+        yield click(second)
+
+# Skrypt labiryntu: przeciągnięcie myszy przez kolejne komórki najkrótszej drogi do wyjścia
+def labyrinth_game_script(maze, start_pos, exit_pos):
+    cell_size = WINDOW_WIDTH // len(maze)
+    cells = shortest_labyrinth_path(maze, start_pos, exit_pos)
+    yield [mouse_event(pygame.MOUSEBUTTONDOWN, cell_center(start_pos, cell_size))]
+    for cell in cells[1:]:
+        yield [mouse_event(pygame.MOUSEMOTION, cell_center(cell, cell_size))]
+
+# Skrypt gry w cienie: przeciągnięcie każdego obiektu do pierwszego wolnego pasującego cienia
+def shadow_game_script(pieces, shadows_list):
+    piece_size, piece_positions, shadow_positions = shadow_game_layout(len(pieces))
+    free_shadows = list(range(len(shadows_list)))
+    for (name, _), piece_pos in zip(pieces, piece_positions):
+        target = next(j for j in free_shadows if shadows_list[j][0] == name)
+        free_shadows.remove(target)
+        shadow_pos = shadow_positions[target]
+        yield [mouse_event(pygame.MOUSEBUTTONDOWN, (piece_pos[0] + piece_size // 2, piece_pos[1] + piece_size // 2))]
+        for _ in range(3):
+            yield []
+        yield [mouse_event(pygame.MOUSEBUTTONUP, (shadow_pos[0] + piece_size // 2, shadow_pos[1] + piece_size // 2))]
+
+# Uruchom grę sterowaną przez podany obiekt pomiarowy (BenchProbe lub ReplayProbe)
+def run_probed_game(start_game, probe):
+    previous_probe = gry.frame_probe
+    gry.frame_probe = probe
+    try:
+        start_game()
+    finally:
+        gry.frame_probe = previous_probe
+    return probe
+
+# Uruchom grę ze skryptem zdarzeń; gra i skrypt dostają generatory liczb losowych z tym samym ziarnem
+def run_scripted_game(start_game, make_script, track_allocations=False):
+    return run_probed_game(start_game, BenchProbe(make_script(), track_allocations))
+
+# Odtwórz sesję z dziennika bez limitu FPS, z czasem gry wziętym z dziennika.
+# Zwraca obiekt pomiarowy i dziennik zapisany podczas odtwarzania (zgodny z oryginałem, jeśli gra jest powtarzalna).
+def replay_session(log, assets, track_allocations=False):
+    probe = ReplayProbe(log, track_allocations)
+    replayed = GameLog()
+    screen = pygame.display.get_surface()
+    background = assets['background']
+    if log.game == LOG_MEMORY:
+        start_game = lambda: memory_game(screen, log.param, assets['images'], background, background, log.seed, replayed, log.board)
+    elif log.game == LOG_LABYRINTH:
+        start_game = lambda: labyrinth_game(screen, background, background, assets['start_image'], assets['exit_image'], log.seed, replayed)
+    elif log.game == LOG_SHADOWS:
+        start_game = lambda: match_the_shadows_game(screen, log.param, assets['shapes'], assets['shadows'], background, background, None, log.seed, replayed)
+    else:
+        raise ValueError(f"Nieznany rodzaj gry w dzienniku sesji: {log.game}.")
+
+    previous_fps, previous_time_source = frame_scheduler.fps, frame_scheduler.time_source
+    frame_scheduler.fps = 0
+    frame_scheduler.time_source = lambda: probe.virtual_time
+    try:
+        run_probed_game(start_game, probe)
+    finally:
+        frame_scheduler.fps, frame_scheduler.time_source = previous_fps, previous_time_source
+    return probe, replayed
+
+# Obrazy wszystkich gier do uruchamiania bez okna (benchmarki i odtwarzanie sesji)
+def load_headless_assets():
+    base_dir = get_base_dir()
+    init_headless_display()
+    cache = ImageCache(os.path.join(base_dir, 'Cache'))
+    shapes = TextureAtlas(load_images(os.path.join(base_dir, 'Match the shadow assets'), TILE_SIZE, cache)).images
+    start_image, exit_image = load_labyrinth_images(os.path.join(base_dir, 'Labyrinth game assets'))
+    background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+    background.fill(ORANGE)
+    return {
+        'images': TextureAtlas(load_images(os.path.join(base_dir, 'Memory game assets'), TILE_SIZE, cache)).images,
+        'shapes': shapes,
+        'shadows': make_shadow_images(shapes),
+        'start_image': start_image,
+        'exit_image': exit_image,
+        'background': background,
+    }
+
+# Czasy klatek zebrane przez obiekt pomiarowy w jednym wierszu
+def frame_timing_summary(probe):
+    first_ms = probe.render_times[0] * 1000
+    render_ms = [t * 1000 for t in probe.render_times[1:]] or [0.0]
+    event_ms = [t * 1000 for t in probe.event_times]
+    return (f"klatek {len(probe.render_times):5} | pierwsza {first_ms:7.3f} ms | "
+            f"rysowanie p50 {percentile(render_ms, 0.5):6.3f} ms p99 {percentile(render_ms, 0.99):6.3f} ms | "
+            f"zdarzenia p50 {percentile(event_ms, 0.5):6.3f} ms p99 {percentile(event_ms, 0.99):6.3f} ms")
+
+# Benchmark wszystkich trzech gier bez okna (sterownik "dummy"), bez limitu FPS.
+# Dla każdej gry: czas pierwszej klatki (z przygotowaniem planszy), czas rysowania i obsługi
+# zdarzeń w kolejnych klatkach (p50/p99) oraz szczyt alokacji w klatce.
+def benchmark_games(seed=1234):
+    assets = load_headless_assets()
+    screen = pygame.display.get_surface()
+    images, shapes, shadows = assets['images'], assets['shapes'], assets['shadows']
+    background = assets['background']
+
+    def labyrinth_script():
+        maze, exit_pos, _ = select_labyrinth(MAZE_SIZE, rng=random.Random(seed))
+        return labyrinth_game_script(maze, (MAZE_SIZE // 2, MAZE_SIZE // 2), exit_pos)
+
+    scenarios = [
+        (f"pamięć {size}x{size}",
+         lambda size=size: memory_game(screen, size, images, background, background, seed),
+         lambda size=size: memory_game_script(create_board(size, images, random.Random(seed))))
+        for size in (4, 8)
+    ]
+    scenarios.append(("labirynt",
+                      lambda: labyrinth_game(screen, background, background, assets['start_image'], assets['exit_image'], seed),
+                      labyrinth_script))
+    scenarios.append(("cienie 12",
+                      lambda: match_the_shadows_game(screen, 12, shapes, shadows, background, background, None, seed),
+                      lambda: shadow_game_script(*create_game_pieces(shapes, shadows, 12, random.Random(seed)))))
+
+    previous_fps = frame_scheduler.fps
+    frame_scheduler.fps = 0
+    try:
+        for name, start_game, make_script in scenarios:
+            timing = run_scripted_game(start_game, make_script)
+            tracemalloc.start()
+            try:
+                allocations = run_scripted_game(start_game, make_script, track_allocations=True).allocations
+            finally:
+                tracemalloc.stop()
+            print(f"{name:12} {frame_timing_summary(timing)} | "
+                  f"alokacje p50 {percentile(allocations, 0.5) / 1024:6.1f} KB p99 {percentile(allocations, 0.99) / 1024:6.1f} KB")
+    finally:
+        frame_scheduler.fps = previous_fps
+
+# Nagraj sesje trzech gier sterowanych skryptem (jak w benchmarku gier, z ograniczeniem FPS),
+# a potem odtwórz każdą z dziennika z maksymalną prędkością i sprawdź, czy dziennik odtworzenia
+# jest identyczny z nagraniem
+def benchmark_replay(seed=1234):
+    assets = load_headless_assets()
+    screen = pygame.display.get_surface()
+    images, shapes, shadows = assets['images'], assets['shapes'], assets['shadows']
+    background = assets['background']
+
+    def labyrinth_script():
+        maze, exit_pos, _ = select_labyrinth(MAZE_SIZE, rng=random.Random(seed))
+        return labyrinth_game_script(maze, (MAZE_SIZE // 2, MAZE_SIZE // 2), exit_pos)
+
+    scenarios = [
+        ("pamięć 8x8",
+         lambda log: memory_game(screen, 8, images, background, background, seed, log),
+         lambda: memory_game_script(create_board(8, images, random.Random(seed)))),
+        ("labirynt",
+         lambda log: labyrinth_game(screen, background, background, assets['start_image'], assets['exit_image'], seed, log),
+         labyrinth_script),
+        ("cienie 12",
+         lambda log: match_the_shadows_game(screen, 12, shapes, shadows, background, background, None, seed, log),
+         lambda: shadow_game_script(*create_game_pieces(shapes, shadows, 12, random.Random(seed)))),
+    ]
+    for name, start_game, make_script in scenarios:
+        log = GameLog()
+        start = time.perf_counter()
+        run_scripted_game(lambda: start_game(log), make_script)
+        recorded = time.perf_counter() - start
+        start = time.perf_counter()
+        probe, replayed = replay_session(GameLog.from_bytes(log.to_bytes()), assets)
+        elapsed = time.perf_counter() - start
+        match = "zgodny" if replayed.to_bytes() == log.to_bytes() else "NIEZGODNY"
+        print(f"{name:12} dziennik {len(log.to_bytes()):5} B | nagranie {recorded * 1000:8.1f} ms | "
+              f"odtworzenie {elapsed * 1000:7.1f} ms ({len(probe.render_times)} klatek) | {match}")
+
+# Odtwórz sesję zapisaną w pliku dziennika bez okna i z maksymalną prędkością
+def replay_log_file(path):
+    log = GameLog.load(path)
+    probe, replayed = replay_session(log, load_headless_assets())
+    match = "zgodny" if replayed.to_bytes() == log.to_bytes() else "NIEZGODNY"
+    print(f"Zdarzeń: {len(log.records) // LOG_RECORD.size}, ziarno: {log.seed}, dziennik odtworzenia {match}")
+    print(frame_timing_summary(probe))
+
+BENCHMARKS = {
+    'cache': benchmark_asset_cache,
+    'parallel': benchmark_parallel_loading,
+    'shadows': benchmark_silhouettes,
+    'atlas': benchmark_atlas,
+    'blits': benchmark_board_blits,
+    'boards': benchmark_board_generation,
+    'maze': benchmark_maze_generation,
+    'labyrinth': benchmark_labyrinth_rendering,
+    'analyze': benchmark_labyrinth_analysis,
+    'games': benchmark_games,
+    'replay': benchmark_replay,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarki i odtwarzanie sesji gier edukacyjnych dla dzieci")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--bench', choices=sorted(BENCHMARKS), help="uruchom wybrany benchmark")
+    group.add_argument('--replay', metavar='PLIK', help="odtwórz bez okna sesję zapisaną w dzienniku (np. Cache/last_session.gryl)")
+    args = parser.parse_args()
+    if args.bench:
+        BENCHMARKS[args.bench]()
+    else:
+        replay_log_file(args.replay)
@@ -0,0 +1,25 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+
+# Testy działają bez okna; sterowniki "dummy" muszą być ustawione przed pygame.init() w skrypcie gry
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Gry edukacyjne dla dzieci.py')
+
+# Nazwa skryptu gry zawiera spacje, więc testy wczytują go przez importlib jako moduł gry
+if 'gry' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('gry', GAME_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['gry'] = module
+    spec.loader.exec_module(module)
+
+
+# Ekran gry; convert_alpha i rysowanie wymagają ustawionego trybu wyświetlania
+@pytest.fixture(scope='session', autouse=True)
+def screen():
+    gry = sys.modules['gry']
+    return gry.pygame.display.set_mode((gry.WINDOW_WIDTH, gry.WINDOW_HEIGHT))
@@ -0,0 +1,194 @@
+import os
+import random
+
+import pytest
+
+import gry
+
+pygame = gry.pygame
+
+
+def make_surface(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface.convert_alpha()
+
+
+def save_png(path, size, color):
+    pygame.image.save(make_surface(size, color), str(path))
+    return str(path)
+
+
+def load_png(path):
+    return pygame.image.load(path).convert_alpha()
+
+
+def test_image_cache_reuses_prepared_image(tmp_path):
+    source = save_png(tmp_path / 'obraz.png', (8, 8), (255, 0, 0, 255))
+    cache_dir = str(tmp_path / 'Cache')
+    prepared = []
+
+    def prepare(path):
+        prepared.append(path)
+        return load_png(path)
+
+    cache = gry.ImageCache(cache_dir)
+    assert cache.load(source, 'v', prepare).get_at((0, 0)) == (255, 0, 0, 255)
+    cache.save_index()
+    # Nowa instancja czyta obraz z dysku bez ponownego przygotowania
+    cache = gry.ImageCache(cache_dir)
+    assert cache.load(source, 'v', prepare).get_at((0, 0)) == (255, 0, 0, 255)
+    assert prepared == [source]
+    # Inny wariant tego samego pliku jest osobnym wpisem
+    cache.load(source, 'inny', prepare)
+    assert len(prepared) == 2
+
+
+def test_image_cache_invalidated_by_changed_source(tmp_path):
+    source = save_png(tmp_path / 'obraz.png', (8, 8), (255, 0, 0, 255))
+    cache_dir = str(tmp_path / 'Cache')
+    cache = gry.ImageCache(cache_dir)
+    cache.load(source, 'v', load_png)
+    cache.save_index()
+    old_files = set(os.listdir(cache_dir)) - {gry.ImageCache.INDEX_FILENAME}
+
+    save_png(source, (8, 8), (0, 255, 0, 255))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cache = gry.ImageCache(cache_dir)
+    assert cache.load(source, 'v', load_png).get_at((0, 0)) == (0, 255, 0, 255)
+    # Pliki bufora starej zawartości są usuwane
+    assert not old_files & set(os.listdir(cache_dir))
+
+
+def test_image_cache_touched_source_keeps_entry(tmp_path):
+    source = save_png(tmp_path / 'obraz.png', (8, 8), (255, 0, 0, 255))
+    cache = gry.ImageCache(str(tmp_path / 'Cache'))
+    cache.load(source, 'v', load_png)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    # Zmiana samego czasu modyfikacji nie unieważnia obrazu, bo skrót zawartości jest ten sam
+    assert cache.load(source, 'v', lambda path: None).get_at((0, 0)) == (255, 0, 0, 255)
+
+
+def test_image_cache_ignores_corrupt_blob(tmp_path):
+    source = save_png(tmp_path / 'obraz.png', (4, 4), (0, 0, 255, 255))
+    cache = gry.ImageCache(str(tmp_path / 'Cache'))
+    cache.load(source, 'v', load_png)
+    blob_path = cache._blob_path(source, 'v')
+    with open(blob_path, 'r+b') as f:
+        f.truncate(10)
+    assert cache._read_blob(blob_path) is None
+    assert cache.load(source, 'v', load_png).get_size() == (4, 4)
+
+
+def test_load_images_through_cache(tmp_path):
+    assets = tmp_path / 'assets'
+    assets.mkdir()
+    save_png(assets / 'a.png', (200, 100), (255, 0, 0, 255))
+    save_png(assets / 'b.png', (50, 50), (0, 255, 0, 255))
+    cache = gry.ImageCache(str(tmp_path / 'Cache'))
+    first = gry.load_images(str(assets), gry.TILE_SIZE, cache)
+    second = gry.load_images(str(assets), gry.TILE_SIZE, gry.ImageCache(str(tmp_path / 'Cache')))
+    assert sorted(first) == sorted(second)
+    for name in first:
+        assert first[name].get_size() == second[name].get_size()
+        assert max(first[name].get_size()) <= gry.TILE_SIZE
+
+
+def test_asset_registry_loads_once():
+    calls = []
+    assets = gry.AssetRegistry()
+    assets.register('obrazy', lambda: calls.append(1) or {'a': 1})
+    assert calls == []
+    assert assets.get('obrazy') is assets.get('obrazy')
+    assert calls == [1]
+    assert (assets.hits, assets.misses) == (1, 1)
+
+
+def test_asset_registry_retries_failed_loader():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FileNotFoundError("brak katalogu")
+        return {'a': 1}
+
+    assets = gry.AssetRegistry()
+    assets.register('obrazy', loader)
+    with pytest.raises(FileNotFoundError):
+        assets.get('obrazy')
+    assert assets.get('obrazy') == {'a': 1}
+    assert len(attempts) == 2
+
+
+def test_parallel_map_keeps_order():
+    items = list(range(50))
+    assert gry.parallel_map(lambda x: x * x, items, workers=4) == [x * x for x in items]
+    assert gry.parallel_map(lambda x: x * x, items, workers=1) == [x * x for x in items]
+    assert gry.parallel_map(str, [], workers=4) == []
+
+
+def test_load_images_parallel_matches_serial(tmp_path):
+    for i in range(6):
+        save_png(tmp_path / f'{i}.png', (20 + i * 30, 60), (40 * i, 0, 0, 255))
+    (tmp_path / 'opis.txt').write_text('nie obraz')
+    serial = gry.load_images(str(tmp_path), gry.TILE_SIZE, workers=1)
+    parallel = gry.load_images(str(tmp_path), gry.TILE_SIZE, workers=4)
+    assert list(serial) == list(parallel) == [str(i) for i in range(6)]
+    for name in serial:
+        assert serial[name].get_size() == parallel[name].get_size()
+        assert serial[name].get_at((0, 0)) == parallel[name].get_at((0, 0))
+
+
+def test_texture_atlas_regions_do_not_overlap():
+    rng = random.Random(9)
+    images = {}
+    for i in range(60):
+        size = (rng.randint(1, 120), rng.randint(1, 120))
+        images[f'obraz{i}'] = make_surface(size, (i * 4, 255 - i * 4, i, 128 + i))
+    atlas = gry.TextureAtlas(images, page_size=256)
+    assert len(atlas.pages) > 1
+    assert set(atlas.regions) == set(images)
+
+    regions = list(atlas.regions.items())
+    for index, (name, (page_index, rect)) in enumerate(regions):
+        assert rect.size == images[name].get_size()
+        assert atlas.pages[page_index].get_rect().contains(rect)
+        for other_name, (other_page, other_rect) in regions[index + 1:]:
+            assert page_index != other_page or not rect.colliderect(other_rect), (name, other_name)
+
+
+def test_texture_atlas_keeps_pixels():
+    images = {
+        'czerwony': make_surface((30, 20), (255, 0, 0, 255)),
+        'polprzezroczysty': make_surface((10, 40), (0, 0, 255, 100)),
+    }
+    atlas = gry.TextureAtlas(images, page_size=64)
+    for name, image in images.items():
+        page_index, rect = atlas.regions[name]
+        assert atlas.images[name].get_parent() is atlas.pages[page_index]
+        assert atlas.images[name].get_size() == image.get_size()
+        assert pygame.image.tostring(atlas.images[name], 'RGBA') == pygame.image.tostring(image, 'RGBA')
+
+
+def test_texture_atlas_rejects_too_large_image():
+    with pytest.raises(ValueError):
+        gry.TextureAtlas({'duzy': make_surface((65, 10), (0, 0, 0, 255))}, page_size=64)
+
+
+def test_blit_item_draws_atlas_region(screen):
+    images = {'a': make_surface((20, 20), (255, 0, 0, 255)), 'b': make_surface((20, 20), (0, 255, 0, 255))}
+    atlas = gry.TextureAtlas(images, page_size=64)
+    page, dest, area = gry.blit_item(atlas.images['b'], (5, 5))
+    assert page is atlas.pages[atlas.regions['b'][0]]
+    assert area == atlas.regions['b'][1]
+    plain = make_surface((4, 4), (0, 0, 0, 255))
+    assert gry.blit_item(plain, (1, 2)) == (plain, (1, 2))
+
+    screen.fill(gry.WHITE)
+    screen.blits([gry.blit_item(atlas.images['b'], (5, 5))], False)
+    assert screen.get_at((5, 5)) == (0, 255, 0, 255)
+    assert screen.get_at((24, 24)) == (0, 255, 0, 255)
+    assert screen.get_at((25, 25)) == gry.WHITE
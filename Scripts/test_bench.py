@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import bench
+import gry
+
+pygame = gry.pygame
+
+
+def make_surface(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface
+
+
+# Małe obrazy wszystkich gier zamiast wczytywania katalogów z zasobami
+def make_assets():
+    colors = [(40 * i % 256, 90 * i % 256, 150 * i % 256, 255) for i in range(1, 9)]
+    shapes = {f'ksztalt{i}': make_surface((gry.TILE_SIZE, gry.TILE_SIZE), color) for i, color in enumerate(colors[:6])}
+    return {
+        'images': {f'obraz{i}': make_surface((gry.TILE_SIZE, gry.TILE_SIZE), color) for i, color in enumerate(colors)},
+        'shapes': shapes,
+        'shadows': gry.make_shadow_images(shapes),
+        'start_image': make_surface((20, 20), (0, 255, 0, 255)),
+        'exit_image': make_surface((20, 20), (255, 0, 0, 255)),
+        'background': pygame.Surface((gry.WINDOW_WIDTH, gry.WINDOW_HEIGHT)),
+    }
+
+
+def labyrinth_script(seed):
+    maze, exit_pos, _ = gry.select_labyrinth(gry.MAZE_SIZE, rng=random.Random(seed))
+    return bench.labyrinth_game_script(maze, (gry.MAZE_SIZE // 2, gry.MAZE_SIZE // 2), exit_pos)
+
+
+@pytest.mark.parametrize('game', ['memory', 'labyrinth', 'shadows'])
+def test_replay_reproduces_recorded_session(game, monkeypatch):
+    seed = 1234
+    assets = make_assets()
+    screen = pygame.display.get_surface()
+    background = assets['background']
+    if game == 'memory':
+        start_game = lambda log: gry.memory_game(screen, 4, assets['images'], background, background, seed, log)
+        make_script = lambda: bench.memory_game_script(gry.create_board(4, assets['images'], random.Random(seed)))
+    elif game == 'labyrinth':
+        start_game = lambda log: gry.labyrinth_game(screen, background, background, assets['start_image'], assets['exit_image'], seed, log)
+        make_script = lambda: labyrinth_script(seed)
+    else:
+        start_game = lambda log: gry.match_the_shadows_game(screen, 6, assets['shapes'], assets['shadows'], background, background, None, seed, log)
+        make_script = lambda: bench.shadow_game_script(*gry.create_game_pieces(assets['shapes'], assets['shadows'], 6, random.Random(seed)))
+
+    monkeypatch.setattr(gry.frame_scheduler, 'fps', 0)
+    log = gry.GameLog()
+    bench.run_scripted_game(lambda: start_game(log), make_script)
+    assert log.records
+
+    probe, replayed = bench.replay_session(gry.GameLog.from_bytes(log.to_bytes()), assets)
+    assert replayed.to_bytes() == log.to_bytes()
+    # Każde zapisane zdarzenie jest odtwarzane w osobnej klatce poprzedzonej pustą klatką
+    assert len(probe.render_times) >= 2 * len(log.records) // gry.LOG_RECORD.size
+
+
+def test_replay_event_rejects_unknown_game():
+    with pytest.raises(ValueError):
+        bench.replay_event(gry.GameLog(9, 0, 4), gry.LOG_PRESS, 0)
+
+
+def test_percentile():
+    values = list(range(100, 0, -1))
+    assert bench.percentile(values, 0.5) == 51
+    assert bench.percentile(values, 0.99) == 100
+    assert bench.percentile([3.0], 0.99) == 3.0
@@ -0,0 +1,318 @@
+import random
+
+import pytest
+
+import gry
+
+
+def open_neighbours(grid, width, i):
+    x = i % width
+    neighbours = []
+    for n, inside in ((i - width, True), (i + width, True), (i - 1, x > 0), (i + 1, x < width - 1)):
+        if inside and 0 <= n < len(grid) and not grid[n]:
+            neighbours.append(n)
+    return neighbours
+
+
+# Komórki przejść osiągalne z komórki start, przeszukiwaniem wszerz bez użycia kodu gry
+def reachable_cells(grid, width, start):
+    seen = {start}
+    frontier = [start]
+    while frontier:
+        i = frontier.pop()
+        for n in open_neighbours(grid, width, i):
+            if n not in seen:
+                seen.add(n)
+                frontier.append(n)
+    return seen
+
+
+@pytest.mark.parametrize('algorithm', sorted(gry.MAZE_ALGORITHMS))
+@pytest.mark.parametrize('width, height', [(3, 3), (21, 21), (11, 31), (41, 7)])
+def test_maze_is_perfect_and_connected(algorithm, width, height):
+    grid = gry.generate_labyrinth_grid(width, height, algorithm)
+    rooms = [y * width + x for y in range(1, height, 2) for x in range(1, width, 2)]
+    open_cells = [i for i, cell in enumerate(grid) if not cell]
+
+    # Każdy pokój jest otwarty, a przejścia leżą tylko między dwoma pokojami
+    assert all(not grid[i] for i in rooms)
+    for i in open_cells:
+        x, y = i % width, i // width
+        assert 0 < x < width - 1 and 0 < y < height - 1
+        assert x % 2 or y % 2
+    # Drzewo rozpinające pokojów ma o jedno przejście mniej niż pokojów...
+    assert len(open_cells) == 2 * len(rooms) - 1
+    # ...i jest spójne
+    assert reachable_cells(grid, width, width + 1) == set(open_cells)
+
+
+def test_generate_labyrinth_rows():
+    maze = gry.generate_labyrinth(21, 11)
+    assert len(maze) == 11
+    assert all(len(row) == 21 for row in maze)
+    assert maze[1][1] == 0
+    assert maze[0][0] == 1
+
+
+def test_unknown_maze_algorithm():
+    with pytest.raises(ValueError):
+        gry.generate_labyrinth_grid(21, 21, 'nieznany')
+
+
+def test_labyrinth_layer_matches_per_frame_drawing(screen):
+    maze_size = 21
+    cell_size = gry.WINDOW_WIDTH // maze_size
+    maze = gry.generate_labyrinth(maze_size, maze_size)
+    background = gry.pygame.Surface((gry.WINDOW_WIDTH, gry.WINDOW_HEIGHT))
+    background.fill(gry.ORANGE)
+    marker = gry.pygame.Surface((40, 40))
+    marker.fill(gry.BLUE)
+    start_pos, exit_pos = (10, 10), (19, 19)
+    path = [(start_pos[0] * cell_size + cell_size // 2, start_pos[1] * cell_size + cell_size // 2),
+            (start_pos[0] * cell_size + cell_size // 2, start_pos[1] * cell_size + 3 * cell_size // 2)]
+
+    screen.blit(background, (0, 0))
+    gry.draw_labyrinth_layer(screen, maze, cell_size, start_pos, exit_pos, marker, marker)
+    gry.pygame.draw.lines(screen, gry.RED, False, path, 2)
+    expected = screen.copy()
+
+    layer = gry.render_labyrinth_layer(background, maze, cell_size, start_pos, exit_pos, marker, marker)
+    screen.fill(gry.BLACK)
+    gry.draw_labyrinth(screen, layer, path)
+    assert gry.pygame.image.tostring(screen, 'RGB') == gry.pygame.image.tostring(expected, 'RGB')
+
+
+def test_incremental_path_layer_matches_full_redraw():
+    layer = gry.pygame.Surface((200, 200))
+    layer.fill(gry.WHITE)
+    path = [(10, 10), (60, 10), (60, 90), (150, 90), (150, 40)]
+    path_layer = layer.copy()
+    for start, end in zip(path, path[1:]):
+        gry.draw_path_segment(path_layer, start, end)
+    expected = gry.render_path_layer(layer, path)
+    assert gry.pygame.image.tostring(path_layer, 'RGB') == gry.pygame.image.tostring(expected, 'RGB')
+    # Warstwa statyczna pozostaje bez ścieżki
+    assert layer.get_at((30, 10)) == gry.WHITE
+
+
+def test_erase_path_segment_matches_full_redraw():
+    # Warstwa statyczna z prawdziwym labiryntem pod ścieżką po środkach komórek
+    cell_size = 20
+    maze = gry.generate_labyrinth(11, 11, rng=random.Random(4))
+    background = gry.pygame.Surface((gry.WINDOW_WIDTH, gry.WINDOW_HEIGHT))
+    marker = gry.pygame.Surface((10, 10))
+    layer = gry.render_labyrinth_layer(background, maze, cell_size, (1, 1), (9, 9), marker, marker)
+    cells = [(1, 1), (2, 1), (3, 1), (3, 2), (3, 3), (2, 3), (1, 3), (1, 4)]
+    points = [gry.cell_center(cell, cell_size) for cell in cells]
+    path_layer = layer.copy()
+    for start, end in zip(points, points[1:]):
+        gry.draw_path_segment(path_layer, start, end)
+    # Cofanie przez zakręty aż do komórki startowej
+    while len(points) > 1:
+        vacated = points.pop()
+        gry.erase_path_segment(path_layer, layer, points[-1], vacated, points[-2] if len(points) > 1 else None)
+        expected = gry.render_path_layer(layer, points)
+        assert gry.pygame.image.tostring(path_layer, 'RGB') == gry.pygame.image.tostring(expected, 'RGB')
+
+
+def test_traverse_cells_steps_between_adjacent_cells():
+    rng = random.Random(3)
+    cell_size = 40
+    for _ in range(2000):
+        p0 = (rng.randrange(-cell_size, 10 * cell_size), rng.randrange(-cell_size, 10 * cell_size))
+        p1 = (rng.randrange(-cell_size, 10 * cell_size), rng.randrange(-cell_size, 10 * cell_size))
+        cells = gry.traverse_cells(p0, p1, cell_size)
+        previous = (p0[0] // cell_size, p0[1] // cell_size)
+        for cell in cells:
+            assert abs(cell[0] - previous[0]) + abs(cell[1] - previous[1]) == 1
+            previous = cell
+        assert previous == (p1[0] // cell_size, p1[1] // cell_size)
+        # Odcinek przechodzi przez każdą komórkę co najwyżej raz
+        assert len(set(cells)) == len(cells)
+
+
+def test_traverse_cells_within_one_cell():
+    assert gry.traverse_cells((5, 5), (30, 39), 40) == []
+
+
+def test_traverse_cells_through_corner():
+    # Odcinek przez wspólny róg czterech komórek przechodzi też przez jedną z komórek bocznych
+    assert gry.traverse_cells((39, 39), (40, 40), 40) in ([(1, 0), (1, 1)], [(0, 1), (1, 1)])
+
+
+# Korytarz w kształcie litery L: (1, 1) -> (3, 1) -> (3, 3), reszta to ściany
+CORRIDOR = [
+    bytes([1, 1, 1, 1, 1]),
+    bytes([1, 0, 0, 0, 1]),
+    bytes([1, 1, 1, 0, 1]),
+    bytes([1, 1, 1, 0, 1]),
+    bytes([1, 1, 1, 1, 1]),
+]
+
+
+def test_labyrinth_path_steps_forward():
+    path = gry.LabyrinthPath(CORRIDOR, (1, 1))
+    assert path.step((2, 1)) == 1
+    assert path.step((3, 1)) == 1
+    assert path.step((3, 2)) == 1
+    assert path.head == (3, 2)
+    assert path.cells == [(1, 1), (2, 1), (3, 1), (3, 2)]
+    assert path.points(10) == [(15, 15), (25, 15), (35, 15), (35, 25)]
+
+
+def test_labyrinth_path_rejects_invalid_moves():
+    path = gry.LabyrinthPath(CORRIDOR, (1, 1))
+    assert path.step((1, 2)) == 0  # ściana
+    assert path.step((3, 1)) == 0  # komórka niesąsiednia
+    assert path.step((1, 1)) == 0  # ta sama komórka
+    assert path.step((0, 1)) == 0  # ściana na krawędzi
+    assert path.cells == [(1, 1)]
+    edge = gry.LabyrinthPath([bytes([0, 0])], (0, 0))
+    assert edge.step((-1, 0)) == 0  # poza labiryntem
+    assert edge.step((0, -1)) == 0
+
+
+def test_labyrinth_path_backtracks():
+    path = gry.LabyrinthPath(CORRIDOR, (1, 1))
+    for cell in [(2, 1), (3, 1), (3, 2)]:
+        path.step(cell)
+    # Wejście do poprzedniej komórki cofa ścieżkę i zwalnia opuszczoną komórkę
+    assert path.step((3, 1)) == -1
+    assert path.step((2, 1)) == -1
+    assert path.cells == [(1, 1), (2, 1)]
+    assert not path.visited[1 * path.width + 3]
+    assert path.step((3, 1)) == 1
+    assert path.step((3, 2)) == 1
+    # Komórka startowa nie może zostać cofnięta
+    start = gry.LabyrinthPath(CORRIDOR, (1, 1))
+    assert start.step((2, 1)) == 1
+    assert start.step((1, 1)) == -1
+    assert start.step((0, 1)) == 0
+    assert start.cells == [(1, 1)]
+
+
+def test_labyrinth_path_cannot_cross_itself():
+    # Otwarty kwadrat 2x2: po obejściu trzech komórek wejście do startu nie jest cofnięciem
+    square = [bytes([0, 0]), bytes([0, 0])]
+    path = gry.LabyrinthPath(square, (0, 0))
+    for cell in [(1, 0), (1, 1), (0, 1)]:
+        assert path.step(cell) == 1
+    assert path.step((0, 0)) == 0
+
+
+# Odległości od komórki start przeszukiwaniem wszerz bez użycia kodu gry
+def naive_distances(grid, width, start):
+    distances = {start: 0}
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for i in frontier:
+            for n in open_neighbours(grid, width, i):
+                if n not in distances:
+                    distances[n] = distances[i] + 1
+                    next_frontier.append(n)
+        frontier = next_frontier
+    return distances
+
+
+@pytest.mark.parametrize('algorithm', sorted(gry.MAZE_ALGORITHMS))
+def test_maze_distances_match_breadth_first_search(algorithm):
+    width, height = 21, 15
+    grid = gry.generate_labyrinth_grid(width, height, algorithm)
+    expected = naive_distances(grid, width, width + 1)
+    distances = gry.maze_distances(grid, width, width + 1)
+    assert {i: d for i, d in enumerate(distances) if d >= 0} == expected
+
+
+@pytest.mark.parametrize('width, height', [(3, 3), (21, 21), (11, 31)])
+def test_maze_degrees_match_neighbour_count(width, height):
+    grid = gry.generate_labyrinth_grid(width, height)
+    degrees = gry.maze_degrees(grid, width)
+    expected = bytes((0 if cell else 8) + len(open_neighbours(grid, width, i)) for i, cell in enumerate(grid))
+    assert degrees == expected
+
+
+def test_maze_path_follows_open_cells():
+    width = 21
+    grid = gry.generate_labyrinth_grid(width, 21)
+    goal = 19 * width + 19
+    path = gry.maze_path(gry.maze_distances(grid, width, width + 1), width, goal)
+    assert path[0] == width + 1 and path[-1] == goal
+    assert len(path) - 1 == naive_distances(grid, width, width + 1)[goal]
+    for a, b in zip(path, path[1:]):
+        assert b in open_neighbours(grid, width, a)
+
+
+# Korytarz (1, 1) -> (5, 1) z boczną odnogą w dół z komórki (3, 1)
+BRANCHED = bytes([
+    1, 1, 1, 1, 1, 1, 1,
+    1, 0, 0, 0, 0, 0, 1,
+    1, 1, 1, 0, 1, 1, 1,
+    1, 1, 1, 1, 1, 1, 1,
+])
+
+
+def test_analyze_labyrinth_counts_side_branches():
+    stats = gry.analyze_labyrinth(BRANCHED, 7, 8, 12)
+    assert stats.path_length == 4
+    assert stats.dead_ends == 3
+    assert stats.junctions == 1
+    assert stats.branching_factor == pytest.approx(1 / 5)
+    assert stats.difficulty == 5
+
+
+def test_analyze_labyrinth_counts_branch_at_start():
+    # Start w skrzyżowaniu (3, 1): odnogi w lewo i w dół są boczne, bo droga prowadzi w prawo
+    stats = gry.analyze_labyrinth(BRANCHED, 7, 10, 12)
+    assert stats.path_length == 2
+    assert stats.branching_factor == pytest.approx(2 / 3)
+    assert stats.difficulty == 4
+    # Tak samo, gdy skrzyżowanie jest wyjściem
+    assert gry.analyze_labyrinth(BRANCHED, 7, 12, 10).difficulty == 4
+
+
+def test_analyze_labyrinth_corridor_has_no_branches():
+    grid = b''.join(CORRIDOR)
+    stats = gry.analyze_labyrinth(grid, 5, 6, 18)
+    assert stats == gry.LabyrinthStats(4, 2, 0, 0.0, 4)
+
+
+def test_analyze_labyrinth_unreachable_goal():
+    grid = b''.join(CORRIDOR)
+    stats = gry.analyze_labyrinth(grid, 5, 6, 0)
+    assert stats.path_length == -1
+    assert stats.difficulty == -1
+
+
+def test_select_labyrinth_lands_in_band():
+    maze, exit_pos, stats = gry.select_labyrinth(21)
+    low, high = gry.LABYRINTH_DIFFICULTY
+    assert low <= stats.difficulty <= high
+    assert maze[exit_pos[1]][exit_pos[0]] == 0
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_choose_labyrinth_exit_is_reachable_and_far(seed):
+    random.seed(seed)
+    size = 21
+    maze = gry.generate_labyrinth(size, size)
+    grid = b''.join(maze)
+    distances = naive_distances(grid, size, (size // 2) * size + size // 2)
+    exit_pos = gry.choose_labyrinth_exit(maze, size)
+    x, y = exit_pos
+    assert x >= size - 3
+    assert maze[y][x] == 0
+    candidates = [d for i, d in distances.items() if i % size >= size - 3]
+    assert distances[y * size + x] >= min(gry.LABYRINTH_EXIT_DISTANCE, max(candidates))
+
+
+def test_choose_labyrinth_exit_falls_back_to_farthest():
+    # Korytarz wzdłuż środkowego wiersza: wszystkie komórki ostatnich kolumn są bliżej niż min_distance
+    maze = [bytes([1] * 7), bytes([1] * 7), bytes([1] * 7), bytes([1, 1, 1, 0, 0, 0, 0]),
+            bytes([1] * 7), bytes([1] * 7), bytes([1] * 7)]
+    assert gry.choose_labyrinth_exit(maze, 7, min_distance=100) == (6, 3)
+
+
+def test_choose_labyrinth_exit_unreachable():
+    maze = [bytes([1] * 5), bytes([1] * 5), bytes([1, 1, 0, 1, 1]), bytes([1] * 5), bytes([1] * 5)]
+    assert gry.choose_labyrinth_exit(maze, 5) is None
@@ -0,0 +1,197 @@
+import random
+
+import pytest
+
+import gry
+
+pygame = gry.pygame
+
+
+def make_surface(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface.convert_alpha()
+
+
+def tile_position(row, col, offset_x, offset_y):
+    return (offset_x + col * (gry.TILE_SIZE + gry.PADDING), offset_y + row * (gry.TILE_SIZE + gry.PADDING))
+
+
+def make_board():
+    tiles = [make_surface((40, 40), (255, 0, 0, 255)), make_surface((60, 30), (0, 0, 255, 255))]
+    return [[tiles[0], tiles[1]], [tiles[1], tiles[0]]]
+
+
+# Rysowanie kafelek po kafelku, jak przed grupowaniem wywołań w Surface.blits
+def draw_board_per_tile(screen, board, revealed, offset_x, offset_y):
+    for i, row in enumerate(board):
+        for j, tile in enumerate(row):
+            x, y = tile_position(i, j, offset_x, offset_y)
+            pygame.draw.rect(screen, gry.WHITE, (x, y, gry.TILE_SIZE, gry.TILE_SIZE))
+            if revealed[i][j]:
+                tile_rect = tile.get_rect(center=(x + gry.TILE_SIZE // 2, y + gry.TILE_SIZE // 2))
+                screen.blit(tile, tile_rect.topleft)
+            else:
+                pygame.draw.rect(screen, gry.BLACK, (x, y, gry.TILE_SIZE, gry.TILE_SIZE), 2)
+
+
+# Plansza gry z podanymi kafelkami (numery obrazków według kolejności pierwszego wystąpienia);
+# odkryte kafelki są w stanie TILE_REVEALED
+def make_memory_board(board, revealed, offset_x, offset_y):
+    table = []
+    ids = bytearray()
+    for tile in (tile for row in board for tile in row):
+        if tile not in table:
+            table.append(tile)
+        ids.append(table.index(tile))
+    memory_board = gry.MemoryBoard(bytes(ids), table, offset_x, offset_y, gry.render_tile_faces())
+    for index, is_revealed in enumerate(cell for row in revealed for cell in row):
+        if is_revealed:
+            memory_board.reveal(index)
+    return memory_board
+
+
+def test_draw_board_matches_per_tile_drawing(screen):
+    board = make_board()
+    revealed = [[True, False], [False, True]]
+    screen.fill(gry.GREEN)
+    draw_board_per_tile(screen, board, revealed, 20, 30)
+    expected = pygame.image.tostring(screen, 'RGB')
+
+    screen.fill(gry.GREEN)
+    gry.draw_board(screen, make_memory_board(board, revealed, 20, 30))
+    assert pygame.image.tostring(screen, 'RGB') == expected
+
+
+def test_draw_dirty_tiles_repaints_only_changed_tiles(screen):
+    board = make_board()
+    offset_x, offset_y = 20, 30
+    memory_board = make_memory_board(board, [[False, True], [True, False]], offset_x, offset_y)
+    screen.fill(gry.GREEN)
+
+    rects = gry.draw_dirty_tiles(screen, memory_board, [1, 2])
+
+    expected = [pygame.Rect(tile_position(row, col, offset_x, offset_y), (gry.TILE_SIZE, gry.TILE_SIZE))
+                for row, col in [(0, 1), (1, 0)]]
+    assert rects == expected
+    # Odkryty kafelek: obrazek na środku białego tła
+    assert screen.get_at(expected[0].center) == (0, 0, 255, 255)
+    assert screen.get_at(expected[0].move(2, 2).topleft) == gry.WHITE
+    # Kafelki spoza listy i tło poza prostokątami nie są rysowane
+    for row, col in [(0, 0), (1, 1)]:
+        x, y = tile_position(row, col, offset_x, offset_y)
+        assert screen.get_at((x + gry.TILE_SIZE // 2, y + gry.TILE_SIZE // 2)) == gry.GREEN
+    assert screen.get_at((0, 0)) == gry.GREEN
+
+
+def test_draw_dirty_tiles_hidden_tile_has_border(screen):
+    memory_board = make_memory_board([[make_surface((40, 40), (255, 0, 0, 255))]], [[False]], 0, 0)
+    screen.fill(gry.GREEN)
+    rect, = gry.draw_dirty_tiles(screen, memory_board, [0])
+    assert screen.get_at(rect.topleft) == gry.BLACK
+    assert screen.get_at(rect.center) == gry.WHITE
+
+
+def test_memory_board_index_at():
+    memory_board = make_memory_board(make_board(), [[False, False], [False, False]], 20, 30)
+    step = gry.TILE_SIZE + gry.PADDING
+    assert memory_board.index_at((20, 30)) == 0
+    assert memory_board.index_at((20 + step, 30)) == 1
+    assert memory_board.index_at((20 + step + gry.TILE_SIZE - 1, 30 + step + gry.TILE_SIZE - 1)) == 3
+    assert memory_board.index_at((19, 30)) == -1
+    assert memory_board.index_at((20, 30 + 2 * step)) == -1
+
+
+def test_memory_board_is_solved_after_all_pairs():
+    memory_board = make_memory_board(make_board(), [[False, False], [False, False]], 0, 0)
+    assert memory_board.pairs == 2
+    assert not memory_board.is_solved()
+    memory_board.reveal(0)
+    memory_board.reveal(3)
+    memory_board.match(0, 3)
+    assert memory_board.states[0] == memory_board.states[3] == gry.TILE_MATCHED
+    assert not memory_board.is_solved()
+    memory_board.reveal(1)
+    memory_board.hide(1)
+    assert memory_board.states[1] == gry.TILE_HIDDEN
+    memory_board.match(1, 2)
+    assert memory_board.is_solved()
+
+
+def test_create_board_is_valid():
+    images = {str(i): None for i in range(32)}
+    for _ in range(20):
+        board = gry.create_board(8, images)
+        assert gry.validate_board(board, len(images)) == 8
+
+
+def test_create_board_needs_enough_images():
+    with pytest.raises(ValueError):
+        gry.create_board(4, {str(i): None for i in range(7)})
+    # Plansza 24x24 potrzebuje 288 różnych obrazków, a numery mieszczą się w bajcie
+    with pytest.raises(ValueError):
+        gry.create_board(24, {str(i): None for i in range(1000)})
+
+
+def test_create_board_from_large_image_set():
+    # Numery obrazków są bajtami, ale katalog może mieć więcej niż 256 obrazów
+    images = {str(i): None for i in range(300)}
+    for _ in range(20):
+        board = gry.create_board(8, images)
+        assert gry.validate_board(board, len(images)) == 8
+        assert max(board) < gry.BOARD_IMAGES
+
+
+@pytest.mark.parametrize('size, num_images', [(2, 2), (4, 8), (4, 20), (8, 32), (8, 256), (8, 1000)])
+def test_generate_boards_are_valid(size, num_images):
+    boards = list(gry.generate_boards(200, size, num_images, random.Random(size * num_images)))
+    assert len(boards) == 200
+    for board in boards:
+        assert gry.validate_board(board, num_images) == size
+    # Plansze są losowe, a nie jedną planszą powtórzoną wiele razy
+    assert len(set(boards)) > 1
+
+
+def test_generate_boards_is_reproducible_from_seed():
+    first = list(gry.generate_boards(10, 4, 20, random.Random(5)))
+    second = list(gry.generate_boards(10, 4, 20, random.Random(5)))
+    assert first == second
+
+
+def test_generate_boards_uses_every_image_pair():
+    # Przy pełnym wykorzystaniu obrazów każda plansza jest permutacją par wszystkich numerów
+    for board in gry.generate_boards(50, 4, 8, random.Random(1)):
+        assert sorted(board) == sorted(bytes(range(8)) * 2)
+
+
+@pytest.mark.parametrize('board, num_images', [
+    (bytes([0, 0, 1]), 2),  # nie jest kwadratem
+    (bytes([0] * 9), 1),  # nieparzysta liczba kafelków
+    (bytes([0, 0, 1, 2]), 3),  # obrazek bez pary
+    (bytes([0, 0, 0, 0]), 1),  # obrazek cztery razy
+    (bytes([0, 0, 5, 5]), 5),  # nieznany numer obrazka
+])
+def test_validate_board_rejects(board, num_images):
+    with pytest.raises(ValueError):
+        gry.validate_board(board, num_images)
+
+
+def test_board_serialization_round_trip():
+    board = next(gry.generate_boards(1, 8, 40, random.Random(2)))
+    data = gry.serialize_board(board)
+    assert len(data) == gry.BOARD_HEADER.size + 64
+    assert gry.deserialize_board(data, 40) == board
+    with pytest.raises(ValueError):
+        gry.deserialize_board(data[:-1], 40)
+    with pytest.raises(ValueError):
+        gry.deserialize_board(b'XXXX' + data[4:], 40)
+    with pytest.raises(ValueError):
+        gry.deserialize_board(data, 10)
+
+
+def test_memory_board_compares_image_ids():
+    # Dwa różne obiekty Surface o tym samym numerze obrazka są parą
+    first, second = make_surface((40, 40), (255, 0, 0, 255)), make_surface((40, 40), (255, 0, 0, 255))
+    memory_board = gry.MemoryBoard(bytes([0, 1, 1, 0]), [first, second], 0, 0, gry.render_tile_faces())
+    assert memory_board.tiles[0] == memory_board.tiles[3]
+    assert memory_board.tiles[0] != memory_board.tiles[1]
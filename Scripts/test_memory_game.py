@@ -0,0 +1,101 @@
+import pytest
+
+import gry
+
+pygame = gry.pygame
+
+
+def make_surface(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface.convert_alpha()
+
+
+# Zdarzenie kliknięcia środka kafelka planszy board_size x board_size i prostokąt tego kafelka
+def click(board_size, index):
+    step = gry.TILE_SIZE + gry.PADDING
+    board_width = board_size * step - gry.PADDING
+    offset_x = (gry.WINDOW_WIDTH - board_width) // 2
+    offset_y = (gry.WINDOW_HEIGHT - board_width) // 2
+    row, col = divmod(index, board_size)
+    rect = pygame.Rect(offset_x + col * step, offset_y + row * step, gry.TILE_SIZE, gry.TILE_SIZE)
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=rect.center, button=1), tuple(rect)
+
+
+# Rozegraj grę w zapamiętywanie na planszy 2x2 (obrazek A na kafelkach 0 i 3, B na 1 i 2)
+# ze skryptem zdarzeń; każda klatka przesuwa zegar gry o 300 ms.
+# Zwraca wynik memory_game i listę odświeżeń ekranu: 'flip' albo zbiór prostokątów z pygame.display.update.
+def play_memory_game(monkeypatch, script, log=None, board_ids=None):
+    tile_a = make_surface((40, 40), (255, 0, 0, 255))
+    tile_b = make_surface((40, 40), (0, 0, 255, 255))
+    monkeypatch.setattr(gry, 'create_board', lambda *args: bytes([0, 1, 1, 0]))
+
+    clock = [0]
+    frames = list(script)
+    finish, _ = click(2, 0)
+
+    def get_events(*args, **kwargs):
+        clock[0] += 300
+        return frames.pop(0) if frames else [finish]
+
+    presented = []
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: clock[0])
+    monkeypatch.setattr(gry.frame_scheduler, 'time_source', lambda: clock[0])
+    monkeypatch.setattr(pygame.event, 'get', get_events)
+    monkeypatch.setattr(pygame.event, 'wait', lambda *args: finish)
+    monkeypatch.setattr(pygame.display, 'flip', lambda: presented.append('flip'))
+    monkeypatch.setattr(pygame.display, 'update', lambda rects: presented.append({tuple(rect) for rect in rects}))
+
+    background = pygame.Surface((gry.WINDOW_WIDTH, gry.WINDOW_HEIGHT))
+    started = gry.memory_game(pygame.display.get_surface(), 2, {'a': tile_a, 'b': tile_b}, background, background, seed=5, log=log, board_ids=board_ids)
+    return started, presented
+
+
+def test_memory_game_updates_only_changed_tiles(monkeypatch):
+    events, rects = zip(*(click(2, index) for index in range(4)))
+    started, presented = play_memory_game(monkeypatch, [[events[0]], [events[3]], [], [], [events[1]], [events[2]]])
+    assert started
+    # Pierwsza klatka i ekran z gratulacjami są rysowane w całości, a każde odkrycie kafelka
+    # odświeża tylko jego prostokąt; klatki bez zmian nie odświeżają niczego.
+    # Ostatnie odkrycie kończy grę przed narysowaniem kafelka.
+    assert presented == ['flip', {rects[0]}, {rects[3]}, {rects[1]}, 'flip']
+
+
+def test_memory_game_mismatch_repaints_both_tiles(monkeypatch):
+    events, rects = zip(*(click(2, index) for index in range(4)))
+    script = [[events[0]], [events[1]]] + [[]] * 5 + [[events[0]], [events[3]], [events[1]], [events[2]]]
+    _, presented = play_memory_game(monkeypatch, script)
+    # Po sekundzie oba pomylone kafelki są zakrywane jednym odświeżeniem
+    assert presented == ['flip', {rects[0]}, {rects[1]}, {rects[0], rects[1]}, {rects[0]}, {rects[3]}, {rects[1]}, 'flip']
+
+
+def test_memory_game_records_accepted_presses(monkeypatch):
+    events, rects = zip(*(click(2, index) for index in range(4)))
+    log = gry.GameLog()
+    # Kliknięcie już odkrytego kafelka nie jest zapisywane
+    play_memory_game(monkeypatch, [[events[0]], [events[0]], [events[3]], [events[1]], [events[2]]], log)
+    assert (log.game, log.seed, log.param) == (gry.LOG_MEMORY, 5, 2)
+    assert log.board == bytes([0, 1, 1, 0])
+    assert [(kind, index) for _, kind, index in log.events()] == [(gry.LOG_PRESS, i) for i in (0, 3, 1, 2)]
+    times = [time for time, _, _ in log.events()]
+    assert times == sorted(times)
+
+
+def test_memory_game_plays_given_board(monkeypatch):
+    # Odtwarzana sesja przekazuje planszę z dziennika zamiast losować nową
+    events, rects = zip(*(click(2, index) for index in range(4)))
+    log = gry.GameLog()
+    _, presented = play_memory_game(monkeypatch, [[events[0]], [events[1]], [events[2]], [events[3]]], log, bytes([0, 0, 1, 1]))
+    assert log.board == bytes([0, 0, 1, 1])
+    assert presented == ['flip', {rects[0]}, {rects[1]}, {rects[2]}, 'flip']
+
+
+def test_memory_game_rejects_invalid_board(monkeypatch, capsys):
+    # Plansza z dziennika niepasująca do wczytanych obrazów kończy grę komunikatem, bez zapisu sesji
+    log = gry.GameLog()
+    started, presented = play_memory_game(monkeypatch, [], log, bytes([0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7]))
+    # main zapisuje dziennik tylko po rozpoczętej grze
+    assert started is False
+    assert presented == []
+    assert 'obrazka' in capsys.readouterr().out
+    assert log.game == 0 and not log.records
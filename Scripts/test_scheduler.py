@@ -0,0 +1,53 @@
+import time
+
+import gry
+
+pygame = gry.pygame
+
+
+def test_tick_paces_frames_and_counts_idle_time():
+    scheduler = gry.FrameScheduler(100)
+    start = time.perf_counter()
+    for _ in range(11):
+        scheduler.tick()
+    elapsed = time.perf_counter() - start
+    # Pierwsze tick() tylko zaczyna pomiar; kolejne 10 klatek po 10 ms
+    assert elapsed >= 0.08
+    assert scheduler.idle_ms >= 60
+    # Uśpienie liczy zegar pygame w pełnych milisekundach, a czas całkowity time.perf_counter()
+    assert 0.5 < scheduler.idle_ratio() < 1.1
+
+
+def test_tick_without_limit_does_not_sleep():
+    scheduler = gry.FrameScheduler(0)
+    start = time.perf_counter()
+    for _ in range(100):
+        scheduler.tick()
+    assert time.perf_counter() - start < 0.5
+
+
+def test_wait_events_returns_queued_events():
+    scheduler = gry.FrameScheduler(30)
+    pygame.event.clear()
+    first = pygame.event.Event(pygame.USEREVENT, kod=1)
+    second = pygame.event.Event(pygame.USEREVENT, kod=2)
+    pygame.event.post(first)
+    pygame.event.post(second)
+    events = [event for event in scheduler.wait_events() if event.type == pygame.USEREVENT]
+    assert [event.kod for event in events] == [1, 2]
+
+
+def test_report_format():
+    scheduler = gry.FrameScheduler(30)
+    report = scheduler.report()
+    assert report.startswith("FPS: ")
+    assert report.endswith("%")
+
+
+def test_idle_ratio_after_pygame_quit(monkeypatch):
+    # Po pygame.quit() get_ticks() zwraca 0; raport przy wyjściu nadal podaje sensowny udział bezczynności
+    scheduler = gry.FrameScheduler(100)
+    for _ in range(6):
+        scheduler.tick()
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: 0)
+    assert 0.5 < scheduler.idle_ratio() < 1.1
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+import gry
+
+
+def test_game_random_is_reproducible():
+    seed, rng = gry.game_random(12345)
+    assert seed == 12345
+    assert rng.random() == random.Random(12345).random()
+    seed, _ = gry.game_random()
+    assert 0 <= seed < 1 << 32
+
+
+@pytest.mark.parametrize('seed', [2 ** 40 + 3, -1])
+def test_game_random_reduces_seed_to_32_bits(seed):
+    # Gra i dziennik używają tego samego, zmieszczonego w nagłówku ziarna
+    reduced, rng = gry.game_random(seed)
+    assert reduced == seed % (1 << 32)
+    assert rng.random() == random.Random(reduced).random()
+    log = gry.GameLog()
+    log.start(gry.LOG_LABYRINTH, reduced, 21)
+    assert gry.GameLog.from_bytes(log.to_bytes()).seed == reduced
+
+
+@pytest.mark.parametrize('algorithm', sorted(gry.MAZE_ALGORITHMS))
+def test_maze_is_reproducible_from_seed(algorithm):
+    first = gry.generate_labyrinth_grid(21, 21, algorithm, random.Random(7))
+    second = gry.generate_labyrinth_grid(21, 21, algorithm, random.Random(7))
+    assert first == second
+
+
+def test_labyrinth_selection_is_reproducible_from_seed():
+    first = gry.select_labyrinth(21, rng=gry.game_random(3)[1])
+    second = gry.select_labyrinth(21, rng=gry.game_random(3)[1])
+    assert first == second
+
+
+def test_board_and_pieces_are_reproducible_from_seed():
+    images = {str(i): None for i in range(32)}
+    assert gry.create_board(8, images, random.Random(9)) == gry.create_board(8, images, random.Random(9))
+    shapes = {str(i): i for i in range(10)}
+    first = gry.create_game_pieces(shapes, shapes, 6, random.Random(9))
+    second = gry.create_game_pieces(shapes, shapes, 6, random.Random(9))
+    assert first == second
+
+
+@pytest.mark.parametrize('game, param', [(gry.LOG_MEMORY, 4), (gry.LOG_LABYRINTH, 21), (gry.LOG_SHADOWS, 12)])
+def test_game_log_round_trip(game, param, tmp_path):
+    seed, rng = gry.game_random()
+    board = gry.create_board(param, {str(i): None for i in range(8)}, rng) if game == gry.LOG_MEMORY else b''
+    log = gry.GameLog()
+    log.start(game, seed, param, board)
+    for i in range(50):
+        log.record(rng.choice((gry.LOG_PRESS, gry.LOG_MOVE, gry.LOG_RELEASE)), rng.randrange(gry.LOG_NONE + 1))
+    data = log.to_bytes()
+    board_size = gry.BOARD_HEADER.size + len(board) if board else 0
+    assert len(data) == gry.LOG_HEADER.size + board_size + 50 * gry.LOG_RECORD.size
+
+    loaded = gry.GameLog.from_bytes(data)
+    assert (loaded.game, loaded.seed, loaded.param, loaded.board) == (game, seed, param, board)
+    assert list(loaded.events()) == list(log.events())
+    assert loaded.to_bytes() == data
+
+    path = str(tmp_path / 'sesja' / 'last_session.gryl')
+    assert log.save(path)
+    assert gry.GameLog.load(path).to_bytes() == data
+
+
+def test_game_log_rejects_corrupt_data():
+    log = gry.GameLog()
+    log.start(gry.LOG_LABYRINTH, 1, 21)
+    log.record(gry.LOG_PRESS, 0)
+    data = log.to_bytes()
+    for corrupt in (data[:5], b'XXXX' + data[4:], data[:-1]):
+        with pytest.raises(ValueError):
+            gry.GameLog.from_bytes(corrupt)
+
+
+def test_game_log_rejects_corrupt_board():
+    log = gry.GameLog()
+    log.start(gry.LOG_MEMORY, 1, 2, bytes([0, 1, 1, 0]))
+    data = bytearray(log.to_bytes())
+    data[gry.LOG_HEADER.size + gry.BOARD_HEADER.size] = 1  # obrazek 1 trzy razy
+    with pytest.raises(ValueError):
+        gry.GameLog.from_bytes(bytes(data))
+
+
+def test_game_log_save_error_is_reported(tmp_path, capsys):
+    blocker = tmp_path / 'plik'
+    blocker.write_bytes(b'')
+    assert not gry.GameLog().save(str(blocker / 'last_session.gryl'))
+    assert 'dziennika' in capsys.readouterr().out
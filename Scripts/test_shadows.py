@@ -0,0 +1,165 @@
+import random
+
+import pytest
+
+import gry
+
+pygame = gry.pygame
+
+
+# Wyszukanie liniowe jak w pierwotnej pętli gry: obraz z prawą i dolną krawędzią włącznie
+def naive_hit(positions, piece_size, pos):
+    for i, (x, y) in enumerate(positions):
+        if x <= pos[0] <= x + piece_size and y <= pos[1] <= y + piece_size:
+            return i
+    return None
+
+
+@pytest.mark.parametrize('num_pieces', [4, 8, 12])
+def test_hit_grid_matches_linear_search(num_pieces):
+    piece_size, piece_positions, shadow_positions = gry.shadow_game_layout(num_pieces)
+    rng = random.Random(num_pieces)
+    for positions in (piece_positions, shadow_positions):
+        grid = gry.build_hit_grid(positions, piece_size)
+        points = [(rng.randrange(gry.WINDOW_WIDTH), rng.randrange(gry.WINDOW_HEIGHT)) for _ in range(3000)]
+        # Również punkty na krawędziach i tuż za nimi
+        for x, y in positions:
+            for dx in (-1, 0, piece_size, piece_size + 1):
+                for dy in (-1, 0, piece_size, piece_size + 1):
+                    points.append((x + dx, y + dy))
+        for pos in points:
+            assert grid.hit(pos) == naive_hit(positions, piece_size, pos), pos
+
+
+def test_hit_grid_rect_spanning_buckets():
+    grid = gry.HitGrid(10)
+    grid.insert('duzy', pygame.Rect(5, 5, 30, 30))
+    grid.insert('maly', pygame.Rect(40, 40, 2, 2))
+    assert grid.hit((5, 5)) == 'duzy'
+    assert grid.hit((34, 34)) == 'duzy'
+    assert grid.hit((35, 35)) is None
+    assert grid.hit((41, 41)) == 'maly'
+    assert grid.hit((-5, -5)) is None
+
+
+def make_surface(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface.convert_alpha()
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def test_scaled_image_cache_reuses_scaled_image():
+    image = make_surface((100, 100), (255, 0, 0, 255))
+    cache = gry.ScaledImageCache()
+    scaled = cache.get('a', image, (40, 40))
+    assert scaled.get_size() == (40, 40)
+    assert cache.get('a', image, (40, 40)) is scaled
+    # Inny rozmiar tego samego obrazu jest osobnym wpisem
+    assert cache.get('a', image, (20, 20)).get_size() == (20, 20)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_scaled_image_cache_evicts_least_recently_used():
+    image = make_surface((100, 100), (255, 0, 0, 255))
+    entry_bytes = surface_bytes(gry.ScaledImageCache().get('x', image, (40, 40)))
+    cache = gry.ScaledImageCache(budget_bytes=3 * entry_bytes)
+    first = cache.get('a', image, (40, 40))
+    cache.get('b', image, (40, 40))
+    cache.get('c', image, (40, 40))
+    # Użycie 'a' czyni 'b' najdawniej używanym, więc to ono wypada po dodaniu 'd'
+    assert cache.get('a', image, (40, 40)) is first
+    cache.get('d', image, (40, 40))
+    # Kolejność wpisów: od najdawniej do ostatnio użytego
+    assert list(cache.entries) == [('c', (40, 40)), ('a', (40, 40)), ('d', (40, 40))]
+    assert cache.used_bytes == 3 * entry_bytes
+
+
+def test_scaled_image_cache_keeps_oversized_newest_image():
+    image = make_surface((100, 100), (255, 0, 0, 255))
+    cache = gry.ScaledImageCache(budget_bytes=100)
+    cache.get('a', image, (40, 40))
+    scaled = cache.get('b', image, (50, 50))
+    assert list(cache.entries) == [('b', (50, 50))]
+    assert cache.used_bytes == surface_bytes(scaled)
+
+
+# Kształt testowy: nieprzezroczysty czerwony kwadrat na przezroczystym tle
+def make_shape():
+    shape = pygame.Surface((60, 60), pygame.SRCALPHA)
+    shape.fill((0, 0, 0, 0))
+    shape.fill((200, 30, 30, 255), pygame.Rect(15, 15, 30, 30))
+    return shape.convert_alpha()
+
+
+def test_solid_silhouette_keeps_alpha():
+    shape = make_shape()
+    silhouette = gry.make_silhouette(shape, 'solid')
+    assert silhouette.get_size() == shape.get_size()
+    for pos in [(0, 0), (15, 15), (30, 30), (44, 44), (45, 45)]:
+        assert silhouette.get_at(pos).a == shape.get_at(pos).a
+    assert silhouette.get_at((30, 30)) == (0, 0, 0, 255)
+    # Obraz kształtu nie jest zmieniany
+    assert shape.get_at((30, 30)) == (200, 30, 30, 255)
+
+
+def test_soft_silhouette_blurs_edge():
+    silhouette = gry.make_silhouette(make_shape(), 'soft')
+    assert silhouette.get_size() == (60, 60)
+    assert silhouette.get_at((30, 30)).a > 200
+    assert silhouette.get_at((2, 2)).a == 0
+    # Na krawędzi kształtu przezroczystość zmienia się stopniowo
+    edge = [silhouette.get_at((x, 30)).a for x in range(8, 22)]
+    assert any(0 < alpha < 255 for alpha in edge)
+
+
+def test_outline_silhouette_draws_only_border():
+    silhouette = gry.make_silhouette(make_shape(), 'outline')
+    assert silhouette.get_at((15, 30)) == (0, 0, 0, 255)
+    assert silhouette.get_at((30, 30)).a == 0
+    assert silhouette.get_at((2, 2)).a == 0
+
+
+def test_outline_of_empty_shape_is_empty():
+    empty = pygame.Surface((10, 10), pygame.SRCALPHA)
+    empty.fill((0, 0, 0, 0))
+    silhouette = gry.make_silhouette(empty, 'outline')
+    assert pygame.mask.from_surface(silhouette).count() == 0
+
+
+def test_unknown_silhouette_style():
+    with pytest.raises(ValueError):
+        gry.make_silhouette(make_shape(), 'kolorowy')
+
+
+def test_make_shadow_images_for_every_shape():
+    shapes = {'a': make_shape(), 'b': make_shape()}
+    shadows = gry.make_shadow_images(shapes)
+    assert sorted(shadows) == ['a', 'b']
+    assert shadows['a'].get_at((30, 30)) == (0, 0, 0, 255)
+
+
+def test_solid_shadow_images_match_per_shape_silhouettes():
+    # Kształty z atlasu i spoza niego; cienie 'solid' są wycinkami zaczernionych stron atlasu
+    shapes = gry.TextureAtlas({'a': make_shape(), 'b': make_surface((20, 50), (10, 200, 90, 128))}).images
+    shapes['c'] = make_surface((35, 35), (90, 90, 250, 255))
+    shadows = gry.make_shadow_images(shapes)
+    for name, shape in shapes.items():
+        expected = gry.make_silhouette(shape)
+        assert shadows[name].get_size() == shape.get_size()
+        assert shadows[name].get_parent() is not None
+        assert pygame.image.tostring(shadows[name], 'RGBA') == pygame.image.tostring(expected, 'RGBA')
+    # Kształty w atlasie nie są zaczerniane
+    assert shapes['a'].get_at((30, 30)) == (200, 30, 30, 255)
+    # Cienie kształtów z jednej strony atlasu leżą na jednej stronie cieni
+    assert shadows['a'].get_parent() is shadows['b'].get_parent()
+
+
+@pytest.mark.parametrize('style', gry.SILHOUETTE_STYLES)
+def test_shadow_images_are_atlas_regions(style):
+    shadows = gry.make_shadow_images({'a': make_shape(), 'b': make_shape()}, style)
+    for shadow in shadows.values():
+        assert gry.blit_item(shadow, (0, 0))[0] is shadow.get_parent()
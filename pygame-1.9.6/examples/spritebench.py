@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+""" pygame.examples.spritebench
+
+Timings for the pygame.sprite module with thousands of sprites.
+
+Nothing is shown on screen; the sprites are drawn to plain Surfaces, so
+this runs without a display too. Pass the names of the benchmarks to run,
+or nothing to run them all:
+
+    python -m pygame.examples.spritebench [dirty] [collide] [particles] [memory]
+                                          [layers]
+
+dirty
+    Merging the dirty rects of 1000, 5000 and 20000 moving sprites, once
+    on a crowded 800x600 screen and once spread over a 4000x4000 surface.
+    Compares the old collidelist() merging with pygame.sprite.DirtyRegion
+    and times a full LayeredDirty.draw() in dirty rect mode.
+
+collide
+    groupcollide() of 1000, 5000 and 20000 moving 12px sprites against as
+    many others on a 4000x4000 area, with a plain Group and with a
+    pygame.sprite.SpatialGroup as groupb, and the SpatialGroup.refresh()
+    after all of them moved.
+
+particles
+    Moving, bouncing and drawing 10000 and 50000 particles per frame, as
+    Sprites with an update() method in a Group and as rows of a
+    pygame.sprite.ArrayGroup (needs numpy).
+
+memory
+    Bytes per sprite for 100000 sprites with a rect of their own in a
+    group, before and after the first draw, for Sprite in a Group and
+    SlotSprite in a SlotGroup, and the time to draw and clear them all
+    (needs tracemalloc, Python 3.4 or newer).
+
+layers
+    LayeredUpdates with 10000 sprites across 100 layers: adding them all,
+    10000 change_layer() and 1000 move_to_front() calls, reading every
+    layer with get_sprites_from_layer(), and removing them all again.
+"""
+
+import sys
+import random
+from timeit import default_timer
+
+import pygame
+from pygame import Rect
+
+
+SIZES = (1000, 5000, 20000)
+
+
+def timed(function, repeat=3):
+    """ best wall clock time of a few calls, in milliseconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        function()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000.0
+
+
+def merge_collidelist(rects, clip):
+    """ the dirty rect merging LayeredDirty.draw() did before DirtyRegion
+    """
+    update = []
+    for rect in rects:
+        union = Rect(rect)
+        i = union.collidelist(update)
+        while -1 < i:
+            union.union_ip(update[i])
+            del update[i]
+            i = union.collidelist(update)
+        update.append(union.clip(clip))
+    return update
+
+
+def merge_region(rects, clip, merge_waste=0.0):
+    region = pygame.sprite.DirtyRegion(clip, merge_waste=merge_waste)
+    for rect in rects:
+        region.add(rect)
+    return region.rects()
+
+
+def moving_sprite_rects(count, area, size, rng):
+    """ the old and the new rect of count sprites that moved a few pixels
+    """
+    rects = []
+    for _ in range(count):
+        rect = Rect(rng.randrange(area.w - size), rng.randrange(area.h - size),
+                    size, size)
+        rects.append(rect)
+        rects.append(rect.move(rng.randint(-3, 3), rng.randint(-3, 3)))
+    return rects
+
+
+def dirty_group(count, area, size, rng):
+    image = pygame.Surface((size, size))
+    image.fill((255, 0, 0))
+    group = pygame.sprite.LayeredDirty(_time_threshold=1e9)
+    for _ in range(count):
+        sprite = pygame.sprite.DirtySprite(group)
+        sprite.image = image
+        sprite.rect = Rect(rng.randrange(area.w - size),
+                           rng.randrange(area.h - size), size, size)
+        sprite.dirty = 2
+    return group
+
+
+def bench_dirty():
+    rng = random.Random(1)
+    scenes = (("crowded 800x600, 16px", Rect(0, 0, 800, 600), 16),
+              ("sparse 4000x4000, 8px", Rect(0, 0, 4000, 4000), 8))
+    print("dirty rect merging (ms, rects after merging)")
+    for name, area, size in scenes:
+        print("  %s" % name)
+        surface = pygame.Surface(area.size)
+        background = pygame.Surface(area.size)
+        for count in SIZES:
+            rects = moving_sprite_rects(count, area, size, rng)
+            columns = []
+            for label, merge in (("collidelist", merge_collidelist),
+                                 ("DirtyRegion", merge_region)):
+                merged = merge(rects, area)
+                columns.append("%s %8.1f ms %6d" %
+                               (label, timed(lambda: merge(rects, area)),
+                                len(merged)))
+            wasteful = merge_region(rects, area, 0.25)
+            columns.append("waste 0.25 %6d" % len(wasteful))
+
+            group = dirty_group(count, area, size, rng)
+            group.draw(surface, background)
+
+            def draw():
+                group._use_update = True
+                group.draw(surface)
+
+            columns.append("draw %8.1f ms" % timed(draw))
+            print("    %6d sprites: %s" % (count, " | ".join(columns)))
+
+
+def collide_sprites(count, area, size, rng):
+    sprites = []
+    for _ in range(count):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = Rect(rng.randrange(area.w - size),
+                           rng.randrange(area.h - size), size, size)
+        sprites.append(sprite)
+    return sprites
+
+
+def bench_collide():
+    rng = random.Random(2)
+    area = Rect(0, 0, 4000, 4000)
+    print("groupcollide on 4000x4000, 12px (ms, colliding sprites)")
+    for count in SIZES:
+        groupa = pygame.sprite.Group(collide_sprites(count, area, 12, rng))
+        targets = collide_sprites(count, area, 12, rng)
+        spatial = pygame.sprite.SpatialGroup(targets, cell_size=32)
+        columns = []
+        if count <= 5000:
+            plain = pygame.sprite.Group(targets)
+            hits = pygame.sprite.groupcollide(groupa, plain, False, False)
+            columns.append("Group %9.1f ms %5d" % (
+                timed(lambda: pygame.sprite.groupcollide(
+                    groupa, plain, False, False), repeat=1), len(hits)))
+        else:
+            columns.append("Group %9s    %5s" % ("-", "-"))
+        hits = pygame.sprite.groupcollide(groupa, spatial, False, False)
+        columns.append("SpatialGroup %7.1f ms %5d" % (
+            timed(lambda: pygame.sprite.groupcollide(
+                groupa, spatial, False, False)), len(hits)))
+
+        def move_and_refresh():
+            for sprite in targets:
+                sprite.rect.move_ip(rng.randint(-3, 3), rng.randint(-3, 3))
+            start = default_timer()
+            spatial.refresh()
+            return default_timer() - start
+
+        refresh = min(move_and_refresh() for _ in range(3)) * 1000.0
+        columns.append("refresh %6.1f ms" % refresh)
+        print("    %6d sprites: %s" % (count, " | ".join(columns)))
+
+
+class Particle(pygame.sprite.Sprite):
+    def __init__(self, image, position, velocity, area):
+        pygame.sprite.Sprite.__init__(self)
+        self.image = image
+        self.rect = image.get_rect(topleft=position)
+        self.velocity = list(velocity)
+        self.area = area
+
+    def update(self):
+        rect = self.rect
+        velocity = self.velocity
+        rect.move_ip(velocity)
+        if rect.left < self.area.left or rect.right > self.area.right:
+            velocity[0] = -velocity[0]
+        if rect.top < self.area.top or rect.bottom > self.area.bottom:
+            velocity[1] = -velocity[1]
+
+
+def bench_particles():
+    try:
+        import numpy
+    except ImportError:
+        print("particles: needs numpy")
+        return
+    rng = random.Random(4)
+    area = Rect(0, 0, 800, 600)
+    surface = pygame.Surface(area.size)
+    images = []
+    for color in ((255, 0, 0), (0, 255, 0), (0, 0, 255)):
+        image = pygame.Surface((3, 3))
+        image.fill(color)
+        images.append(image)
+    print("particles on 800x600, 3px (ms per frame)")
+    for count in (10000, 50000):
+        positions = [(rng.randrange(797), rng.randrange(597))
+                     for _ in range(count)]
+        velocities = [(rng.randint(-3, 3), rng.randint(-3, 3))
+                      for _ in range(count)]
+        ids = [rng.randrange(len(images)) for _ in range(count)]
+
+        group = pygame.sprite.Group(
+            [Particle(images[i], p, v, area)
+             for i, p, v in zip(ids, positions, velocities)])
+        array_group = pygame.sprite.ArrayGroup(images)
+        array_group.add_array(positions, velocities, ids)
+
+        def array_update():
+            array_group.update()
+            array_group.bounce(area)
+
+        columns = []
+        for label, update, draw in (
+                ("Group", group.update, lambda: group.draw(surface)),
+                ("ArrayGroup", array_update,
+                 lambda: array_group.draw(surface))):
+            columns.append("%s update %6.1f draw %6.1f" %
+                           (label, timed(update), timed(draw)))
+        print("    %6d particles: %s" % (count, " | ".join(columns)))
+
+
+def bench_memory():
+    try:
+        import tracemalloc
+    except ImportError:
+        print("memory: needs tracemalloc")
+        return
+    import gc
+    count = 100000
+    image = pygame.Surface((2, 2))
+    surface = pygame.Surface((800, 600))
+    background = pygame.Surface((800, 600))
+    print("%d sprites (bytes per sprite, ms)" % count)
+    for label, sprite_class, group_class in (
+            ("Sprite in Group", pygame.sprite.Sprite, pygame.sprite.Group),
+            ("SlotSprite in Group", pygame.sprite.SlotSprite,
+             pygame.sprite.Group),
+            ("SlotSprite in SlotGroup", pygame.sprite.SlotSprite,
+             pygame.sprite.SlotGroup)):
+        gc.collect()
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        group = group_class()
+        for i in range(count):
+            sprite = sprite_class(group)
+            sprite.image = image
+            sprite.rect = Rect(i % 797, i % 599, 2, 2)
+        created = tracemalloc.get_traced_memory()[0]
+        group.draw(surface)
+        drawn = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("    %-24s %5.0f | drawn %5.0f | draw %6.1f ms | clear %6.1f ms" %
+              (label, float(created - start) / count,
+               float(drawn - start) / count,
+               timed(lambda: group.draw(surface)),
+               timed(lambda: group.clear(surface, background))))
+        del group, sprite
+
+
+def bench_layers():
+    rng = random.Random(5)
+    count = 10000
+    sprites = [pygame.sprite.Sprite() for _ in range(count)]
+    layers = [rng.randrange(100) for _ in range(count)]
+    moves = [(rng.choice(sprites), rng.randrange(100)) for _ in range(count)]
+    fronts = [rng.choice(sprites) for _ in range(1000)]
+    group = pygame.sprite.LayeredUpdates()
+
+    def add():
+        for sprite, layer in zip(sprites, layers):
+            group.add(sprite, layer=layer)
+
+    def change():
+        for sprite, layer in moves:
+            group.change_layer(sprite, layer)
+
+    def to_front():
+        for sprite in fronts:
+            group.move_to_front(sprite)
+
+    def read():
+        for layer in range(100):
+            group.get_sprites_from_layer(layer)
+
+    print("LayeredUpdates, %d sprites in 100 layers (ms)" % count)
+    columns = []
+    for label, function in (("add", add), ("change_layer", change),
+                            ("move_to_front", to_front),
+                            ("get_sprites_from_layer", read),
+                            ("remove", group.empty)):
+        columns.append("%s %7.1f" % (label, timed(function, repeat=1)))
+    print("    " + " | ".join(columns))
+
+
+BENCHMARKS = [("dirty", bench_dirty),
+              ("collide", bench_collide),
+              ("particles", bench_particles),
+              ("memory", bench_memory),
+              ("layers", bench_layers)]
+
+
+def main(names=None):
+    pygame.init()
+    known = dict(BENCHMARKS)
+    names = names or [name for name, _ in BENCHMARKS]
+    for name in names:
+        if name not in known:
+            print("unknown benchmark %r, choose from: %s" %
+                  (name, ", ".join(known)))
+            return
+    for name in names:
+        known[name]()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -89,7 +89,9 @@ Sprites are not thread safe, so lock them yourself if using threads.
 import pygame
 from pygame import Rect
 from pygame.time import get_ticks
-from operator import truth
+from operator import truth, itemgetter, attrgetter
+from itertools import chain, repeat
+from bisect import bisect_left, insort
 
 # Python 3 does not have the callable function, but an equivalent can be made
 # with the hasattr function.
@@ -102,6 +104,17 @@ try:
 except:
     pass
 
+# numpy is optional and slow to import, so it is only loaded when an
+# ArrayGroup is made. Without numpy that raises ImportError.
+_numpy = None
+
+def _get_numpy():
+    global _numpy
+    if _numpy is None:
+        import numpy
+        _numpy = numpy
+    return _numpy
+
 
 class Sprite(object):
     """simple base class for visible game objects
@@ -282,6 +295,117 @@ class DirtySprite(Sprite):
             (self.__class__.__name__, len(self.groups()))
 
 
+class SlotSprite(object):
+    """Sprite without an instance dict, for games with very many sprites
+
+    pygame.sprite.SlotSprite(*groups): return SlotSprite
+
+    Works like Sprite and can be used with all the groups except LayeredDirty
+    and with the collision functions, but it uses __slots__: it only has room
+    for image, rect, _layer and the groups it is in. Sprite keeps a dict
+    of its groups; SlotSprite keeps a tuple, as most sprites are in one or
+    two groups. Together this takes about half the memory of a Sprite: with
+    a rect of its own in one group, 212 instead of 412 bytes per sprite on
+    CPython 3.11 (examples/spritebench.py memory).
+
+    Subclasses must declare __slots__ for their own attributes too, or they
+    get an instance dict again:
+
+        class Bullet(SlotSprite):
+            __slots__ = ('velocity',)
+
+    """
+
+    __slots__ = ('image', 'rect', '_layer', '_groups', '__weakref__')
+
+    def __init__(self, *groups):
+        self._groups = () # The groups the sprite is in
+        if groups:
+            self.add(*groups)
+
+    def add(self, *groups):
+        """add the sprite to groups
+
+        SlotSprite.add(*groups): return None
+
+        Any number of Group instances can be passed as arguments. The
+        Sprite will be added to the Groups it is not already a member of.
+
+        """
+        for group in groups:
+            if hasattr(group, '_spritegroup'):
+                if group not in self._groups:
+                    group.add_internal(self)
+                    self.add_internal(group)
+            else:
+                self.add(*group)
+
+    def remove(self, *groups):
+        """remove the sprite from groups
+
+        SlotSprite.remove(*groups): return None
+
+        Any number of Group instances can be passed as arguments. The Sprite
+        will be removed from the Groups it is currently a member of.
+
+        """
+        for group in groups:
+            if hasattr(group, '_spritegroup'):
+                if group in self._groups:
+                    group.remove_internal(self)
+                    self.remove_internal(group)
+            else:
+                self.remove(*group)
+
+    def add_internal(self, group):
+        self._groups += (group,)
+
+    def remove_internal(self, group):
+        groups = self._groups
+        i = groups.index(group)
+        self._groups = groups[:i] + groups[i + 1:]
+
+    def update(self, *args):
+        """method to control sprite behavior
+
+        SlotSprite.update(*args):
+
+        Does nothing, like Sprite.update().
+
+        """
+        pass
+
+    def kill(self):
+        """remove the Sprite from all Groups
+
+        SlotSprite.kill(): return None
+
+        """
+        for c in self._groups:
+            c.remove_internal(self)
+        self._groups = ()
+
+    def groups(self):
+        """list of Groups that contain this Sprite
+
+        SlotSprite.groups(): return group_list
+
+        """
+        return list(self._groups)
+
+    def alive(self):
+        """does the sprite belong to any groups
+
+        SlotSprite.alive(): return bool
+
+        """
+        return truth(self._groups)
+
+    def __repr__(self):
+        return "<%s sprite(in %d groups)>" % (self.__class__.__name__,
+                                              len(self._groups))
+
+
 class AbstractGroup(object):
     """base class for containers of sprites
 
@@ -355,7 +479,7 @@ class AbstractGroup(object):
             # It's possible that some sprite is also an iterator.
             # If this is the case, we should add the sprite itself,
             # and not the iterator object.
-            if isinstance(sprite, Sprite):
+            if isinstance(sprite, (Sprite, SlotSprite)):
                 if not self.has_internal(sprite):
                     self.add_internal(sprite)
                     sprite.add_internal(self)
@@ -393,7 +517,7 @@ class AbstractGroup(object):
         # old-style sprite group. Lastly, if that fails, it assumes that the
         # normal Sprite methods should be used.
         for sprite in sprites:
-            if isinstance(sprite, Sprite):
+            if isinstance(sprite, (Sprite, SlotSprite)):
                 if self.has_internal(sprite):
                     self.remove_internal(sprite)
                     sprite.remove_internal(self)
@@ -423,7 +547,7 @@ class AbstractGroup(object):
         return_value = False
 
         for sprite in sprites:
-            if isinstance(sprite, Sprite):
+            if isinstance(sprite, (Sprite, SlotSprite)):
                 # Check for Sprite instance's membership in this group
                 if self.has_internal(sprite):
                     return_value = True
@@ -611,6 +735,173 @@ class OrderedUpdates(RenderUpdates):
         self._spritelist.remove(sprite)
 
 
+class SpatialGroup(Group):
+    """Group that sorts the sprite rects into a grid for fast collision tests
+
+    pygame.sprite.SpatialGroup(*sprites, **kwargs): return SpatialGroup
+
+    The rects of the sprites are kept in a spatial hash, a uniform grid of
+    cell_size pixels. When a SpatialGroup is the group passed to
+    spritecollide() and spritecollideany(), or groupb of groupcollide(),
+    only the sprites in the grid cells covered by the tested rect are
+    checked instead of every sprite in the group. groupcollide() of groups
+    with n and m sprites then takes time near n + m instead of n * m. The
+    collisions found are the same, in the same order.
+
+    The sprites can move freely. Before a lookup the rect every sprite was
+    placed with is compared to its current rect, and only the sprites that
+    moved are placed again. This check runs once per groupcollide() call
+    and once per spritecollide() or spritecollideany() call, so a single
+    lookup costs about as much as with a plain Group; the gain is in
+    groupcollide().
+
+    The collided callbacks are only called for sprites whose rects share a
+    grid cell. Callbacks that find collisions outside of the rects, like
+    collide_circle() or collide_rect_ratio() with a ratio above 1, need a
+    margin: sprites up to margin pixels apart are tested too.
+
+    You can specify some additional attributes through kwargs:
+        cell_size: width and height of the grid cells in pixels; a bit larger
+            than most sprites works best (default is 64)
+        margin: distance in pixels up to which sprites are passed to the
+            collided callback (default is 0)
+
+    """
+
+    def __init__(self, *sprites, **kwargs):
+        self.cell_size = kwargs.pop('cell_size', 64)
+        self.margin = kwargs.pop('margin', 0)
+        if kwargs:
+            raise TypeError("unexpected keyword arguments: %s" %
+                            ", ".join(kwargs))
+        self._cells = {}
+        self._index = {}
+        self._serial = 0
+        Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite):
+        Group.add_internal(self, sprite)
+        self._serial += 1
+        # entry: [rect when placed in the grid, its cells, order of addition]
+        # sprites often get their rect after joining the group, so they are
+        # placed in the grid on the next lookup
+        self._index[sprite] = [None, None, self._serial]
+
+    def remove_internal(self, sprite):
+        Group.remove_internal(self, sprite)
+        entry = self._index.pop(sprite)
+        if entry[1] is not None:
+            self._unregister(sprite, entry[1])
+
+    def refresh(self):
+        """bring the grid up to date with the sprite rects
+
+        SpatialGroup.refresh(): return None
+
+        Only the sprites whose rect changed since the last refresh are moved
+        in the grid. The collision functions call this themselves.
+
+        """
+        index = self._index
+        # the common case of nothing moved is checked without a Python loop
+        if (list(map(attrgetter('rect'), index)) ==
+                list(map(itemgetter(0), index.values()))):
+            return
+        place = self._place
+        for sprite, entry in index.items():
+            placed = entry[0]
+            if placed is None or placed != sprite.rect:
+                place(sprite, entry)
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        left, top, width, height = rect
+        return (left // size, top // size,
+                (left + max(width, 1) - 1) // size,
+                (top + max(height, 1) - 1) // size)
+
+    def _place(self, sprite, entry):
+        rect = sprite.rect
+        cells = self._cell_range(rect)
+        entry[0] = Rect(rect)
+        if cells == entry[1]:
+            return
+        if entry[1] is not None:
+            self._unregister(sprite, entry[1])
+        buckets = self._cells
+        x0, y0, x1, y1 = cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket is None:
+                    buckets[(cx, cy)] = set([sprite])
+                else:
+                    bucket.add(sprite)
+        entry[1] = cells
+
+    def _unregister(self, sprite, cells):
+        buckets = self._cells
+        x0, y0, x1, y1 = cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets[(cx, cy)]
+                bucket.discard(sprite)
+                if not bucket:
+                    del buckets[(cx, cy)]
+
+    def _candidates(self, rect):
+        # the sprites sharing a grid cell with rect, in order of addition;
+        # the grid must have been refreshed
+        if self.margin:
+            rect = Rect(rect).inflate(2 * self.margin, 2 * self.margin)
+        buckets = self._cells
+        x0, y0, x1, y1 = self._cell_range(rect)
+        if x0 == x1 and y0 == y1:
+            found = buckets.get((x0, y0))
+            if not found:
+                return []
+        else:
+            found = set()
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = buckets.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+        if len(found) == 1:
+            return list(found)
+        index = self._index
+        return sorted(found, key=lambda sprite: index[sprite][2])
+
+
+class SlotGroup(Group):
+    """Group that draws and clears all its sprites with one Surface.blits()
+
+    pygame.sprite.SlotGroup(*sprites): return SlotGroup
+
+    A Group meant for very many sprites, usually SlotSprites, though any
+    sprite works. draw() and clear() hand all the sprites to a single
+    Surface.blits() call instead of calling Surface.blit() once per sprite.
+    Like in a Group, the rect a sprite was last drawn at is kept for
+    clear().
+
+    """
+
+    def draw(self, surface):
+        sprites = self.sprites()
+        rects = surface.blits(zip(map(attrgetter('image'), sprites),
+                                  map(attrgetter('rect'), sprites)))
+        self.spritedict.update(zip(sprites, rects))
+        self.lostsprites = []
+
+    def clear(self, surface, bgd):
+        if callable(bgd):
+            Group.clear(self, surface, bgd)
+        else:
+            rects = list(chain(self.lostsprites,
+                               filter(None, self.spritedict.values())))
+            surface.blits(zip(repeat(bgd), rects, rects), 0)
+
+
 class LayeredUpdates(AbstractGroup):
     """LayeredUpdates Group handles layers, which are drawn like OrderedUpdates
 
@@ -619,6 +910,12 @@ class LayeredUpdates(AbstractGroup):
     This group is fully compatible with pygame.sprite.Sprite.
     New in pygame 1.8.0
 
+    Every layer keeps its own list of sprites in the order they were added,
+    and the layer numbers in use are kept sorted, so adding, removing and
+    changing the layer of a sprite only costs a bisect over the layers and
+    work in the one layer. The ordered list of all sprites is rebuilt from
+    the layers when it is needed after a change.
+
     """
 
     _init_rect = Rect(0, 0, 0, 0)
@@ -637,7 +934,9 @@ class LayeredUpdates(AbstractGroup):
 
         """
         self._spritelayers = {}
-        self._spritelist = []
+        self._layers = [] # sorted layer numbers
+        self._layer_sprites = {} # layer number -> sprites in that layer
+        self._sorted_sprites = []
         AbstractGroup.__init__(self)
         self._default_layer = kwargs.get('default_layer', 0)
 
@@ -659,25 +958,39 @@ class LayeredUpdates(AbstractGroup):
         elif hasattr(sprite, '_layer'):
             sprite._layer = layer
 
-        sprites = self._spritelist # speedup
-        sprites_layers = self._spritelayers
-        sprites_layers[sprite] = layer
-
-        # add the sprite at the right position
-        # bisect algorithmus
-        leng = len(sprites)
-        low = mid = 0
-        high = leng - 1
-        while low <= high:
-            mid = low + (high - low) // 2
-            if sprites_layers[sprites[mid]] <= layer:
-                low = mid + 1
-            else:
-                high = mid - 1
-        # linear search to find final position
-        while mid < leng and sprites_layers[sprites[mid]] <= layer:
-            mid += 1
-        sprites.insert(mid, sprite)
+        self._insert_sprite(sprite, layer)
+
+    def _insert_sprite(self, sprite, layer):
+        # put the sprite at the end of its layer
+        layer_sprites = self._layer_sprites.get(layer)
+        if layer_sprites is None:
+            layer_sprites = self._layer_sprites[layer] = []
+            insort(self._layers, layer)
+        layer_sprites.append(sprite)
+        self._spritelayers[sprite] = layer
+        self._sorted_sprites = None
+
+    def _remove_sprite(self, sprite):
+        layer = self._spritelayers.pop(sprite)
+        layer_sprites = self._layer_sprites[layer]
+        layer_sprites.remove(sprite)
+        if not layer_sprites:
+            del self._layer_sprites[layer]
+            del self._layers[bisect_left(self._layers, layer)]
+        self._sorted_sprites = None
+
+    def _get_spritelist(self):
+        if self._sorted_sprites is None:
+            layer_sprites = self._layer_sprites
+            self._sorted_sprites = list(chain.from_iterable(
+                [layer_sprites[layer] for layer in self._layers]))
+        return self._sorted_sprites
+
+    _spritelist = property(_get_spritelist,
+                           None,
+                           None,
+                           "all sprites, bottom layer first, each layer in "
+                           "the order the sprites were added")
 
     def add(self, *sprites, **kwargs):
         """add a sprite or sequence of sprites to a group
@@ -702,7 +1015,7 @@ class LayeredUpdates(AbstractGroup):
             # It's possible that some sprite is also an iterator.
             # If this is the case, we should add the sprite itself,
             # and not the iterator object.
-            if isinstance(sprite, Sprite):
+            if isinstance(sprite, (Sprite, SlotSprite)):
                 if not self.has_internal(sprite):
                     self.add_internal(sprite, layer)
                     sprite.add_internal(self)
@@ -731,7 +1044,7 @@ class LayeredUpdates(AbstractGroup):
         The group uses it to add a sprite.
 
         """
-        self._spritelist.remove(sprite)
+        self._remove_sprite(sprite)
         # these dirty rects are suboptimal for one frame
         r = self.spritedict[sprite]
         if r is not self._init_rect:
@@ -740,7 +1053,6 @@ class LayeredUpdates(AbstractGroup):
             self.lostsprites.append(sprite.rect) # dirty rect
 
         del self.spritedict[sprite]
-        del self._spritelayers[sprite]
 
     def sprites(self):
         """return a ordered list of sprites (first back, last top).
@@ -817,7 +1129,7 @@ class LayeredUpdates(AbstractGroup):
         LayeredUpdates.layers(): return layers
 
         """
-        return sorted(set(self._spritelayers.values()))
+        return list(self._layers)
 
     def change_layer(self, sprite, new_layer):
         """change the layer of the sprite
@@ -828,33 +1140,11 @@ class LayeredUpdates(AbstractGroup):
         checked.
 
         """
-        sprites = self._spritelist # speedup
-        sprites_layers = self._spritelayers # speedup
-
-        sprites.remove(sprite)
-        sprites_layers.pop(sprite)
-
-        # add the sprite at the right position
-        # bisect algorithmus
-        leng = len(sprites)
-        low = mid = 0
-        high = leng - 1
-        while low <= high:
-            mid = low + (high - low) // 2
-            if sprites_layers[sprites[mid]] <= new_layer:
-                low = mid + 1
-            else:
-                high = mid - 1
-        # linear search to find final position
-        while mid < leng and sprites_layers[sprites[mid]] <= new_layer:
-            mid += 1
-        sprites.insert(mid, sprite)
+        self._remove_sprite(sprite)
+        self._insert_sprite(sprite, new_layer)
         if hasattr(sprite, 'layer'):
             sprite.layer = new_layer
 
-        # add layer info
-        sprites_layers[sprite] = new_layer
-
     def get_layer_of_sprite(self, sprite):
         """return the layer that sprite is currently in
 
@@ -869,7 +1159,7 @@ class LayeredUpdates(AbstractGroup):
         LayeredUpdates.get_top_layer(): return layer
 
         """
-        return self._spritelayers[self._spritelist[-1]]
+        return self._layers[-1]
 
     def get_bottom_layer(self):
         """return the bottom layer
@@ -877,7 +1167,7 @@ class LayeredUpdates(AbstractGroup):
         LayeredUpdates.get_bottom_layer(): return layer
 
         """
-        return self._spritelayers[self._spritelist[0]]
+        return self._layers[0]
 
     def move_to_front(self, sprite):
         """bring the sprite to front layer
@@ -908,7 +1198,7 @@ class LayeredUpdates(AbstractGroup):
         LayeredUpdates.get_top_sprite(): return Sprite
 
         """
-        return self._spritelist[-1]
+        return self._layer_sprites[self._layers[-1]][-1]
 
     def get_sprites_from_layer(self, layer):
         """return all sprites from a layer ordered as they where added
@@ -920,16 +1210,7 @@ class LayeredUpdates(AbstractGroup):
         layer.
 
         """
-        sprites = []
-        sprites_append = sprites.append
-        sprite_layers = self._spritelayers
-        for spr in self._spritelist:
-            if sprite_layers[spr] == layer:
-                sprites_append(spr)
-            elif sprite_layers[spr] > layer:# break after because no other will
-                                            # follow with same layer
-                break
-        return sprites
+        return list(self._layer_sprites.get(layer, ()))
 
     def switch_layer(self, layer1_nr, layer2_nr):
         """switch the sprites from layer1_nr to layer2_nr
@@ -946,6 +1227,241 @@ class LayeredUpdates(AbstractGroup):
         self.add(layer=layer2_nr, *sprites1)
 
 
+class DirtyRegion(object):
+    """accumulates dirty rects, merging the ones that overlap
+
+    pygame.sprite.DirtyRegion(clip, cell_size=64, merge_waste=0.0,
+                              grid_threshold=32): return DirtyRegion
+
+    Every added rect is merged with all the rects it overlaps (and with the
+    ones the merged rect overlaps in turn), so the accumulated rects never
+    overlap each other. They are clipped to the clip rect.
+
+    While there are only a few rects they are kept in a list and merged with
+    Rect.collidelist(). Above grid_threshold rects they are moved into a
+    uniform grid of cell_size pixels, so merging a rect only looks at the
+    rects in the grid cells it covers instead of every rect in the list.
+    This keeps the merging near linear when thousands of small dirty rects
+    are spread over the screen. When merging brings the count back down to
+    half of grid_threshold, the rects go back into a list.
+
+    merge_waste is the merge heuristic: rects that do not overlap are
+    merged too when their bounding rect covers at most merge_waste times
+    the area of the smaller rect in pixels outside both rects (in grid mode
+    only rects sharing a grid cell are considered). The default 0.0 merges
+    only overlapping rects. A higher value gives fewer, larger rects to
+    clear, blit and update, for the price of redrawing some pixels that did
+    not change.
+
+    """
+
+    def __init__(self, clip, cell_size=64, merge_waste=0.0, grid_threshold=32):
+        self.clip = Rect(clip)
+        self.cell_size = cell_size
+        self.merge_waste = merge_waste
+        self.grid_threshold = grid_threshold
+        self._list = []
+        self._buckets = None
+        self._entries = None
+        self._count = 0
+        self._seq = 0
+
+    def __len__(self):
+        if self._buckets is None:
+            return len(self._list)
+        return self._count
+
+    def add(self, rect):
+        """add a dirty rect, merging it with the rects it overlaps
+
+        DirtyRegion.add(rect): return None
+
+        """
+        rects = self._list
+        if rects is not None and not self.merge_waste:
+            # the common case, kept inline as it runs for every dirty sprite
+            rect = Rect(rect)
+            i = rect.collidelist(rects)
+            while -1 < i:
+                rect.union_ip(rects[i])
+                del rects[i]
+                i = rect.collidelist(rects)
+            rects.append(rect.clip(self.clip))
+            if len(rects) > self.grid_threshold:
+                self._build_grid()
+        elif rects is not None:
+            self._add_to_list(Rect(rect))
+            if len(rects) > self.grid_threshold:
+                self._build_grid()
+        else:
+            self._add_to_grid(Rect(rect))
+            if self._count <= self.grid_threshold // 2:
+                self._list = self.rects()
+                self._buckets = None
+                self._entries = None
+
+    def rects(self):
+        """the accumulated rects
+
+        DirtyRegion.rects(): return Rect_list
+
+        The rects are in the order they were last merged, like the list
+        built by LayeredDirty.draw() before the grid was used.
+
+        """
+        if self._buckets is None:
+            return list(self._list)
+        self._entries = [entry for entry in self._entries
+                         if entry[1] is not None]
+        self._entries.sort(key=itemgetter(1))
+        return [entry[0] for entry in self._entries]
+
+    def colliding(self, rect):
+        """the accumulated rects that overlap the given rect
+
+        DirtyRegion.colliding(rect): return Rect_list
+
+        Each rect is returned once.
+
+        """
+        if self._buckets is None:
+            rects = self._list
+            return [rects[i] for i in rect.collidelistall(rects)]
+        size = self.cell_size
+        buckets = self._buckets
+        found = []
+        x0, y0, x1, y1 = self._cells(rect)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for entry in buckets.get((cx, cy), ()):
+                    other = entry[0]
+                    # a rect spanning several cells is reported only from the
+                    # cell holding the top left corner of the intersection
+                    if (entry[1] is not None and rect.colliderect(other) and
+                            max(rect.left, other.left) // size == cx and
+                            max(rect.top, other.top) // size == cy):
+                        found.append(other)
+        return found
+
+    def _mergeable(self, rect, other):
+        union = rect.union(other)
+        area = rect.w * rect.h
+        other_area = other.w * other.h
+        return (union.w * union.h - area - other_area <=
+                self.merge_waste * min(area, other_area))
+
+    def _add_to_list(self, rect):
+        rects = self._list
+        rect_collidelist = rect.collidelist
+        rect_union_ip = rect.union_ip
+        while True:
+            i = rect_collidelist(rects)
+            while -1 < i:
+                rect_union_ip(rects[i])
+                del rects[i]
+                i = rect_collidelist(rects)
+            if not self.merge_waste:
+                break
+            for i, other in enumerate(rects):
+                if self._mergeable(rect, other):
+                    rect_union_ip(other)
+                    del rects[i]
+                    break
+            else:
+                break
+        rects.append(rect.clip(self.clip))
+
+    def _cells(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def _register(self, entry, cells):
+        # add the entry to the cells it did not cover before
+        x0, y0, x1, y1 = cells
+        old_x0, old_y0, old_x1, old_y1 = entry[2]
+        buckets = self._buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                if not (old_x0 <= cx <= old_x1 and old_y0 <= cy <= old_y1):
+                    bucket = buckets.get((cx, cy))
+                    if bucket is None:
+                        buckets[(cx, cy)] = [entry]
+                    else:
+                        bucket.append(entry)
+        entry[2] = cells
+
+    def _new_entry(self, rect):
+        # entry: [rect, sequence number (None once merged away), cells]
+        entry = [rect, self._next_seq(), (0, 0, -1, -1)]
+        self._entries.append(entry)
+        self._count += 1
+        if rect.w and rect.h:
+            self._register(entry, self._cells(rect))
+
+    def _build_grid(self):
+        self._buckets = {}
+        self._entries = []
+        self._count = 0
+        for rect in self._list:
+            self._new_entry(rect)
+        self._list = None
+
+    def _add_to_grid(self, rect):
+        buckets = self._buckets
+        merge_waste = self.merge_waste
+        target = None
+        grown = True
+        while grown:
+            grown = False
+            x0, y0, x1, y1 = self._cells(rect)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = buckets.get((cx, cy))
+                    if not bucket:
+                        continue
+                    stale = False
+                    for entry in bucket:
+                        if entry[1] is None:
+                            stale = True
+                            continue
+                        if entry is target:
+                            continue
+                        other = entry[0]
+                        if (rect.colliderect(other) or
+                                (merge_waste and self._mergeable(rect, other))):
+                            if target is None and other.contains(rect):
+                                # already covered; it still moves to the end
+                                # of the order, as merging would
+                                entry[1] = self._next_seq()
+                                return
+                            rect.union_ip(other)
+                            grown = True
+                            if target is None:
+                                target = entry
+                            else:
+                                entry[1] = None
+                                self._count -= 1
+                                stale = True
+                    if stale:
+                        bucket[:] = [entry for entry in bucket
+                                     if entry[1] is not None]
+        rect = rect.clip(self.clip)
+        if target is None:
+            self._new_entry(rect)
+        else:
+            # grow the first merged rect in place instead of registering
+            # the whole union again
+            target[0] = rect
+            target[1] = self._next_seq()
+            if rect.w and rect.h:
+                self._register(target, self._cells(rect))
+
+
 class LayeredDirty(LayeredUpdates):
     """LayeredDirty Group is for DirtySprites; subclasses LayeredUpdates
 
@@ -968,6 +1484,12 @@ class LayeredDirty(LayeredUpdates):
         _time_threshold: treshold time for switching between dirty rect mode
             and fullscreen mode; defaults to updating at 80 frames per second,
             which is equal to 1000.0 / 80.0
+        _merge_waste: how many unchanged pixels, relative to the smaller
+            rect, may be redrawn to merge dirty rects that do not overlap;
+            defaults to 0.0, which merges only overlapping rects (see
+            DirtyRegion)
+        _cell_size: grid cell size in pixels used to find overlapping dirty
+            rects when there are many of them; defaults to 64
 
     New in pygame 1.8.0
 
@@ -985,6 +1507,11 @@ class LayeredDirty(LayeredUpdates):
             _time_threshold: treshold time for switching between dirty rect
                 mode and fullscreen mode; defaults to updating at 80 frames per
                 second, which is equal to 1000.0 / 80.0
+            _merge_waste: how many unchanged pixels, relative to the smaller
+                rect, may be redrawn to merge dirty rects that do not
+                overlap; defaults to 0.0
+            _cell_size: grid cell size in pixels used to find overlapping
+                dirty rects; defaults to 64
 
         """
         LayeredUpdates.__init__(self, *sprites, **kwargs)
@@ -994,9 +1521,13 @@ class LayeredDirty(LayeredUpdates):
 
         self._time_threshold = 1000.0 / 80.0 # 1000.0 / fps
 
+        self._merge_waste = 0.0
+        self._cell_size = 64
+
         self._bgd = None
         for key, val in kwargs.items():
-            if key in ['_use_update', '_time_threshold', '_default_layer']:
+            if key in ['_use_update', '_time_threshold', '_default_layer',
+                       '_merge_waste', '_cell_size']:
                 if hasattr(self, key):
                     setattr(self, key, val)
 
@@ -1041,7 +1572,6 @@ class LayeredDirty(LayeredUpdates):
         _sprites = self._spritelist
         _old_rect = self.spritedict
         _update = self.lostsprites
-        _update_append = _update.append
         _ret = None
         _surf_blit = _surf.blit
         _rect = Rect
@@ -1055,42 +1585,29 @@ class LayeredDirty(LayeredUpdates):
         # 0. decide whether to render with update or flip
         start_time = get_ticks()
         if self._use_update: # dirty rects mode
-            # 1. find dirty area on screen and put the rects into _update
-            # still not happy with that part
+            # 1. find dirty area on screen and merge the rects in a
+            # DirtyRegion, which keeps them from overlapping
+            _region = DirtyRegion(_clip, self._cell_size, self._merge_waste)
+            _region_add = _region.add
+            for rec in _update:
+                _region_add(rec)
             for spr in _sprites:
                 if 0 < spr.dirty:
                     # chose the right rect
                     if spr.source_rect:
-                        _union_rect = _rect(spr.rect.topleft,
-                                            spr.source_rect.size)
+                        _region_add(_rect(spr.rect.topleft,
+                                          spr.source_rect.size))
                     else:
-                        _union_rect = _rect(spr.rect)
-
-                    _union_rect_collidelist = _union_rect.collidelist
-                    _union_rect_union_ip = _union_rect.union_ip
-                    i = _union_rect_collidelist(_update)
-                    while -1 < i:
-                        _union_rect_union_ip(_update[i])
-                        del _update[i]
-                        i = _union_rect_collidelist(_update)
-                    _update_append(_union_rect.clip(_clip))
+                        _region_add(spr.rect)
 
                     if _old_rect[spr] is not init_rect:
-                        _union_rect = _rect(_old_rect[spr])
-                        _union_rect_collidelist = _union_rect.collidelist
-                        _union_rect_union_ip = _union_rect.union_ip
-                        i = _union_rect_collidelist(_update)
-                        while -1 < i:
-                            _union_rect_union_ip(_update[i])
-                            del _update[i]
-                            i = _union_rect_collidelist(_update)
-                        _update_append(_union_rect.clip(_clip))
-            # can it be done better? because that is an O(n**2) algorithm in
-            # worst case
+                        _region_add(_old_rect[spr])
+            _update_rects = _region.rects()
+            _region_colliding = _region.colliding
 
             # clear using background
             if _bgd is not None:
-                for rec in _update:
+                for rec in _update_rects:
                     _surf_blit(_bgd, rec, rec)
 
             # 2. draw
@@ -1112,9 +1629,9 @@ class LayeredDirty(LayeredUpdates):
 
                         _spr_rect_clip = _spr_rect.clip
 
-                        for idx in _spr_rect.collidelistall(_update):
+                        for rec in _region_colliding(_spr_rect):
                             # clip
-                            clip = _spr_rect_clip(_update[idx])
+                            clip = _spr_rect_clip(rec)
                             _surf_blit(spr.image,
                                        clip,
                                        (clip[0] + rect_offset_x,
@@ -1130,7 +1647,7 @@ class LayeredDirty(LayeredUpdates):
                                                     spr.blendmode)
                     if spr.dirty == 1:
                         spr.dirty = 0
-            _ret = list(_update)
+            _ret = _update_rects
         else: # flip, full screen mode
             if _bgd is not None:
                 _surf_blit(_bgd, (0, 0))
@@ -1293,6 +1810,252 @@ class GroupSingle(AbstractGroup):
         return self.__sprite is sprite
 
 
+class ArrayGroup(object):
+    """many moving images kept in numpy arrays instead of Sprite objects
+
+    pygame.sprite.ArrayGroup(images, capacity=1024): return ArrayGroup
+
+    For particles, bullets or tiles by the thousand, where a Sprite object
+    with its own update() method per item costs too much. Every item is a
+    row in a few numpy arrays: its position, its velocity and the index of
+    its image in the images sequence given to the constructor. update(),
+    bounce() and clip() work on all the rows at once, and draw() passes the
+    images and positions to Surface.blits() in one call, so there is no
+    Python call per item anywhere.
+
+    The positions and velocities properties are live (n, 2) float arrays and
+    image_ids a live int array, so custom behaviour can be vectorized too,
+    e.g. gravity with group.velocities[:, 1] += 0.5. Their rows are only
+    valid until items are added or removed.
+
+    The items are not Sprites, so an ArrayGroup can not be used with the
+    other groups or the collision functions. Items are drawn at their
+    position truncated to whole pixels, like a Rect would do.
+
+    This class needs numpy; an ImportError is raised without it.
+
+    """
+
+    def __init__(self, images, capacity=1024):
+        self._numpy = numpy = _get_numpy()
+        self.images = list(images)
+        self._image_table = numpy.empty(len(self.images), dtype=object)
+        self._image_table[:] = self.images
+        self._sizes = numpy.array([image.get_size() for image in self.images],
+                                  dtype=numpy.intp).reshape(-1, 2)
+        capacity = max(int(capacity), 1)
+        self._positions = numpy.zeros((capacity, 2), dtype=numpy.float64)
+        self._velocities = numpy.zeros((capacity, 2), dtype=numpy.float64)
+        self._image_ids = numpy.zeros(capacity, dtype=numpy.intp)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return "<%s(%d items)>" % (self.__class__.__name__, self._count)
+
+    def _get_positions(self):
+        return self._positions[:self._count]
+
+    positions = property(_get_positions,
+                         None,
+                         None,
+                         "(n, 2) array with the top left corner of every item")
+
+    def _get_velocities(self):
+        return self._velocities[:self._count]
+
+    velocities = property(_get_velocities,
+                          None,
+                          None,
+                          "(n, 2) array with the movement of every item per "
+                          "update")
+
+    def _get_image_ids(self):
+        return self._image_ids[:self._count]
+
+    image_ids = property(_get_image_ids,
+                         None,
+                         None,
+                         "array with the index in images of every item")
+
+    def _reserve(self, count):
+        numpy = self._numpy
+        needed = self._count + count
+        capacity = len(self._image_ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_positions', '_velocities', '_image_ids'):
+            old = getattr(self, name)
+            new = numpy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def add(self, position, velocity=(0, 0), image=0):
+        """add one item
+
+        ArrayGroup.add(position, velocity=(0, 0), image=0): return int
+
+        Returns the row of the new item.
+
+        """
+        return self.add_array([position], [velocity], image)[0]
+
+    def add_array(self, positions, velocities=None, images=0):
+        """add many items at once
+
+        ArrayGroup.add_array(positions, velocities=None, images=0):
+            return range
+
+        positions and velocities are sequences of (x, y) pairs or (n, 2)
+        arrays; velocities default to standing still. images is one image
+        index for all the new items or one index per item. Returns the rows
+        of the new items.
+
+        """
+        numpy = self._numpy
+        positions = numpy.asarray(positions, dtype=numpy.float64)
+        positions = positions.reshape(-1, 2)
+        count = len(positions)
+        images = numpy.asarray(images, dtype=numpy.intp)
+        if count and (images.min() < 0 or images.max() >= len(self.images)):
+            raise IndexError("image index out of range")
+        self._reserve(count)
+        start = self._count
+        stop = start + count
+        self._positions[start:stop] = positions
+        if velocities is None:
+            self._velocities[start:stop] = 0.0
+        else:
+            self._velocities[start:stop] = numpy.asarray(
+                velocities, dtype=numpy.float64).reshape(-1, 2)
+        self._image_ids[start:stop] = images
+        self._count = stop
+        return range(start, stop)
+
+    def remove(self, rows):
+        """remove items
+
+        ArrayGroup.remove(rows): return None
+
+        rows is a sequence of row numbers or a boolean array with True for
+        every item to remove. The remaining items keep their order, but move
+        to lower rows.
+
+        """
+        numpy = self._numpy
+        keep = numpy.ones(self._count, dtype=bool)
+        keep[rows] = False
+        self._keep(keep)
+
+    def empty(self):
+        """remove all items
+
+        ArrayGroup.empty(): return None
+
+        """
+        self._count = 0
+
+    def _keep(self, keep):
+        count = int(keep.sum())
+        if count == self._count:
+            return
+        for array in (self._positions, self._velocities, self._image_ids):
+            array[:count] = array[:self._count][keep]
+        self._count = count
+
+    def update(self, dt=1.0):
+        """move every item by its velocity
+
+        ArrayGroup.update(dt=1.0): return None
+
+        """
+        count = self._count
+        if dt == 1.0:
+            self._positions[:count] += self._velocities[:count]
+        else:
+            self._positions[:count] += self._velocities[:count] * dt
+
+    def rects(self):
+        """the rect of every item
+
+        ArrayGroup.rects(): return array
+
+        Returns an (n, 4) int array of x, y, width, height rows.
+
+        """
+        numpy = self._numpy
+        count = self._count
+        rects = numpy.empty((count, 4), dtype=numpy.intp)
+        rects[:, :2] = self._positions[:count]
+        rects[:, 2:] = self._sizes[self._image_ids[:count]]
+        return rects
+
+    def bounce(self, rect):
+        """keep the items inside a rect, reflecting them off its sides
+
+        ArrayGroup.bounce(rect): return None
+
+        Items that crossed a side of the rect are mirrored back inside and
+        their velocity along that axis is turned around.
+
+        """
+        numpy = self._numpy
+        rect = Rect(rect)
+        count = self._count
+        positions = self._positions[:count]
+        velocities = self._velocities[:count]
+        sizes = self._sizes[self._image_ids[:count]]
+        for axis, low, high in ((0, rect.left, rect.right),
+                                (1, rect.top, rect.bottom)):
+            position = positions[:, axis]
+            velocity = velocities[:, axis]
+            high = high - sizes[:, axis]
+            below = position < low
+            position[below] = 2 * low - position[below]
+            velocity[below] = numpy.abs(velocity[below])
+            above = position > high
+            position[above] = 2 * high[above] - position[above]
+            velocity[above] = -numpy.abs(velocity[above])
+
+    def clip(self, rect):
+        """remove the items that are completely outside of a rect
+
+        ArrayGroup.clip(rect): return int
+
+        Returns the number of removed items.
+
+        """
+        rect = Rect(rect)
+        rects = self.rects()
+        keep = ((rects[:, 0] < rect.right) &
+                (rects[:, 0] + rects[:, 2] > rect.left) &
+                (rects[:, 1] < rect.bottom) &
+                (rects[:, 1] + rects[:, 3] > rect.top))
+        removed = self._count - int(keep.sum())
+        self._keep(keep)
+        return removed
+
+    def draw(self, surface):
+        """draw all items onto the surface
+
+        ArrayGroup.draw(surface): return None
+
+        The items are drawn in row order with a single Surface.blits() call.
+
+        """
+        numpy = self._numpy
+        count = self._count
+        if not count:
+            return
+        images = self._image_table[self._image_ids[:count]].tolist()
+        positions = self._positions[:count].astype(numpy.intp).tolist()
+        surface.blits(zip(images, positions), 0)
+
+
 # Some different collision detection functions that could be used.
 def collide_rect(left, right):
     """collision detection between two sprites, using rects.
@@ -1509,19 +2272,31 @@ def spritecollide(sprite, group, dokill, collided=None):
     which will be used to calculate the collision.
 
     """
+    if isinstance(group, SpatialGroup):
+        # only the sprites in the grid cells around the sprite can collide
+        group.refresh()
+        sprites = group._candidates(sprite.rect)
+    else:
+        sprites = group.sprites()
+
+    return _collide_sprites(sprite, sprites, dokill, collided)
+
+
+def _collide_sprites(sprite, sprites, dokill, collided):
+    # the sprites of the sprites list that collide with sprite
     if dokill:
 
         crashed = []
         append = crashed.append
 
         if collided:
-            for s in group.sprites():
+            for s in sprites:
                 if collided(sprite, s):
                     s.kill()
                     append(s)
         else:
             spritecollide = sprite.rect.colliderect
-            for s in group.sprites():
+            for s in sprites:
                 if spritecollide(s.rect):
                     s.kill()
                     append(s)
@@ -1529,10 +2304,10 @@ def spritecollide(sprite, group, dokill, collided=None):
         return crashed
 
     elif collided:
-        return [s for s in group if collided(sprite, s)]
+        return [s for s in sprites if collided(sprite, s)]
     else:
         spritecollide = sprite.rect.colliderect
-        return [s for s in group if spritecollide(s.rect)]
+        return [s for s in sprites if spritecollide(s.rect)]
 
 
 def groupcollide(groupa, groupb, dokilla, dokillb, collided=None):
@@ -1552,9 +2327,20 @@ def groupcollide(groupa, groupb, dokilla, dokillb, collided=None):
     sprites must have a "rect" value, which is a rectangle of the sprite area
     that will be used to calculate the collision.
 
+    When groupb is a SpatialGroup its grid is refreshed first, and each
+    sprite of groupa is only tested against the sprites near it.
+
     """
     crashed = {}
     SC = spritecollide
+    if isinstance(groupb, SpatialGroup):
+        # refresh the grid once, not for every sprite of groupa
+        groupb.refresh()
+        candidates = groupb._candidates
+
+        def SC(s, group, dokill, collided):
+            return _collide_sprites(s, candidates(s.rect), dokill, collided)
+
     if dokilla:
         for s in groupa.sprites():
             c = SC(s, groupb, dokillb, collided)
@@ -1588,6 +2374,9 @@ def spritecollideany(sprite, group, collided=None):
 
 
     """
+    if isinstance(group, SpatialGroup):
+        group.refresh()
+        group = group._candidates(sprite.rect)
     if collided:
         for s in group:
             if collided(sprite, s):
@@ -7,6 +7,11 @@ import unittest
 import pygame
 from pygame import sprite
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 ################################# MODULE LEVEL #################################
 
@@ -953,6 +958,58 @@ class LayeredGroupBase:
         self.assertIn(spr, lg_copy)
         self.assertIn(lg_copy, spr.groups())
 
+    def test_layer_order__random_changes(self):
+        # Compare with a plain list kept in layer order, where a sprite
+        # always goes behind the last sprite of its layer.
+        import random
+        rng = random.Random(5)
+        expected = []
+        layers = {}
+
+        def insert(spr, layer):
+            layers[spr] = layer
+            i = len(expected)
+            while i and layers[expected[i - 1]] > layer:
+                i -= 1
+            expected.insert(i, spr)
+
+        for step in range(400):
+            action = rng.random()
+            if action < 0.4 or not expected:
+                spr = self.sprite()
+                layer = rng.randrange(-5, 15)
+                self.LG.add(spr, layer=layer)
+                insert(spr, layer)
+            elif action < 0.6:
+                spr = rng.choice(expected)
+                spr.kill()
+                expected.remove(spr)
+                del layers[spr]
+            elif action < 0.8:
+                spr = rng.choice(expected)
+                layer = rng.randrange(-5, 15)
+                self.LG.change_layer(spr, layer)
+                expected.remove(spr)
+                insert(spr, layer)
+            else:
+                spr = rng.choice(expected)
+                top = layers[expected[-1]]
+                self.LG.move_to_front(spr)
+                expected.remove(spr)
+                insert(spr, top)
+
+            self.assertEqual(self.LG.sprites(), expected)
+            self.assertEqual(self.LG.layers(), sorted(set(layers.values())))
+            if expected:
+                self.assertIs(self.LG.get_top_sprite(), expected[-1])
+                self.assertEqual(self.LG.get_bottom_layer(),
+                                 layers[expected[0]])
+                self.assertIs(self.LG.get_sprite(len(expected) // 2),
+                              expected[len(expected) // 2])
+        for layer in range(-5, 15):
+            self.assertEqual(self.LG.get_sprites_from_layer(layer),
+                             [spr for spr in expected if layers[spr] == layer])
+
 
 ########################## LAYERED RENDER GROUP TESTS ##########################
 
@@ -1096,6 +1153,377 @@ class LayeredDirtyTypeTest__DirtySprite(LayeredGroupBase, unittest.TestCase):
         """
         self._nondirty_intersections_redrawn(True)
 
+    def test_draw__many_dirty_sprites(self):
+        """Ensure the dirty rect mode redraws like a full redraw when the
+        dirty rects are merged in a grid.
+        """
+        import random
+        rng = random.Random(3)
+        background = pygame.Surface((200, 150))
+        background.fill((0, 0, 64))
+        image = pygame.Surface((6, 6))
+        image.fill((255, 0, 0))
+        group = sprite.LayeredDirty(_cell_size=16)
+        sprites = []
+        for _ in range(120):
+            spr = sprite.DirtySprite(group)
+            spr.image = image
+            spr.rect = pygame.Rect(rng.randrange(194), rng.randrange(144),
+                                   6, 6)
+            spr.dirty = 2 if len(sprites) % 2 else 0
+            sprites.append(spr)
+        surface = pygame.Surface((200, 150))
+        group.draw(surface, background)
+
+        for _ in range(3):
+            for spr in sprites:
+                if spr.dirty:
+                    spr.rect.move_ip(rng.randint(-3, 3), rng.randint(-3, 3))
+            group._use_update = True
+            group.draw(surface)
+
+        expected = background.copy()
+        for spr in sprites:
+            expected.blit(spr.image, spr.rect)
+        for y in range(150):
+            for x in range(200):
+                self.assertEqual(surface.get_at((x, y)),
+                                 expected.get_at((x, y)),
+                                 'pos=({}, {})'.format(x, y))
+
+    def test_merge_waste_kwarg(self):
+        group = sprite.LayeredDirty(_merge_waste=0.5, _cell_size=32)
+
+        self.assertEqual(group._merge_waste, 0.5)
+        self.assertEqual(group._cell_size, 32)
+
+
+############################## SPATIAL GROUP TEST ##############################
+
+class SpatialGroupTest(unittest.TestCase):
+
+    def _sprites(self, count, seed, size=20):
+        import random
+        rng = random.Random(seed)
+        sprites = []
+        for _ in range(count):
+            spr = sprite.Sprite()
+            spr.rect = pygame.Rect(rng.randrange(-50, 500),
+                                   rng.randrange(-50, 400),
+                                   rng.randint(0, size), rng.randint(0, size))
+            sprites.append(spr)
+        return sprites
+
+    def _move(self, sprites, seed):
+        import random
+        rng = random.Random(seed)
+        for spr in sprites:
+            spr.rect.move_ip(rng.randint(-40, 40), rng.randint(-40, 40))
+
+    def test_spritecollide__same_as_group(self):
+        sprites = self._sprites(300, 1)
+        plain = sprite.Group(sprites)
+        spatial = sprite.SpatialGroup(sprites, cell_size=16)
+        for probe in self._sprites(100, 2, size=60):
+            self.assertEqual(sprite.spritecollide(probe, spatial, False),
+                             sprite.spritecollide(probe, plain, False))
+            self.assertEqual(
+                sprite.spritecollideany(probe, spatial) is None,
+                sprite.spritecollideany(probe, plain) is None)
+
+    def test_groupcollide__after_moving(self):
+        sprites = self._sprites(300, 3)
+        others = self._sprites(200, 4)
+        plain = sprite.Group(sprites)
+        spatial = sprite.SpatialGroup(sprites, cell_size=32)
+        probes = sprite.Group(others)
+
+        for seed in range(5, 8):
+            self.assertEqual(sprite.groupcollide(probes, spatial, False, False),
+                             sprite.groupcollide(probes, plain, False, False))
+            self._move(sprites, seed)
+
+    def test_groupcollide__dokill(self):
+        spatial = sprite.SpatialGroup(self._sprites(300, 9))
+        probes = sprite.Group(self._sprites(50, 10))
+        expected = sprite.groupcollide(probes, spatial, False, False)
+        killed = set()
+        for hits in expected.values():
+            killed.update(hits)
+
+        crashed = sprite.groupcollide(probes, spatial, False, True)
+
+        self.assertTrue(killed)
+        self.assertEqual(len(spatial), 300 - len(killed))
+        for hits in crashed.values():
+            for spr in hits:
+                self.assertFalse(spr.alive())
+        self.assertEqual(sprite.groupcollide(probes, spatial, False, False), {})
+
+    def test_update_refreshes(self):
+        class Mover(sprite.Sprite):
+            def update(self, dx):
+                self.rect.move_ip(dx, 0)
+
+        mover = Mover()
+        mover.rect = pygame.Rect(0, 0, 10, 10)
+        spatial = sprite.SpatialGroup(mover)
+        probe = sprite.Sprite()
+        probe.rect = pygame.Rect(300, 0, 10, 10)
+
+        self.assertEqual(sprite.spritecollide(probe, spatial, False), [])
+        spatial.update(295)
+        self.assertEqual(sprite.spritecollide(probe, spatial, False), [mover])
+
+    def test_moved_without_update(self):
+        sprites = self._sprites(200, 13)
+        plain = sprite.Group(sprites)
+        spatial = sprite.SpatialGroup(sprites, cell_size=16)
+        probes = self._sprites(50, 14, size=40)
+        sprite.groupcollide(sprite.Group(probes), spatial, False, False)
+
+        for seed in range(15, 18):
+            self._move(sprites, seed)
+            sprites[0].rect.x += 300
+            for probe in probes:
+                self.assertEqual(sprite.spritecollide(probe, spatial, False),
+                                 sprite.spritecollide(probe, plain, False))
+                self.assertEqual(
+                    sprite.spritecollideany(probe, spatial) is None,
+                    sprite.spritecollideany(probe, plain) is None)
+
+    def test_rect_set_after_adding(self):
+        spatial = sprite.SpatialGroup()
+        spr = sprite.Sprite(spatial)
+        spr.rect = pygame.Rect(100, 100, 10, 10)
+        probe = sprite.Sprite()
+        probe.rect = pygame.Rect(105, 105, 10, 10)
+
+        self.assertEqual(sprite.spritecollide(probe, spatial, False), [spr])
+        spr.kill()
+        self.assertEqual(sprite.spritecollide(probe, spatial, False), [])
+
+    def test_margin(self):
+        near = sprite.Sprite()
+        near.rect = pygame.Rect(0, 0, 10, 10)
+        near.radius = 20
+        probe = sprite.Sprite()
+        probe.rect = pygame.Rect(28, 0, 10, 10)
+        probe.radius = 20
+
+        spatial = sprite.SpatialGroup(near, cell_size=16)
+        self.assertEqual(sprite.spritecollide(probe, spatial, False,
+                                              sprite.collide_circle), [])
+        spatial = sprite.SpatialGroup(near, cell_size=16, margin=30)
+        self.assertEqual(sprite.spritecollide(probe, spatial, False,
+                                              sprite.collide_circle), [near])
+
+    def test_removed_before_lookup_not_kept(self):
+        import weakref
+        import gc
+
+        spatial = sprite.SpatialGroup()
+        refs = []
+        for _ in range(10):
+            spr = sprite.Sprite(spatial)
+            refs.append(weakref.ref(spr))
+            spr.kill()
+        del spr
+        gc.collect()
+
+        self.assertEqual([r() for r in refs], [None] * 10)
+
+    def test_unknown_kwarg(self):
+        self.assertRaises(TypeError, sprite.SpatialGroup, cell_size=8,
+                          margn=2)
+
+
+############################### ARRAY GROUP TEST ###############################
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class ArrayGroupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.red = pygame.Surface((4, 4))
+        self.red.fill((255, 0, 0))
+        self.blue = pygame.Surface((2, 6))
+        self.blue.fill((0, 0, 255))
+        self.group = sprite.ArrayGroup([self.red, self.blue], capacity=2)
+
+    def test_add(self):
+        group = self.group
+        self.assertEqual(group.add((1, 2), (3, 4), 1), 0)
+        rows = group.add_array([(5, 6), (7, 8), (9, 10)], images=[0, 1, 0])
+
+        self.assertEqual(list(rows), [1, 2, 3])
+        self.assertEqual(len(group), 4)
+        self.assertEqual(group.positions.tolist(),
+                         [[1, 2], [5, 6], [7, 8], [9, 10]])
+        self.assertEqual(group.velocities.tolist(),
+                         [[3, 4], [0, 0], [0, 0], [0, 0]])
+        self.assertEqual(group.image_ids.tolist(), [1, 0, 1, 0])
+        self.assertRaises(IndexError, group.add, (0, 0), (0, 0), 2)
+
+    def test_update(self):
+        group = self.group
+        group.add_array([(0, 0), (10, 10)], [(1, 2), (-3, 0.5)])
+        group.update()
+        group.update(2.0)
+
+        self.assertEqual(group.positions.tolist(), [[3, 6], [1, 11.5]])
+
+    def test_rects(self):
+        group = self.group
+        group.add((1.7, -2.5), image=1)
+
+        self.assertEqual(group.rects().tolist(), [[1, -2, 2, 6]])
+
+    def test_bounce(self):
+        group = self.group
+        group.add_array([(-3, 5), (98, 5), (50, 50)],
+                        [(-4, 0), (4, 1), (1, 1)])
+        group.bounce((0, 0, 100, 100))
+
+        self.assertEqual(group.positions.tolist(),
+                         [[3, 5], [94, 5], [50, 50]])
+        self.assertEqual(group.velocities.tolist(),
+                         [[4, 0], [-4, 1], [1, 1]])
+
+    def test_clip_and_remove(self):
+        group = self.group
+        group.add_array([(-4, 0), (-3, 0), (10, 10), (100, 5), (20, 20)])
+
+        self.assertEqual(group.clip((0, 0, 100, 100)), 2)
+        self.assertEqual(group.positions.tolist(),
+                         [[-3, 0], [10, 10], [20, 20]])
+        group.remove([0, 2])
+        self.assertEqual(group.positions.tolist(), [[10, 10]])
+        group.empty()
+        self.assertEqual(len(group), 0)
+
+    def test_draw(self):
+        group = self.group
+        group.add_array([(1, 1), (3.9, 2), (-1, 8)], images=[0, 1, 0])
+        surface = pygame.Surface((10, 10))
+        group.draw(surface)
+
+        expected = pygame.Surface((10, 10))
+        expected.blit(self.red, (1, 1))
+        expected.blit(self.blue, (3, 2))
+        expected.blit(self.red, (-1, 8))
+        for y in range(10):
+            for x in range(10):
+                self.assertEqual(surface.get_at((x, y)),
+                                 expected.get_at((x, y)))
+
+
+############################### DIRTY REGION TEST ##############################
+
+class DirtyRegionTest(unittest.TestCase):
+
+    def _random_rects(self, count, size, seed=0):
+        import random
+        rng = random.Random(seed)
+        return [pygame.Rect(rng.randrange(-10, 400), rng.randrange(-10, 300),
+                            rng.randint(0, size), rng.randint(0, size))
+                for _ in range(count)]
+
+    def _collidelist_merge(self, rects, clip):
+        # the merging LayeredDirty.draw() did before DirtyRegion
+        update = []
+        for rect in rects:
+            union = pygame.Rect(rect)
+            i = union.collidelist(update)
+            while -1 < i:
+                union.union_ip(update[i])
+                del update[i]
+                i = union.collidelist(update)
+            update.append(union.clip(clip))
+        return update
+
+    def test_add__few_rects(self):
+        region = sprite.DirtyRegion(pygame.Rect(0, 0, 100, 100))
+        region.add((0, 0, 10, 10))
+        region.add((50, 50, 10, 10))
+        region.add(pygame.Rect(5, 5, 10, 10))
+        region.add((95, 95, 10, 10))
+
+        self.assertEqual(len(region), 3)
+        self.assertEqual(region.rects(), [pygame.Rect(50, 50, 10, 10),
+                                          pygame.Rect(0, 0, 15, 15),
+                                          pygame.Rect(95, 95, 5, 5)])
+
+    def test_add__same_as_collidelist(self):
+        clip = pygame.Rect(0, 0, 400, 300)
+        for size, count in ((4, 50), (12, 400), (40, 300)):
+            rects = self._random_rects(count, size, seed=size)
+            region = sprite.DirtyRegion(clip, cell_size=16, grid_threshold=8)
+            for rect in rects:
+                region.add(rect)
+
+            self.assertEqual(region.rects(),
+                             self._collidelist_merge(rects, clip))
+
+    def test_add__disjoint_and_covering(self):
+        clip = pygame.Rect(0, 0, 400, 300)
+        rects = self._random_rects(500, 10, seed=7)
+        for merge_waste in (0.0, 0.25, 2.0):
+            region = sprite.DirtyRegion(clip, cell_size=16,
+                                        merge_waste=merge_waste,
+                                        grid_threshold=8)
+            for rect in rects:
+                region.add(rect)
+            merged = region.rects()
+
+            self.assertEqual(len(region), len(merged))
+            for i, rect in enumerate(merged):
+                self.assertEqual(rect.collidelist(merged[i + 1:]), -1)
+            for rect in rects:
+                clipped = rect.clip(clip)
+                if clipped.w and clipped.h:
+                    self.assertTrue(clipped.collidelist(merged) > -1)
+                    self.assertTrue(
+                        any(other.contains(clipped) for other in merged))
+
+    def test_merge_waste(self):
+        clip = pygame.Rect(0, 0, 100, 100)
+        for merge_waste, expected in ((0.0, 2), (0.5, 2), (1.0, 1)):
+            region = sprite.DirtyRegion(clip, merge_waste=merge_waste)
+            region.add((0, 0, 10, 10))
+            # 10 pixels wide gap: the union wastes 100 pixels
+            region.add((20, 0, 10, 10))
+
+            self.assertEqual(len(region), expected)
+
+    def test_colliding(self):
+        clip = pygame.Rect(0, 0, 400, 300)
+        rects = self._random_rects(300, 30, seed=11)
+        for grid_threshold in (1000, 8):
+            region = sprite.DirtyRegion(clip, cell_size=16,
+                                        grid_threshold=grid_threshold)
+            for rect in rects:
+                region.add(rect)
+            merged = region.rects()
+            for probe in self._random_rects(50, 60, seed=12):
+                found = region.colliding(probe)
+                expected = [merged[i] for i in probe.collidelistall(merged)]
+
+                self.assertEqual(len(found), len(expected))
+                self.assertEqual(sorted(map(tuple, found)),
+                                 sorted(map(tuple, expected)))
+
+    def test_grid_back_to_list(self):
+        clip = pygame.Rect(0, 0, 400, 300)
+        region = sprite.DirtyRegion(clip, cell_size=16, grid_threshold=8)
+        for i in range(20):
+            region.add((i * 20, 0, 5, 5))
+        region.add((0, 0, 400, 10))
+
+        self.assertEqual(len(region), 1)
+        self.assertEqual(region.rects(), [pygame.Rect(0, 0, 400, 10)])
+        region.add((0, 100, 5, 5))
+        self.assertEqual(len(region), 2)
+
 
 ############################### SPRITE BASE CLASS ##############################
 #
@@ -1208,6 +1636,83 @@ class DirtySpriteTypeTest(SpriteBase, unittest.TestCase):
                sprite.OrderedUpdates,
                sprite.LayeredDirty, ]
 
+class SlotSpriteTypeTest(SpriteBase, unittest.TestCase):
+    Sprite = sprite.SlotSprite
+
+    Groups = [ sprite.Group,
+               sprite.LayeredUpdates,
+               sprite.RenderUpdates,
+               sprite.OrderedUpdates,
+               sprite.SpatialGroup,
+               sprite.SlotGroup, ]
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.sprite, '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.sprite, 'speed', 1)
+
+    def test_weakref(self):
+        import weakref
+        import gc
+
+        s = self.Sprite(self.groups)
+        r = weakref.ref(s)
+        s.kill()
+        del s
+        gc.collect()
+
+        self.assertIsNone(r())
+
+    def test_collide(self):
+        a = self.Sprite()
+        a.rect = pygame.Rect(0, 0, 10, 10)
+        b = self.Sprite()
+        b.rect = pygame.Rect(5, 5, 10, 10)
+        c = sprite.Sprite()
+        c.rect = pygame.Rect(8, 0, 10, 10)
+        group = sprite.Group(b, c)
+
+        self.assertEqual(sorted(sprite.spritecollide(a, group, False), key=id),
+                         sorted([b, c], key=id))
+        self.assertEqual(sprite.groupcollide(sprite.Group(a), group, False,
+                                             True)[a].count(b), 1)
+        self.assertFalse(b.alive())
+        self.assertEqual(len(group), 0)
+
+
+class SlotGroupTest(unittest.TestCase):
+
+    def test_draw_and_clear(self):
+        red = pygame.Surface((4, 4))
+        red.fill((255, 0, 0))
+        background = pygame.Surface((30, 30))
+        background.fill((0, 0, 64))
+        surfaces = []
+        for Group in (sprite.Group, sprite.SlotGroup):
+            surface = background.copy()
+            group = Group()
+            sprites = []
+            for i in range(6):
+                s = sprite.SlotSprite(group)
+                s.image = red
+                s.rect = pygame.Rect(i * 5, i * 4, 4, 4)
+                sprites.append(s)
+            group.draw(surface)
+            group.clear(surface, background)
+            sprites[2].kill()
+            for s in sprites:
+                s.rect.move_ip(1, 2)
+            group.draw(surface)
+            group.clear(surface, background)
+            sprites[4].kill()
+            group.draw(surface)
+            surfaces.append(surface)
+
+        for y in range(30):
+            for x in range(30):
+                self.assertEqual(surfaces[0].get_at((x, y)),
+                                 surfaces[1].get_at((x, y)))
+
+
 ############################## BUG TESTS #######################################
 
 class SingleGroupBugsTest(unittest.TestCase):